@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Deck generation prompts.
+Named, versioned prompt templates that the proxy renders into Claude requests
+from just a topic, slide count and template name, so callers (the browser,
+the batch endpoint and its CLI) do not carry the instruction block.
+
+Templates with a cached prefix put the fixed system prompt, instructions and
+worked examples in one system block marked with cache_control, and only the
+variable parts in the user message. Upstream reuses the prefix for every deck
+rendered from the same template version, which cuts input-token cost and time
+to first token. The prefix must stay byte-identical between calls and be
+longer than the model's cache minimum (1024 tokens for Sonnet, 2048 for
+Haiku), or upstream silently skips caching. Changing it means a new version.
+
+The cache only pays off while traffic keeps the prefix warm (it expires five
+minutes after its last use, and every write costs 25% more than plain input),
+so the cached template is opt-in: callers pin it with prompt_version for batch
+runs, and everything else gets DEFAULT_VERSIONS.
+"""
+
+DEFAULT_MODEL = 'claude-3-5-sonnet-20241022'
+DEFAULT_MAX_TOKENS = 4000
+DEFAULT_TEMPERATURE = 0.7
+DEFAULT_SLIDE_COUNT = 8
+MAX_SLIDE_COUNT = 30
+
+SYSTEM_PROMPT = '당신은 전문적인 프레젠테이션 콘텐츠 작성자입니다.'
+
+# Same names as mapTemplateToType in script.js
+TEMPLATE_TYPES = {
+    'corporate-modern': '모던 비즈니스',
+    'corporate-minimal': '미니멀 비즈니스',
+    'executive-premium': '프리미엄 임원',
+    'creative-bold': '크리에이티브',
+    'marketing-vibrant': '마케팅',
+    'startup-dynamic': '스타트업',
+    'tech-sleek': '기술',
+    'academic-clean': '학술',
+    'educational-friendly': '교육',
+    'data-focus': '데이터',
+    'storytelling': '스토리텔링',
+    'pitch-deck': '피치덱'
+}
+
+# deck v1: the prompt generateSlidesWithClaude used to build in script.js
+DECK_PROMPT_V1 = '''
+    당신은 전문 프레젠테이션 디자이너입니다. 다음 정보로 완벽한 프레젠테이션을 만들어주세요:
+
+    📋 프로젝트 정보:
+    {topic}
+    {template_line}
+    📐 프레젠테이션 구조 가이드:
+    - 1번 슬라이드: 타이틀 + 매력적인 부제목
+    - 2번 슬라이드: 목차/개요 (전체 흐름 제시)
+    - 중간 슬라이드들: 핵심 내용 (논리적 순서)
+    - 마지막 슬라이드: 결론/행동 촉구
+
+    🎯 내용 작성 원칙:
+    1. 각 슬라이드는 하나의 핵심 메시지에 집중
+    2. 제목은 임팩트 있고 명확하게 (10자 이내 권장)
+    3. 내용은 3-5개 핵심 포인트로 구성
+    4. 전문적이면서도 이해하기 쉽게
+    5. 실행 가능한 구체적 내용 포함
+
+    ⚡ 필수 규칙:
+    - bullet point 기호(•, -, *, ○ 등) 절대 사용 금지
+    - 각 포인트는 줄바꿈(\\n)으로만 구분
+    - 숫자, 통계, 구체적 예시 적극 활용
+
+    📊 JSON 형식으로 반환:
+    [
+        {{
+            "title": "매력적인 슬라이드 제목",
+            "content": "첫 번째 핵심 내용\\n두 번째 핵심 내용\\n세 번째 핵심 내용"
+        }}
+    ]
+
+    {slide_count}개의 완벽한 슬라이드를 생성해주세요.
+    '''
+
+V1_TEMPLATE_LINE = '\n    🎨 템플릿 스타일: {}\n'
+
+# deck v2 (opt-in): the same instructions as a fixed, cacheable prefix. The two
+# worked examples lift it over the 1024-token cache minimum, but they also steer
+# the output and add input tokens, so v2 is not a drop-in replacement for v1.
+DECK_INSTRUCTIONS_V2 = '''당신은 전문 프레젠테이션 디자이너입니다. 사용자가 보내는 프로젝트 정보로 완벽한 프레젠테이션을 만들어주세요.
+
+📐 프레젠테이션 구조 가이드:
+- 1번 슬라이드: 타이틀 + 매력적인 부제목
+- 2번 슬라이드: 목차/개요 (전체 흐름 제시)
+- 중간 슬라이드들: 핵심 내용 (논리적 순서)
+- 마지막 슬라이드: 결론/행동 촉구
+
+🎯 내용 작성 원칙:
+1. 각 슬라이드는 하나의 핵심 메시지에 집중
+2. 제목은 임팩트 있고 명확하게 (10자 이내 권장)
+3. 내용은 3-5개 핵심 포인트로 구성
+4. 전문적이면서도 이해하기 쉽게
+5. 실행 가능한 구체적 내용 포함
+
+⚡ 필수 규칙:
+- bullet point 기호(•, -, *, ○ 등) 절대 사용 금지
+- 각 포인트는 줄바꿈(\\n)으로만 구분
+- 숫자, 통계, 구체적 예시 적극 활용
+- 요청받은 슬라이드 개수를 정확히 지킬 것
+- 템플릿 스타일이 주어지면 어조와 구성을 그 스타일에 맞출 것
+
+📊 JSON 형식으로 반환:
+[
+    {
+        "title": "매력적인 슬라이드 제목",
+        "content": "첫 번째 핵심 내용\\n두 번째 핵심 내용\\n세 번째 핵심 내용"
+    }
+]
+
+📝 예시 (프로젝트 정보: 친환경 배달 포장재 스타트업 투자 유치 / 템플릿 스타일: 피치덱 / 6개 슬라이드):
+[
+    {
+        "title": "그린팩",
+        "content": "배달 한 번에 플라스틱 0g\\n100% 생분해 배달 포장재 솔루션\\n시리즈 A 투자 제안"
+    },
+    {
+        "title": "목차",
+        "content": "배달 포장재 문제와 시장 기회\\n그린팩 솔루션과 핵심 기술\\n성과 지표와 비즈니스 모델\\n투자 제안과 자금 사용 계획"
+    },
+    {
+        "title": "문제 정의",
+        "content": "국내 배달 주문 연 10억 건, 주문당 평균 플라스틱 용기 3.2개 사용\\n배달 용기 재활용률 20% 미만, 대부분 소각 또는 매립\\n일회용 포장재 규제 강화로 외식업체 비용 부담 증가"
+    },
+    {
+        "title": "솔루션",
+        "content": "사탕수수 부산물 기반 용기로 90일 내 완전 생분해\\n기존 플라스틱 용기 대비 단가 격차 15%까지 축소\\n뜨거운 국물 100℃에서도 변형 없는 방수 코팅 특허 보유"
+    },
+    {
+        "title": "성과 지표",
+        "content": "거래 외식업체 1,200곳, 월 매출 4억 원 달성\\n재구매율 87%, 월 평균 성장률 18%\\n대형 배달 플랫폼 2곳과 친환경 포장 제휴 체결"
+    },
+    {
+        "title": "투자 제안",
+        "content": "시리즈 A 50억 원 투자 유치 목표\\n생산 설비 증설 60%, 영업망 확대 25%, 연구개발 15%\\n2년 내 연 매출 150억 원, 흑자 전환 계획"
+    }
+]
+
+📝 예시 (프로젝트 정보: 초등학교 5학년 블록 코딩 수업 도입 / 템플릿 스타일: 교육 / 4개 슬라이드):
+[
+    {
+        "title": "코딩으로 생각하기",
+        "content": "블록 코딩으로 배우는 문제 해결력\\n5학년 창의적 체험활동 수업 제안\\n학부모 설명회 자료"
+    },
+    {
+        "title": "왜 지금인가",
+        "content": "2025년부터 초등 정보 교육 시수 2배 확대\\n코딩 경험 학생의 수학 문제 해결 점수 평균 12% 향상\\n놀이처럼 배우며 논리적 사고 습관 형성"
+    },
+    {
+        "title": "수업 운영",
+        "content": "주 1회 40분, 한 학기 16차시 구성\\n1~8차시 순서와 반복, 9~16차시 조건과 변수\\n2인 1조 짝 프로그래밍으로 협업과 발표 연습"
+    },
+    {
+        "title": "함께 만들어요",
+        "content": "가정에서는 주 1회 10분 작품 함께 보기\\n학기 말 작품 발표회에 학부모 초대\\n수업 만족도 설문으로 다음 학기 운영 개선"
+    }
+]
+
+사용자 메시지의 프로젝트 정보와 슬라이드 개수에 맞춰 위 형식의 JSON 배열만 반환하세요.'''
+
+DECK_REQUEST_V2 = '''📋 프로젝트 정보:
+{topic}
+{template_line}
+{slide_count}개의 완벽한 슬라이드를 생성해주세요.'''
+
+V2_TEMPLATE_LINE = '🎨 템플릿 스타일: {}\n'
+
+
+class PromptTemplate:
+    """One named, versioned deck prompt"""
+
+    def __init__(self, name, version, system, user, template_line, cache_prefix=False):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.user = user
+        self.template_line = template_line
+        self.cache_prefix = cache_prefix
+
+    @property
+    def id(self):
+        return f'{self.name}@v{self.version}'
+
+    def render(self, topic, slide_count=DEFAULT_SLIDE_COUNT, template=None, model=DEFAULT_MODEL,
+               max_tokens=DEFAULT_MAX_TOKENS, temperature=DEFAULT_TEMPERATURE, stream=False):
+        """Claude messages payload for one deck"""
+        template_type = TEMPLATE_TYPES.get(template)
+        template_line = self.template_line.format(template_type) if template_type else ''
+        system = self.system
+        if self.cache_prefix:
+            system = [{'type': 'text', 'text': self.system, 'cache_control': {'type': 'ephemeral'}}]
+        payload = {
+            'model': model,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'system': system,
+            'messages': [{
+                'role': 'user',
+                'content': self.user.format(topic=topic, template_line=template_line, slide_count=slide_count)
+            }]
+        }
+        if stream:
+            payload['stream'] = True
+        return payload
+
+
+# Version served when the caller does not pin one
+DEFAULT_VERSIONS = {'deck': 1}
+
+PROMPT_TEMPLATES = {
+    (template.name, template.version): template for template in (
+        PromptTemplate('deck', 1, SYSTEM_PROMPT, DECK_PROMPT_V1, V1_TEMPLATE_LINE),
+        PromptTemplate('deck', 2, SYSTEM_PROMPT + '\n\n' + DECK_INSTRUCTIONS_V2, DECK_REQUEST_V2,
+                       V2_TEMPLATE_LINE, cache_prefix=True)
+    )
+}
+
+
+def get_template(name='deck', version=None):
+    """A prompt template by name; its default version unless one is pinned"""
+    versions = [v for n, v in PROMPT_TEMPLATES if n == name]
+    if not versions:
+        raise ValueError(f'Unknown prompt template: {name}')
+    if version in (None, ''):
+        version = DEFAULT_VERSIONS.get(name, max(versions))
+    try:
+        return PROMPT_TEMPLATES[(name, int(version))]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f'Unknown prompt template version: {name}@v{version}')
+
+
+def slide_count_value(value, default=DEFAULT_SLIDE_COUNT):
+    """Slide count from user input, clamped to 1..MAX_SLIDE_COUNT."""
+    if value in (None, ''):
+        return default
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('slideCount must be a number')
+    if count < 1:
+        raise ValueError('slideCount must be at least 1')
+    return min(count, MAX_SLIDE_COUNT)
+
+
+def topic_value(value):
+    """Topic from user input; raises ValueError when missing"""
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('topic is required')
+    return value.strip()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+In-memory index of registered waitlist emails.
+Each normalised email is stored as a 64-bit BLAKE2b fingerprint in an
+open-addressing hash table backed by a flat array('Q'): 8 bytes per slot at
+up to 70% load, about 17 MB for 1M emails where a set of the strings takes
+~110 MB. Emails are never deleted, so a hit means the address is already
+registered and the signup can be refused without touching SQLite. A miss only
+means "not seen by this process"; INSERT ... ON CONFLICT in the database stays
+the source of truth.
+Two different emails share a fingerprint with probability ~n^2 / 2^65
+(about 3e-8 at 1M signups).
+"""
+
+import hashlib
+import threading
+from array import array
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def fingerprint(email):
+    """Nonzero 64-bit fingerprint of a normalised email (0 marks an empty slot)."""
+    digest = hashlib.blake2b(normalize_email(email).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class EmailIndex:
+    """Compact, thread-safe set of email fingerprints."""
+
+    def __init__(self, capacity=1024, max_load=0.7):
+        self.max_load = max_load
+        self._slots = self._table(capacity)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _table(self, capacity):
+        size = 16
+        while size * self.max_load < capacity:
+            size *= 2
+        return array('Q', bytes(8 * size))
+
+    @staticmethod
+    def _probe(slots, value):
+        mask = len(slots) - 1
+        i = value & mask
+        while True:
+            current = slots[i]
+            if current == 0 or current == value:
+                return i
+            i = (i + 1) & mask
+
+    def __contains__(self, email):
+        # Readers use whichever table is current; a resize swaps in a complete one
+        slots = self._slots
+        return slots[self._probe(slots, fingerprint(email))] != 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, email):
+        """Add an email; returns False if it was already present."""
+        return self.update((email,)) == 1
+
+    def update(self, emails):
+        """Add many emails under one lock; returns how many were new."""
+        added = 0
+        blake2b = hashlib.blake2b
+        with self._lock:
+            slots = self._slots
+            mask = len(slots) - 1
+            limit = int(len(slots) * self.max_load)
+            for email in emails:
+                digest = blake2b(email.strip().lower().encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little') or 1
+                i = value & mask
+                # Inlined _probe: this loop also loads every email at startup
+                while True:
+                    current = slots[i]
+                    if current == 0 or current == value:
+                        break
+                    i = (i + 1) & mask
+                if current == 0:
+                    slots[i] = value
+                    self._count += 1
+                    added += 1
+                    if self._count > limit:
+                        self._grow()
+                        slots = self._slots
+                        mask = len(slots) - 1
+                        limit = int(len(slots) * self.max_load)
+        return added
+
+    def _grow(self):
+        old = self._slots
+        slots = array('Q', bytes(16 * len(old)))
+        for value in old:
+            if value:
+                slots[self._probe(slots, value)] = value
+        self._slots = slots
+
+    @property
+    def nbytes(self):
+        return len(self._slots) * self._slots.itemsize
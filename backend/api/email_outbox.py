@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Persistent email outbox for the waitlist server.
+Emails are written to an outbox table in the same transaction as the signup
+that caused them, and a small pool of background workers delivers them after
+commit. Failed sends are retried with exponential backoff and end up in the
+'dead' status after max_attempts, so SMTP latency and outages never reach the
+signup request.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+STATUS_PENDING = 'pending'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_DEAD = 'dead'
+
+INSERT_MESSAGE = '''
+    INSERT INTO email_outbox (kind, recipient, payload, status, next_attempt_at)
+    VALUES (?, ?, ?, 'pending', ?)
+'''
+# Pending messages that are due, plus 'sending' ones whose worker lease expired
+SELECT_DUE = '''
+    SELECT id, kind, recipient, payload, attempts FROM email_outbox
+    WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+    ORDER BY next_attempt_at
+    LIMIT ?
+'''
+SELECT_NEXT_DUE = "SELECT MIN(next_attempt_at) FROM email_outbox WHERE status IN ('pending', 'sending')"
+CLAIM_MESSAGE = "UPDATE email_outbox SET status = 'sending', attempts = attempts + 1, next_attempt_at = ? WHERE id = ?"
+MARK_SENT = "UPDATE email_outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL WHERE id = ?"
+MARK_RETRY = "UPDATE email_outbox SET status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?"
+
+
+class EmailOutbox:
+    """Outbox table plus the worker threads that drain it.
+
+    senders maps a message kind to a callable(payload) -> bool.
+    """
+
+    def __init__(self, pool, senders, workers=2, max_attempts=6, backoff_base=30.0,
+                 backoff_max=3600.0, lease=300.0, poll_interval=5.0, batch_size=20):
+        self.pool = pool
+        self.senders = senders
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._wake = threading.Condition()
+        self._pending_wakeups = 0
+        self._threads = []
+        self._pid = None
+        self._stopping = False
+        self.sent = 0
+        self.failed = 0
+
+    @staticmethod
+    def init_schema(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                sent_at TIMESTAMP
+            )
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+            ON email_outbox (status, next_attempt_at)
+        ''')
+
+    @staticmethod
+    def enqueue(conn, kind, recipient, payload):
+        """Add a message inside the caller's transaction."""
+        conn.execute(INSERT_MESSAGE, (kind, recipient, json.dumps(payload), time.time()))
+
+    def notify(self, count=1):
+        """Wake workers after a transaction that enqueued messages has committed."""
+        with self._wake:
+            self._pending_wakeups += count
+            self._wake.notify(count)
+
+    def start(self):
+        """Start the workers; in a forked child this starts a fresh set."""
+        if self._threads and self._pid == os.getpid():
+            return
+        self._threads = []
+        self._pid = os.getpid()
+        self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'email-outbox-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        with self._wake:
+            self._stopping = True
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def backoff(self, attempts):
+        """Delay before the next attempt: exponential with jitter, capped."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _claim(self, conn):
+        now = time.time()
+        rows = conn.execute(SELECT_DUE, (now, self.batch_size)).fetchall()
+        for row in rows:
+            conn.execute(CLAIM_MESSAGE, (now + self.lease, row[0]))
+        return rows
+
+    def _deliver(self, message_id, kind, recipient, payload, attempts):
+        error = None
+        try:
+            sender = self.senders[kind]
+            if sender(json.loads(payload)):
+                self.pool.write(lambda conn: conn.execute(MARK_SENT, (message_id,)))
+                self.sent += 1
+                print(f"✅ Sent {kind} email to {recipient}")
+                return
+            error = 'sender reported failure'
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        self.failed += 1
+        attempts += 1
+        if attempts >= self.max_attempts:
+            status, next_attempt = STATUS_DEAD, time.time()
+            print(f"❌ Giving up on {kind} email to {recipient} after {attempts} attempts: {error}")
+        else:
+            status, next_attempt = STATUS_PENDING, time.time() + self.backoff(attempts)
+            print(f"⚠️ {kind} email to {recipient} failed ({error}), retrying in {next_attempt - time.time():.0f}s")
+        self.pool.write(lambda conn: conn.execute(MARK_RETRY, (status, next_attempt, error, message_id)))
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                batch = self.pool.write(self._claim)
+            except Exception as e:
+                print(f"❌ Email outbox error: {str(e)}")
+                batch = []
+
+            for row in batch:
+                self._deliver(*row)
+
+            if len(batch) < self.batch_size:
+                self._sleep()
+
+    def _sleep(self):
+        """Wait for a notify, the next retry coming due, or the poll interval."""
+        timeout = self.poll_interval
+        try:
+            next_due = self.pool.read(lambda conn: conn.execute(SELECT_NEXT_DUE).fetchone()[0])
+        except Exception:
+            next_due = None
+        if next_due is not None:
+            timeout = min(timeout, max(0.0, next_due - time.time()))
+        with self._wake:
+            if self._pending_wakeups == 0 and not self._stopping:
+                self._wake.wait(timeout)
+            self._pending_wakeups = 0
+
+    def counts(self):
+        """Number of messages per status."""
+        rows = self.pool.read(
+            lambda conn: conn.execute('SELECT status, COUNT(*) FROM email_outbox GROUP BY status').fetchall()
+        )
+        counts = {STATUS_PENDING: 0, STATUS_SENDING: 0, STATUS_SENT: 0, STATUS_DEAD: 0}
+        counts.update(rows)
+        return counts
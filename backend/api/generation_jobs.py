@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Asynchronous deck-generation jobs.
+POST /api/jobs queues a generation and returns at once; a fixed pool of worker
+threads runs jobs round-robin across owners (API keys or client addresses), so
+one user's burst cannot starve everyone else. Every job keeps an in-memory
+event log that SSE subscribers replay and follow, and its state and result are
+written to SQLite so they survive the browser going away and can be fetched
+later. API keys are never written to disk: after a restart only jobs that use
+the server's own key are resumed.
+
+Several server processes can share one job database. Each job is claimed by
+the process that queued it, and every process renews a heartbeat lease while
+it runs; jobs whose process stopped renewing (crashed, or exited after a
+drain) are adopted by another one. Cancelling a job held by another process
+sets a flag in the store that its owner picks up on its next heartbeat.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from sqlite_pool import SQLitePool
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+FINISHED = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+INSERT_JOB = '''
+    INSERT INTO generation_jobs (id, owner, status, request, server_key, priority, created_at, claimed_by)
+    VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)
+'''
+MARK_RUNNING = "UPDATE generation_jobs SET status = 'running', started_at = ? WHERE id = ?"
+FINISH_JOB = '''
+    UPDATE generation_jobs SET status = ?, finished_at = ?, slides = ?, text = ?, usage = ?, error = ?
+    WHERE id = ?
+'''
+SELECT_JOB = '''
+    SELECT id, owner, status, request, server_key, priority, created_at, started_at, finished_at,
+           slides, text, usage, error
+    FROM generation_jobs WHERE id = ?
+'''
+SELECT_ORPHANS = '''
+    SELECT id, owner, request, server_key, priority, created_at, cancel_requested FROM generation_jobs
+    WHERE status IN ('queued', 'running')
+      AND (claimed_by IS NULL OR claimed_by NOT IN (SELECT id FROM job_processes WHERE heartbeat >= ?))
+    ORDER BY created_at
+'''
+CLAIM_JOB = 'UPDATE generation_jobs SET claimed_by = ? WHERE id = ?'
+RELEASE_JOB = 'UPDATE generation_jobs SET claimed_by = NULL WHERE id = ? AND claimed_by = ?'
+REQUEST_CANCEL = '''
+    UPDATE generation_jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')
+'''
+SELECT_CANCEL_REQUESTS = '''
+    SELECT id FROM generation_jobs
+    WHERE claimed_by = ? AND cancel_requested = 1 AND status IN ('queued', 'running')
+'''
+HEARTBEAT = '''
+    INSERT INTO job_processes (id, pid, heartbeat) VALUES (?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET heartbeat = excluded.heartbeat
+'''
+PURGE_JOBS = "DELETE FROM generation_jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?"
+
+
+class QueueFull(Exception):
+    """Raised when the job queue (or one owner's share of it) is full."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobCancelled(Exception):
+    """Raised by a runner that noticed its job was cancelled."""
+
+
+class JobFailed(Exception):
+    """Raised by a runner for an upstream error response."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class Job:
+    """One generation: request, state, result and the events sent so far."""
+
+    def __init__(self, job_id, owner, request, api_key=None, priority=0, created_at=None):
+        self.id = job_id
+        self.owner = owner
+        self.request = request
+        self.api_key = api_key
+        self.priority = priority
+        self.status = STATUS_QUEUED
+        self.created_at = created_at or time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.cancel_requested = threading.Event()
+        self._events = []
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def emit(self, event, payload, final=False):
+        with self._cond:
+            self._events.append((event, payload))
+            self._closed = final
+            self._cond.notify_all()
+
+    def events_after(self, last_id, timeout):
+        """([(id, event, payload)] after event id last_id, closed), waiting up to timeout."""
+        with self._cond:
+            if len(self._events) <= last_id + 1 and not self._closed:
+                self._cond.wait(timeout)
+            events = [(i, *self._events[i]) for i in range(max(0, last_id + 1), len(self._events))]
+            return events, self._closed
+
+    def to_dict(self, include_text=False):
+        job = {
+            'id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.result is not None:
+            job['slides'] = self.result.get('slides')
+            job['usage'] = self.result.get('usage')
+            if include_text:
+                job['text'] = self.result.get('text')
+        if self.error is not None:
+            job['error'] = self.error
+        return job
+
+
+def final_event(job):
+    if job.status == STATUS_DONE:
+        return 'done', job.to_dict()
+    return job.status, {'status': job.status, 'error': job.error}
+
+
+class JobStore:
+    """SQLite table holding every job's request, state and result."""
+
+    def __init__(self, db_file):
+        self.pool = SQLitePool(db_file)
+        self.pool.write(self._init_schema)
+
+    @staticmethod
+    def _init_schema(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS generation_jobs (
+                id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                server_key INTEGER NOT NULL DEFAULT 0,
+                priority INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                slides TEXT,
+                text TEXT,
+                usage TEXT,
+                error TEXT,
+                claimed_by TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(generation_jobs)')}
+        if 'claimed_by' not in columns:
+            conn.execute('ALTER TABLE generation_jobs ADD COLUMN claimed_by TEXT')
+        if 'cancel_requested' not in columns:
+            conn.execute('ALTER TABLE generation_jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs (status, created_at)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS job_processes (
+                id TEXT PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                heartbeat REAL NOT NULL
+            )
+        ''')
+
+    def insert(self, job, process_id=None):
+        row = (job.id, job.owner, json.dumps(job.request, ensure_ascii=False),
+               int(job.api_key is None), job.priority, job.created_at, process_id)
+        self.pool.write(lambda conn: conn.execute(INSERT_JOB, row))
+
+    def mark_running(self, job):
+        self.pool.write(lambda conn: conn.execute(MARK_RUNNING, (job.started_at, job.id)))
+
+    def finish(self, job):
+        result = job.result or {}
+        row = (
+            job.status, job.finished_at,
+            json.dumps(result['slides'], ensure_ascii=False) if 'slides' in result else None,
+            result.get('text'),
+            json.dumps(result['usage']) if result.get('usage') else None,
+            job.error, job.id
+        )
+        self.pool.write(lambda conn: conn.execute(FINISH_JOB, row))
+
+    def get(self, job_id):
+        """The stored job as a Job (with no events), or None."""
+        row = self.pool.read(lambda conn: conn.execute(SELECT_JOB, (job_id,)).fetchone())
+        if row is None:
+            return None
+        (job_id, owner, status, request, _, priority, created_at, started_at, finished_at,
+         slides, text, usage, error) = row
+        job = Job(job_id, owner, json.loads(request), priority=priority, created_at=created_at)
+        job.status = status
+        job.started_at = started_at
+        job.finished_at = finished_at
+        job.error = error
+        if status == STATUS_DONE:
+            job.result = {'slides': json.loads(slides or '[]'), 'text': text,
+                          'usage': json.loads(usage) if usage else None}
+        return job
+
+    def heartbeat(self, process_id):
+        """Renew a process's lease on the jobs it has claimed."""
+        self.pool.write(lambda conn: conn.execute(HEARTBEAT, (process_id, os.getpid(), time.time())))
+
+    def claim_orphans(self, process_id, lease):
+        """Claim unfinished jobs whose process has not renewed its lease; returns their rows."""
+        def claim(conn):
+            expired = time.time() - lease
+            conn.execute('DELETE FROM job_processes WHERE heartbeat < ?', (expired,))
+            rows = conn.execute(SELECT_ORPHANS, (expired,)).fetchall()
+            conn.executemany(CLAIM_JOB, [(process_id, row[0]) for row in rows])
+            return rows
+        return self.pool.write(claim)
+
+    def release(self, process_id, job_ids):
+        """Give up claims so other processes adopt the jobs at once."""
+        rows = [(job_id, process_id) for job_id in job_ids]
+        self.pool.write(lambda conn: conn.executemany(RELEASE_JOB, rows))
+
+    def remove_process(self, process_id):
+        self.pool.write(lambda conn: conn.execute('DELETE FROM job_processes WHERE id = ?', (process_id,)))
+
+    def request_cancel(self, job_id):
+        """Flag a job held by another process for cancellation."""
+        return self.pool.write(lambda conn: conn.execute(REQUEST_CANCEL, (job_id,)).rowcount)
+
+    def cancel_requests(self, process_id):
+        """Ids of this process's jobs that another process was asked to cancel."""
+        rows = self.pool.read(lambda conn: conn.execute(SELECT_CANCEL_REQUESTS, (process_id,)).fetchall())
+        return [row[0] for row in rows]
+
+    def purge(self, before):
+        return self.pool.write(lambda conn: conn.execute(PURGE_JOBS, (before,)).rowcount)
+
+
+class JobQueue:
+    """Fair, bounded queue of jobs plus the worker threads that run them.
+
+    runner(job) returns {'slides', 'text', 'usage'} or raises JobFailed /
+    JobCancelled; it may call job.emit() to stream progress to subscribers.
+    """
+
+    def __init__(self, store, runner, workers=4, max_queued=500, max_per_owner=10,
+                 keep_finished=300.0, retention=86400.0, retry_after=5,
+                 heartbeat_interval=5.0, lease=30.0):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_per_owner = max_per_owner
+        self.keep_finished = keep_finished
+        self.retention = retention
+        self.retry_after = retry_after
+        self.heartbeat_interval = heartbeat_interval
+        self.lease = lease
+        self._cond = threading.Condition()
+        self._owners = OrderedDict()   # owner -> deque of queued jobs, in round-robin order
+        self._jobs = {}                # jobs queued, running or recently finished
+        self._finished = deque()       # (finished_at, job id) for dropping old jobs from memory
+        self._threads = []
+        self._pid = None
+        self._purged_at = 0.0
+        self._stopping = False
+        self._stopped = threading.Event()
+        self._retired = threading.Event()    # stopped, and the last running job has finished
+        self._adopt_lock = threading.Lock()  # adoption never overlaps stop()
+        self.process_id = None
+        self.queued = 0
+        self.running = 0
+        self.completed = {STATUS_DONE: 0, STATUS_FAILED: 0, STATUS_CANCELLED: 0}
+
+    def start(self):
+        """Adopt orphaned stored jobs and start the workers (again, in a forked child)."""
+        if self._threads and self._pid == os.getpid():
+            return
+        self._threads = []
+        self._pid = os.getpid()
+        self.process_id = uuid.uuid4().hex
+        self.store.heartbeat(self.process_id)
+        self._adopt()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'generation-job-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._maintain, name='generation-job-lease', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _adopt(self):
+        """Claim jobs left by processes that are gone; resume those that use the server's key."""
+        resumed = 0
+        for job_id, owner, request, server_key, priority, created_at, cancel_requested in \
+                self.store.claim_orphans(self.process_id, self.lease):
+            with self._cond:
+                if job_id in self._jobs:
+                    continue  # ours already; the lease lapsed while this process was stalled
+            job = Job(job_id, owner, json.loads(request), priority=priority, created_at=created_at)
+            if cancel_requested:
+                job.status = STATUS_CANCELLED
+            elif server_key:
+                self._enqueue(job)
+                resumed += 1
+                continue
+            else:
+                # The client's API key was only ever held in memory
+                job.status = STATUS_FAILED
+                job.error = 'Interrupted by a server restart; submit the job again'
+            job.finished_at = time.time()
+            self.store.finish(job)
+        if resumed:
+            print(f"Resumed {resumed} queued generation jobs")
+
+    def _maintain(self):
+        """Renew this process's lease, adopt orphaned jobs and apply cancels sent to other processes.
+
+        Keeps renewing after stop() while jobs are still running here, so no
+        other process adopts (and reruns) them before their threads finish.
+        """
+        while not self._retired.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat(self.process_id)
+                with self._adopt_lock:
+                    if not self._stopping:
+                        self._adopt()
+                for job_id in self.store.cancel_requests(self.process_id):
+                    self.cancel(job_id)
+            except Exception as e:
+                print(f"Generation job lease error: {e}")
+
+    def _enqueue(self, job):
+        with self._cond:
+            stopped = self._stopped.is_set()
+            if not stopped:
+                self._jobs[job.id] = job
+                self._owners.setdefault(job.owner, deque()).append(job)
+                self.queued += 1
+                self._cond.notify()
+        if stopped:
+            # Arrived after stop() gave up this process's jobs
+            self._abandon([job])
+            return
+        job.emit('status', {'status': STATUS_QUEUED})
+
+    def submit(self, owner, request, api_key=None, priority=0):
+        """Queue a job; raises QueueFull when there is no room for it."""
+        with self._cond:
+            if self._stopping:
+                raise QueueFull('Server is restarting, retry later', self.retry_after)
+            if self.queued >= self.max_queued:
+                raise QueueFull('Job queue is full, retry later', self.retry_after)
+            owner_queue = self._owners.get(owner)
+            if owner_queue is not None and len(owner_queue) >= self.max_per_owner:
+                raise QueueFull(f'Too many queued jobs (limit {self.max_per_owner})', self.retry_after)
+
+        job = Job(uuid.uuid4().hex, owner, request, api_key, priority)
+        self.store.insert(job, self.process_id)
+        self._enqueue(job)
+        self._housekeeping()
+        return job
+
+    def _next(self):
+        """Take the head job of the owner whose turn it is."""
+        with self._cond:
+            while not self._owners or self._stopped.is_set():
+                self._cond.wait()
+            owner, owner_queue = self._owners.popitem(last=False)
+            job = owner_queue.popleft()
+            if owner_queue:
+                self._owners[owner] = owner_queue   # back of the line
+            self.queued -= 1
+            self.running += 1
+            # Under the lock, so a cancel() from here on signals the running job
+            job.status = STATUS_RUNNING
+            job.started_at = time.time()
+            return job
+
+    def _run(self):
+        while True:
+            job = self._next()
+            try:
+                if job.cancel_requested.is_set():
+                    raise JobCancelled()
+                self.store.mark_running(job)
+                job.emit('status', {'status': STATUS_RUNNING})
+                job.result = self.runner(job)
+                job.status = STATUS_DONE
+            except JobCancelled:
+                job.status = STATUS_CANCELLED
+            except JobFailed as e:
+                job.status = STATUS_FAILED
+                job.error = str(e)
+            except Exception as e:
+                print(f"Generation job {job.id} failed: {e}")
+                job.status = STATUS_FAILED
+                job.error = str(e) or e.__class__.__name__
+            self._finish(job)
+            with self._cond:
+                # Only once the result is stored, so stop() never exits before it is
+                self.running -= 1
+                self._cond.notify_all()
+                retire = self._stopped.is_set() and not self.running
+            if retire:
+                self._retire()
+
+    def _finish(self, job):
+        job.finished_at = time.time()
+        try:
+            self.store.finish(job)
+        except Exception as e:
+            print(f"Could not store generation job {job.id}: {e}")
+        with self._cond:
+            self.completed[job.status] += 1
+            self._finished.append((job.finished_at, job.id))
+        job.emit(*final_event(job), final=True)
+
+    def _housekeeping(self):
+        now = time.time()
+        with self._cond:
+            while self._finished and self._finished[0][0] < now - self.keep_finished:
+                self._jobs.pop(self._finished.popleft()[1], None)
+            purge = now - self._purged_at > 3600
+            if purge:
+                self._purged_at = now
+        if purge:
+            self.store.purge(now - self.retention)
+
+    def get(self, job_id):
+        """The job from memory (with its events) or from the store, or None."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self.store.get(job_id)
+
+    def follow(self, job_id, last_id=-1, heartbeat=15.0, poll=1.0):
+        """Yield (id, event, payload) after last_id until the job finishes; None as a heartbeat.
+
+        Jobs this process is not running (e.g. queued in another worker
+        process) are followed by polling the store for status changes; once
+        this process is stopping those streams end early, so the client
+        reconnects to a process that stays up.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            while True:
+                events, closed = job.events_after(last_id, heartbeat)
+                if not events and not closed:
+                    yield None
+                for event in events:
+                    last_id = event[0]
+                    yield event
+                if closed:
+                    return
+
+        status = None
+        waited = 0.0
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            if job.status != status:
+                status = job.status
+                last_id += 1
+                if status in FINISHED:
+                    yield (last_id, *final_event(job))
+                    return
+                yield last_id, 'status', {'status': status}
+            elif waited >= heartbeat:
+                waited = 0.0
+                yield None
+            if self._stopping:
+                return
+            time.sleep(poll)
+            waited += poll
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job, or None if unknown."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == STATUS_QUEUED:
+                owner_queue = self._owners.get(job.owner)
+                if owner_queue is not None and job in owner_queue:
+                    owner_queue.remove(job)
+                    if not owner_queue:
+                        del self._owners[job.owner]
+                    self.queued -= 1
+                    job.status = STATUS_CANCELLED
+        if job is None:
+            # Held by another process (if anyone): it cancels on its next heartbeat
+            self.store.request_cancel(job_id)
+            return self.store.get(job_id)
+        if job.status == STATUS_CANCELLED and job.finished_at is None:
+            self._finish(job)
+        elif job.status == STATUS_RUNNING:
+            job.cancel_requested.set()
+        return job
+
+    def stop(self, timeout=0.0):
+        """Wind down before the process exits; returns how many jobs were left unfinished.
+
+        Queued jobs that use the server's key are handed back to the store at
+        once for other processes to adopt. Running jobs, and queued ones that
+        hold a client's key, get up to timeout seconds to finish here; after
+        that the queued server-key ones are handed back too (and restarted
+        elsewhere) and the rest are failed. Jobs still running are never
+        handed back while their thread runs: the lease is renewed until they
+        finish, and only lapses (so another process adopts them) if this
+        process exits first.
+        """
+        if self.process_id is None:
+            return 0
+        with self._adopt_lock, self._cond:
+            self._stopping = True
+            handed_back = self._take_queued(lambda job: job.api_key is None)
+        self._hand_back(handed_back)
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self.queued or self.running) and time.monotonic() < deadline:
+                self._cond.wait(min(1.0, max(0.0, deadline - time.monotonic())))
+            # From here on no job starts in this process
+            self._stopped.set()
+            leftover = self._take_queued(lambda job: True)
+            running = self.running
+        self._abandon(leftover)
+        if not running:
+            self._retire()
+        return len(leftover) + running
+
+    def _retire(self):
+        """Stop renewing the lease once this process holds no running jobs."""
+        self._retired.set()
+        try:
+            self.store.remove_process(self.process_id)
+        except Exception as e:
+            print(f"Could not release generation job lease: {e}")
+
+    def _take_queued(self, predicate):
+        """Remove matching jobs from the queue (caller holds the lock)."""
+        taken = []
+        for owner in list(self._owners):
+            owner_queue = self._owners[owner]
+            for job in [job for job in owner_queue if predicate(job)]:
+                owner_queue.remove(job)
+                taken.append(job)
+            if not owner_queue:
+                del self._owners[owner]
+        self.queued -= len(taken)
+        return taken
+
+    def _abandon(self, jobs):
+        """Hand back queued jobs that use the server's key and fail those holding a client's key."""
+        self._hand_back([job for job in jobs if job.api_key is None])
+        for job in jobs:
+            if job.api_key is not None:
+                job.status = STATUS_FAILED
+                job.error = 'Interrupted by a server restart; submit the job again'
+                self._finish(job)
+
+    def _hand_back(self, jobs):
+        """Release jobs to other processes and end this process's event streams for them."""
+        if not jobs:
+            return
+        try:
+            self.store.release(self.process_id, [job.id for job in jobs])
+        except Exception as e:
+            print(f"Could not hand back generation jobs: {e}")
+        with self._cond:
+            for job in jobs:
+                self._jobs.pop(job.id, None)
+        for job in jobs:
+            # Subscribers reconnect and follow the job wherever it resumes
+            job.emit('status', {'status': STATUS_QUEUED}, final=True)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Group commit for SQLite writes.
+Callers submit items and get a Future back; one writer thread takes whatever
+queued up while the previous commit was running (up to max_batch rows,
+optionally waiting max_delay for more) and applies the whole batch in a single
+transaction, so many signups share one commit and one fsync. Futures resolve
+only after COMMIT returns.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class GroupCommitWriter:
+    """Batches submitted items into shared write transactions.
+
+    handler(conn, items) runs inside the transaction and returns one result per
+    item; an Exception in the list is raised to that item's caller only.
+    """
+
+    def __init__(self, pool, handler, max_batch=100, max_delay=0.0):
+        self.pool = pool
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_thread(self):
+        # The writer thread does not survive fork(); start one per process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def submit(self, item):
+        """Queue item for the next batch; returns a Future for its result."""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            items = [item for item, _ in batch]
+            try:
+                results = self.pool.write(lambda conn: self.handler(conn, items))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def close(self):
+        """Flush queued items and stop the writer thread."""
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid():
+            self._queue.put(None)
+            thread.join()
+            self._thread = None
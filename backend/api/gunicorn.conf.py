@@ -0,0 +1,64 @@
+"""
+Gunicorn config for the waitlist server in production.
+
+    gunicorn -c backend/api/gunicorn.conf.py waitlist_wsgi:app
+
+Pre-forks WAITLIST_WORKERS processes, each with WAITLIST_THREADS request
+threads, its own SQLite connections, group-commit writer and email outbox
+workers (SQLite WAL and BEGIN IMMEDIATE keep them consistent across processes).
+
+Signals to the master process:
+    HUP   graceful reload: start workers with the new code and config, then
+          let the old ones finish their requests and exit
+    TERM  graceful shutdown (up to graceful_timeout), QUIT/INT immediate
+    TTIN / TTOU   add / remove one worker
+"""
+
+import multiprocessing
+import os
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+# Import waitlist_wsgi (and, through it, backend/config) from any directory
+pythonpath = f"{_here},{os.path.join(os.path.dirname(_here), 'config')}"
+
+bind = f"{os.getenv('WAITLIST_HOST', '0.0.0.0')}:{os.getenv('WAITLIST_PORT', '5001')}"
+workers = int(os.getenv('WAITLIST_WORKERS', str(multiprocessing.cpu_count())))
+worker_class = 'gthread'
+threads = int(os.getenv('WAITLIST_THREADS', '8'))
+
+# Connection limits: open connections per worker (including idle keep-alive
+# ones) and the kernel accept queue in front of all workers
+worker_connections = int(os.getenv('WAITLIST_MAX_CONNECTIONS', '1000'))
+backlog = int(os.getenv('WAITLIST_BACKLOG', '2048'))
+keepalive = int(os.getenv('WAITLIST_KEEPALIVE', '5'))
+
+# A worker that stops responding for `timeout` seconds is killed and replaced;
+# `graceful_timeout` is how long reloads and shutdowns wait for open requests
+timeout = int(os.getenv('WAITLIST_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('WAITLIST_GRACEFUL_TIMEOUT', '30'))
+
+# Optionally recycle workers after this many requests (0 = never), staggered so
+# they never restart together; each restart drops that worker's idle connections
+max_requests = int(os.getenv('WAITLIST_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Request size limits (headers only; bodies are small JSON)
+limit_request_line = 4094
+limit_request_fields = 50
+limit_request_field_size = 8190
+
+proc_name = 'slidecraft-waitlist'
+accesslog = os.getenv('WAITLIST_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    # Background threads do not survive fork(); start this worker's own
+    import waitlist_wsgi
+    waitlist_wsgi.start_background()
+
+
+def worker_exit(server, worker):
+    import waitlist_wsgi
+    waitlist_wsgi.shutdown()
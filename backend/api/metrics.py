@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Low-overhead Prometheus-style metrics for the proxy server.
+Counters and histograms are sharded per thread: the hot path only touches the
+calling thread's own dict, and shards are summed when /metrics is scraped.
+A thread's shard is folded into a shared base when the thread exits, so
+short-lived threads do not leave shards behind.
+"""
+
+import threading
+import weakref
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _ShardOwner:
+    """Held only by a thread's local storage; collected when the thread exits."""
+
+    __slots__ = ('__weakref__',)
+
+
+class _Sharded:
+    """Base for metrics whose state lives in one dict per thread."""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}  # totals from threads that have exited
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        """Fold an exited thread's shard into the shared base."""
+        with self._lock:
+            self._shards.remove(shard)
+            self._merge(self._retired, shard)
+
+    def _merge(self, totals, shard):
+        raise NotImplementedError
+
+    def _snapshots(self):
+        with self._lock:
+            shards = list(self._shards)
+            retired = {}
+            self._merge(retired, self._retired)
+        return [retired] + [shard.copy() for shard in shards]
+
+    def collect(self):
+        totals = {}
+        for shard in self._snapshots():
+            self._merge(totals, shard)
+        return totals
+
+
+class Counter(_Sharded):
+    """Monotonic counter; inc() touches only the calling thread's shard."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, totals, shard):
+        for labels, value in shard.items():
+            totals[labels] = totals.get(labels, 0) + value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class UpDownCounter(Counter):
+    """Per-thread sharded gauge for values that go up and down (e.g. in flight)."""
+
+    kind = 'gauge'
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+
+class Histogram(_Sharded):
+    """Cumulative histogram with fixed buckets, sharded per thread."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # One slot per bucket, then +Inf, sum
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    def _merge(self, totals, shard):
+        for labels, state in shard.items():
+            total = totals.get(labels)
+            if total is None:
+                totals[labels] = list(state)
+            else:
+                for i, value in enumerate(state):
+                    total[i] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels, state in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), state[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(
+                    f'{self.name}_bucket{_format_labels(self.labelnames, labels, ("le", le))} {cumulative}'
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class CallbackGauge:
+    """Gauge whose labelled values are read from a callback at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, callback, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered in the Prometheus text format."""
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def up_down_counter(self, name, help_text, labelnames=()):
+        return self.register(UpDownCounter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, callback, labelnames=()):
+        return self.register(CallbackGauge(name, help_text, callback, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode('utf-8')
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Pre-fork process supervisor for the SlideCraft AI proxy server.
+Runs several copies of a worker command that each bind the same port with
+SO_REUSEPORT, so the kernel spreads connections across processes (and cores).
+Workers are started as fresh interpreters rather than fork()ed, so no
+threads, SQLite connections or stale code carry over, and a reload picks up
+new code from disk.
+
+Each worker gets --ready-fd N, the write end of a pipe it writes one byte to
+once it is listening, and drains its open requests when sent SIGTERM.
+
+Signals to the supervisor:
+    HUP        rolling reload: start a new worker, wait until it is ready,
+               then let one old worker drain and exit; repeat for each slot
+    TERM/INT   graceful shutdown (workers drain for up to drain_timeout);
+               a second one kills the workers at once
+"""
+
+import errno
+import os
+import select
+import signal
+import socket
+import subprocess
+import time
+
+READY_TIMEOUT = 30.0
+MAX_RESTART_DELAY = 30.0
+# A worker that exits sooner than this after starting counts as a failed start
+MIN_UPTIME = 10.0
+
+ADDRESS_IN_USE = (errno.EADDRINUSE, 10048)  # 10048: WSAEADDRINUSE on Windows
+
+
+def reuse_port_supported():
+    return hasattr(socket, 'SO_REUSEPORT') and os.name == 'posix'
+
+
+def port_available(port, host=''):
+    """Whether nothing is listening on the port yet (not even with SO_REUSEPORT)."""
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        probe.bind((host, port))
+        return True
+    except OSError as e:
+        if e.errno in ADDRESS_IN_USE:
+            return False
+        raise
+    finally:
+        probe.close()
+
+
+class Worker:
+    """One worker process and its place in the pool."""
+
+    def __init__(self, slot, generation, process, ready_fd):
+        self.slot = slot
+        self.generation = generation
+        self.process = process
+        self.ready_fd = ready_fd
+        self.ready = False
+        self.retiring = False
+        self.started = time.monotonic()
+        self.retired_at = None
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def close_pipe(self):
+        if self.ready_fd is not None:
+            os.close(self.ready_fd)
+            self.ready_fd = None
+
+
+class PreforkSupervisor:
+    """Keeps `processes` workers running, restarting crashed ones with backoff."""
+
+    def __init__(self, command, processes, drain_timeout=300.0, ready_timeout=READY_TIMEOUT):
+        self.command = list(command)
+        self.processes = processes
+        self.drain_timeout = drain_timeout
+        self.ready_timeout = ready_timeout
+        self.workers = []
+        self.generation = 0
+        self._restart_at = {}   # slot -> monotonic time its next start is allowed
+        self._failures = {}     # slot -> failed starts in a row
+        self._reload = False
+        self._stop = 0          # stop signals received
+
+    def run(self):
+        """Supervise until TERM/INT and every worker has exited."""
+        signal.signal(signal.SIGHUP, self._on_hup)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        print(f"Supervisor {os.getpid()}: {self.processes} worker processes "
+              f"(kill -HUP {os.getpid()} to reload, kill -TERM to stop)")
+        while not self._stop:
+            if self._reload:
+                self._reload = False
+                self.generation += 1
+                print(f"Reloading {self.processes} workers one at a time")
+            self._ensure_workers()
+            self._roll()
+            self._wait(0.5)
+        self._shutdown()
+
+    def _on_hup(self, signum, frame):
+        self._reload = True
+
+    def _on_stop(self, signum, frame):
+        self._stop += 1
+        if self._stop > 1:
+            for worker in self.workers:
+                self._signal(worker, signal.SIGKILL)
+
+    def _spawn(self, slot):
+        read_fd, write_fd = os.pipe()
+        try:
+            process = subprocess.Popen(self.command + ['--ready-fd', str(write_fd)], pass_fds=(write_fd,))
+        except OSError:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        worker = Worker(slot, self.generation, process, read_fd)
+        self.workers.append(worker)
+        return worker
+
+    def _signal(self, worker, signum):
+        try:
+            worker.process.send_signal(signum)
+        except ProcessLookupError:
+            pass
+
+    def _retire(self, worker):
+        """Ask a worker to drain its requests and exit."""
+        worker.retiring = True
+        worker.retired_at = time.monotonic()
+        self._signal(worker, signal.SIGTERM)
+
+    def _ensure_workers(self):
+        """Start a worker for every slot that has none (first start or after a crash)."""
+        now = time.monotonic()
+        for slot in range(self.processes):
+            if any(w.slot == slot and not w.retiring for w in self.workers):
+                continue
+            if now < self._restart_at.get(slot, 0.0):
+                continue
+            try:
+                self._spawn(slot)
+            except OSError as e:
+                print(f"Could not start worker {slot}: {e}")
+                self._failed_start(slot)
+
+    def _roll(self):
+        """Replace outdated workers one at a time, each once its successor is ready."""
+        outdated = [w for w in self.workers if not w.retiring and w.generation < self.generation]
+        if not outdated:
+            return
+        starting = [w for w in self.workers if not w.retiring and not w.ready]
+        if starting:
+            return
+        old = outdated[0]
+        successor = next((w for w in self.workers if w.slot == old.slot and not w.retiring
+                          and w.generation == self.generation), None)
+        if successor is None:
+            try:
+                self._spawn(old.slot)
+            except OSError as e:
+                self._abort_reload(f'could not start a worker: {e}')
+            return
+        self._retire(old)
+        print(f"Worker {old.slot} (pid {old.pid}) replaced by pid {successor.pid}; draining")
+
+    def _abort_reload(self, reason):
+        """Keep the remaining old workers when new ones cannot start."""
+        print(f"Reload failed ({reason}); keeping the running workers")
+        for worker in self.workers:
+            if not worker.retiring:
+                worker.generation = self.generation
+
+    def _failed_start(self, slot):
+        failures = self._failures.get(slot, 0) + 1
+        self._failures[slot] = failures
+        delay = min(MAX_RESTART_DELAY, 0.5 * 2 ** (failures - 1))
+        self._restart_at[slot] = time.monotonic() + delay
+        return delay
+
+    def _wait(self, timeout):
+        """Collect readiness signals and reap exited workers."""
+        pipes = {w.ready_fd: w for w in self.workers if w.ready_fd is not None}
+        readable = []
+        if pipes:
+            readable = select.select(list(pipes), [], [], timeout)[0]
+        else:
+            time.sleep(timeout)
+        for fd in readable:
+            worker = pipes[fd]
+            if os.read(fd, 1):
+                worker.ready = True
+                print(f"Worker {worker.slot} (pid {worker.pid}) ready")
+            worker.close_pipe()
+
+        now = time.monotonic()
+        for worker in list(self.workers):
+            if not worker.ready and not worker.retiring and now - worker.started > self.ready_timeout:
+                print(f"Worker {worker.slot} (pid {worker.pid}) not ready after {self.ready_timeout:g}s")
+                self._signal(worker, signal.SIGKILL)
+            if worker.retiring and now - worker.retired_at > self.drain_timeout + 10:
+                self._signal(worker, signal.SIGKILL)
+            code = worker.process.poll()
+            if code is None:
+                continue
+            self.workers.remove(worker)
+            worker.close_pipe()
+            self._reap(worker, code, now)
+
+    def _reap(self, worker, code, now):
+        if worker.retiring:
+            outcome = 'after draining' if code == 0 else f'with code {code} while draining'
+            print(f"Worker {worker.slot} (pid {worker.pid}) exited {outcome}")
+            return
+        uptime = now - worker.started
+        if worker.ready and uptime >= MIN_UPTIME:
+            self._failures.pop(worker.slot, None)
+            print(f"Worker {worker.slot} (pid {worker.pid}) exited with code {code}; restarting")
+            return
+        delay = self._failed_start(worker.slot)
+        if any(w.slot == worker.slot and not w.retiring and w.generation < worker.generation for w in self.workers):
+            # A replacement during a reload: the old worker it was meant to replace keeps serving
+            print(f"Worker {worker.slot} (pid {worker.pid}) exited with code {code} after {uptime:.1f}s")
+            self._abort_reload(f'new worker exited with code {code}')
+            return
+        print(f"Worker {worker.slot} (pid {worker.pid}) exited with code {code} after {uptime:.1f}s; "
+              f"restarting in {delay:g}s")
+
+    def _shutdown(self):
+        print(f"Stopping {len(self.workers)} workers (draining up to {self.drain_timeout:g}s)...")
+        for worker in self.workers:
+            if not worker.retiring:
+                self._retire(worker)
+        while self.workers:
+            self._wait(0.5)
+        print("Server stopped.")
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Multi-provider routing for generation requests.
+Pluggable adapters translate one generic request into Claude, OpenAI or Gemini
+calls. The router ranks providers by observed latency and error rate, hedges
+slow calls onto a second provider and fails over when a provider errors.
+Requests the provider rejects as invalid (4xx other than 408/429) are returned
+to the caller instead: they neither fail over nor count against the provider.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class ProviderError(Exception):
+    """Raised when a provider call fails or returns an unusable response."""
+
+    def __init__(self, provider, message, status=None):
+        super().__init__(f'{provider}: {message}')
+        self.provider = provider
+        self.status = status
+
+
+class ProviderRejected(ProviderError):
+    """A 4xx answer caused by the request itself; retrying elsewhere would not help."""
+
+
+# 4xx statuses that still say something about the provider rather than the request
+RETRYABLE_CLIENT_STATUSES = (408, 429)
+
+
+class NoProviderAvailable(Exception):
+    """Raised when every candidate provider failed or none is configured."""
+
+    def __init__(self, errors=None):
+        self.errors = errors or []
+        detail = '; '.join(str(e) for e in self.errors) or 'no provider configured'
+        super().__init__(f'All providers failed: {detail}')
+
+
+class ProviderAdapter:
+    """Base adapter: builds the upstream request and parses its response."""
+
+    name = 'base'
+
+    def __init__(self, api_key, api_url, model):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.model = model
+
+    @property
+    def available(self):
+        return bool(self.api_key)
+
+    def build_request(self, request):
+        """Return (url, headers, payload dict) for a generic request."""
+        raise NotImplementedError
+
+    def parse_response(self, data):
+        """Return (content text, usage dict) from a decoded response body."""
+        raise NotImplementedError
+
+
+class ClaudeAdapter(ProviderAdapter):
+    name = 'claude'
+
+    def build_request(self, request):
+        payload = {
+            'model': request.get('model') or self.model,
+            'max_tokens': request.get('max_tokens', 4000),
+            'temperature': request.get('temperature', 0.7),
+            'messages': [{'role': 'user', 'content': request['prompt']}]
+        }
+        if request.get('system'):
+            payload['system'] = request['system']
+        headers = {
+            'Content-Type': 'application/json',
+            'x-api-key': self.api_key,
+            'anthropic-version': '2023-06-01'
+        }
+        return self.api_url, headers, payload
+
+    def parse_response(self, data):
+        return data['content'][0]['text'], data.get('usage', {})
+
+
+class OpenAIAdapter(ProviderAdapter):
+    name = 'openai'
+
+    def build_request(self, request):
+        messages = []
+        if request.get('system'):
+            messages.append({'role': 'system', 'content': request['system']})
+        messages.append({'role': 'user', 'content': request['prompt']})
+        payload = {
+            'model': request.get('model') or self.model,
+            'max_tokens': request.get('max_tokens', 4000),
+            'temperature': request.get('temperature', 0.7),
+            'messages': messages
+        }
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
+        return self.api_url, headers, payload
+
+    def parse_response(self, data):
+        return data['choices'][0]['message']['content'], data.get('usage', {})
+
+
+class GeminiAdapter(ProviderAdapter):
+    name = 'gemini'
+
+    def build_request(self, request):
+        payload = {
+            'contents': [{'parts': [{'text': request['prompt']}]}],
+            'generationConfig': {
+                'temperature': request.get('temperature', 0.7),
+                'maxOutputTokens': request.get('max_tokens', 4000)
+            }
+        }
+        if request.get('system'):
+            payload['systemInstruction'] = {'parts': [{'text': request['system']}]}
+        headers = {
+            'Content-Type': 'application/json',
+            'x-goog-api-key': self.api_key
+        }
+        url = self.api_url.replace('{model}', request.get('model') or self.model)
+        return url, headers, payload
+
+    def parse_response(self, data):
+        usage = data.get('usageMetadata', {})
+        return data['candidates'][0]['content']['parts'][0]['text'], {
+            'input_tokens': usage.get('promptTokenCount', 0),
+            'output_tokens': usage.get('candidatesTokenCount', 0)
+        }
+
+
+def default_adapters():
+    """Adapters configured from environment variables (keys stay server-side)."""
+    return [
+        ClaudeAdapter(
+            os.getenv('CLAUDE_API_KEY'),
+            os.getenv('CLAUDE_API_URL', 'https://api.anthropic.com/v1/messages'),
+            os.getenv('CLAUDE_MODEL', 'claude-3-5-sonnet-20241022')
+        ),
+        OpenAIAdapter(
+            os.getenv('OPENAI_API_KEY'),
+            os.getenv('OPENAI_API_URL', 'https://api.openai.com/v1/chat/completions'),
+            os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+        ),
+        GeminiAdapter(
+            os.getenv('GEMINI_API_KEY'),
+            os.getenv('GEMINI_API_URL',
+                      'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent'),
+            os.getenv('GEMINI_MODEL', 'gemini-pro')
+        ),
+    ]
+
+
+class ProviderStats:
+    """Rolling latency and error-rate statistics for one provider."""
+
+    def __init__(self, window=100, alpha=0.2):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self.alpha = alpha
+        self.ewma_latency = None
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record(self, latency, ok, cooldown=30.0, failure_threshold=3):
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+                self.ewma_latency = latency if self.ewma_latency is None else \
+                    self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= failure_threshold:
+                    self.cooldown_until = time.monotonic() + cooldown
+
+    @property
+    def error_rate(self):
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def percentile(self, pct):
+        """Latency percentile over the window, or None without enough samples."""
+        with self._lock:
+            if len(self._latencies) < 5:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def cooling_down(self):
+        return time.monotonic() < self.cooldown_until
+
+    def snapshot(self):
+        return {
+            'ewma_latency': self.ewma_latency,
+            'p95_latency': self.percentile(95),
+            'error_rate': self.error_rate,
+            'cooling_down': self.cooling_down()
+        }
+
+
+class ProviderRouter:
+    """Chooses providers, hedges slow calls and fails over on errors.
+
+    transport(adapter, url, headers, body, cost) -> (status, body bytes) does the
+    actual HTTP call so the router shares the proxy's pool and limits.
+    """
+
+    def __init__(self, adapters, transport, hedge_default=15.0, hedge_min=2.0,
+                 max_workers=16):
+        self.adapters = {adapter.name: adapter for adapter in adapters}
+        self.stats = {adapter.name: ProviderStats() for adapter in adapters}
+        self.transport = transport
+        self.hedge_default = hedge_default
+        self.hedge_min = hedge_min
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='provider-call')
+        self.hedged = 0
+        self.failovers = 0
+
+    def ranked(self, preferred=None, allowed=None):
+        """Available providers, best first: preferred, then by penalised latency."""
+        candidates = [
+            adapter for name, adapter in self.adapters.items()
+            if adapter.available and (not allowed or name in allowed)
+        ]
+        order = list(self.adapters)
+
+        def score(adapter):
+            stats = self.stats[adapter.name]
+            latency = stats.ewma_latency or 0.0
+            return (
+                stats.cooling_down(),
+                adapter.name != preferred,
+                latency * (1 + 4 * stats.error_rate),
+                order.index(adapter.name)
+            )
+
+        return sorted(candidates, key=score)
+
+    def hedge_delay(self, adapter):
+        """Time to wait on a provider before hedging: its p95 latency."""
+        p95 = self.stats[adapter.name].percentile(95)
+        if p95 is None:
+            return self.hedge_default
+        return max(self.hedge_min, p95)
+
+    def _call(self, adapter, request):
+        url, headers, payload = adapter.build_request(request)
+        body = json.dumps(payload).encode('utf-8')
+        cost = int(request.get('max_tokens', 4000)) + len(request['prompt']) // 4
+        started = time.monotonic()
+        try:
+            status, response_body = self.transport(adapter, url, headers, body, cost)
+            if 400 <= status < 500 and status not in RETRYABLE_CLIENT_STATUSES:
+                raise ProviderRejected(
+                    adapter.name, f"HTTP {status}: {response_body.decode('utf-8', 'replace')[:200]}", status
+                )
+            if status >= 400:
+                raise ProviderError(
+                    adapter.name, f"HTTP {status}: {response_body.decode('utf-8', 'replace')[:200]}", status
+                )
+            try:
+                content, usage = adapter.parse_response(json.loads(response_body))
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                raise ProviderError(adapter.name, f'Unexpected response: {e}', status)
+        except ProviderRejected:
+            raise
+        except ProviderError:
+            self.stats[adapter.name].record(time.monotonic() - started, False)
+            raise
+        except Exception as e:
+            self.stats[adapter.name].record(time.monotonic() - started, False)
+            raise ProviderError(adapter.name, str(e)) from e
+
+        latency = time.monotonic() - started
+        self.stats[adapter.name].record(latency, True)
+        return {
+            'success': True,
+            'content': content,
+            'provider': adapter.name,
+            'model': payload.get('model', adapter.model),
+            'tokens': usage,
+            'latency_ms': int(latency * 1000)
+        }
+
+    def generate(self, request, preferred=None, allowed=None, hedge=True):
+        """Run request on the best provider, hedging and failing over as needed.
+
+        Raises ProviderRejected as soon as a provider rejects the request itself.
+        """
+        candidates = self.ranked(preferred, allowed)
+        if not candidates:
+            raise NoProviderAvailable()
+
+        pending = {}
+        errors = []
+        next_index = 0
+        hedged = False
+
+        def launch():
+            nonlocal next_index
+            adapter = candidates[next_index]
+            next_index += 1
+            pending[self._executor.submit(self._call, adapter, request)] = adapter
+            return adapter
+
+        primary = launch()
+        # Measured from the first attempt, not restarted on every pass
+        hedge_at = time.monotonic() + self.hedge_delay(primary)
+        while pending:
+            timeout = None
+            if hedge and not hedged and next_index < len(candidates):
+                timeout = max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primary is slower than its usual p95: race a second provider
+                adapter = launch()
+                hedged = True
+                self.hedged += 1
+                print(f"Hedging {primary.name} with {adapter.name}")
+                continue
+
+            for future in done:
+                adapter = pending.pop(future)
+                try:
+                    result = future.result()
+                except ProviderRejected:
+                    raise
+                except ProviderError as e:
+                    print(f"Provider {adapter.name} failed: {e}")
+                    errors.append(e)
+                    if next_index < len(candidates) and not pending:
+                        primary = launch()
+                        self.failovers += 1
+                    continue
+                result['hedged'] = hedged
+                return result
+
+        raise NoProviderAvailable(errors)
+
+    def snapshot(self):
+        return {
+            name: dict(self.stats[name].snapshot(), available=adapter.available)
+            for name, adapter in self.adapters.items()
+        }
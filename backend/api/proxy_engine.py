@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Concurrent serving engine for the SlideCraft AI proxy server.
+Accepted connections are handed to a bounded pool of worker threads so a slow
+upstream call no longer blocks every other client. Connections are HTTP/1.1
+keep-alive: between requests they wait in a poller instead of a worker thread.
+Several server processes can share one port with SO_REUSEPORT, and each can
+drain its in-flight requests before exiting.
+"""
+
+import html
+import json
+import queue
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+
+DEFAULT_WORKERS = 16
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_MAX_UPSTREAM = 8
+DEFAULT_RETRY_AFTER = 5
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+DEFAULT_KEEPALIVE_REQUESTS = 100
+DEFAULT_REQUEST_TIMEOUT = 30.0
+
+
+class ServerBusy(Exception):
+    """Raised when no upstream slot frees up in time."""
+
+    def __init__(self, retry_after=DEFAULT_RETRY_AFTER):
+        super().__init__('Server busy, retry later')
+        self.retry_after = retry_after
+
+
+class UpstreamGate:
+    """Caps the number of upstream API calls in flight at once."""
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_UPSTREAM, wait_timeout=30.0,
+                 retry_after=DEFAULT_RETRY_AFTER):
+        self.max_in_flight = max_in_flight
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def acquire(self):
+        """Take an upstream slot, raising ServerBusy if none frees up in time."""
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise ServerBusy(self.retry_after)
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        """Hold one upstream slot for the duration of the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """TCPServer that dispatches connections to a fixed-size worker pool.
+
+    Connections wait in a bounded queue; once it is full new clients get an
+    immediate 503 with a Retry-After header instead of piling up.
+
+    A connection only holds a worker while a request is being served. New
+    connections and idle keep-alive connections are parked with a poller
+    thread, which queues them again when their next request arrives and
+    closes them after request_timeout (new) or keepalive_timeout (idle)
+    seconds, so browser preconnects and idle tabs never tie up workers.
+
+    With reuse_port the listening socket is bound with SO_REUSEPORT, so
+    several processes can listen on the same port and the kernel spreads new
+    connections across them.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE, retry_after=DEFAULT_RETRY_AFTER,
+                 keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                 max_keepalive_requests=DEFAULT_KEEPALIVE_REQUESTS,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, reuse_port=False, bind_and_activate=True):
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.retry_after = retry_after
+        self.keepalive_timeout = keepalive_timeout
+        self.max_keepalive_requests = max_keepalive_requests
+        self.request_timeout = request_timeout
+        self.draining = False
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._served = {}  # socket -> requests served on it
+        self._parking = []  # (socket, client_address, deadline) for the poller to pick up
+        self._parking_lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup, self._wakeup_sender = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+        self._closing = False
+        self._poller = None
+        super().__init__(server_address, handler_class, bind_and_activate)
+        for i in range(workers):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f'proxy-worker-{i}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        self._poller = threading.Thread(target=self._poll_loop, name='proxy-poller', daemon=True)
+        self._poller.start()
+
+    def server_bind(self):
+        if self.reuse_port:
+            if not hasattr(socket, 'SO_REUSEPORT'):
+                raise OSError('SO_REUSEPORT is not supported on this platform')
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address):
+        """Wait for the new connection's first request without holding a worker."""
+        self._park(request, client_address, self.request_timeout)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def shutdown_request(self, request):
+        self._served.pop(request, None)
+        super().shutdown_request(request)
+
+    def note_request(self, request):
+        """Count a request on this connection; returns how many it has carried."""
+        served = self._served.get(request, 0) + 1
+        self._served[request] = served
+        return served
+
+    def _dispatch(self, request, client_address):
+        """Queue the connection for a worker, or reject it when saturated."""
+        try:
+            self._queue.put_nowait((request, client_address))
+        except queue.Full:
+            self._reject(request)
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            request, client_address = item
+            handler = None
+            try:
+                handler = self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            if getattr(handler, 'idle', False) and not self.draining:
+                self._park(request, client_address, self.keepalive_timeout)
+            else:
+                self.shutdown_request(request)
+            self._queue.task_done()
+
+    def _park(self, request, client_address, timeout):
+        """Hand a connection to the poller until it has data to read."""
+        with self._parking_lock:
+            self._parking.append((request, client_address, time.monotonic() + timeout))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wakeup_sender.send(b'\0')
+        except OSError:
+            pass  # a wakeup is already pending
+
+    def _poll_loop(self):
+        """Queue parked connections whose next request arrived; close expired ones."""
+        next_sweep = time.monotonic()
+        while not self._closing:
+            for key, _ in self._selector.select(timeout=0.5):
+                if key.fileobj is self._wakeup:
+                    self._register_parked()
+                else:
+                    # Under the parking lock so drain() never sees the connection in neither place
+                    with self._parking_lock:
+                        self._selector.unregister(key.fileobj)
+                        self._dispatch(key.fileobj, key.data[0])
+            now = time.monotonic()
+            if now >= next_sweep or self.draining:
+                for key in list(self._selector.get_map().values()):
+                    # While draining, idle keep-alive connections close at once;
+                    # new ones still get to send their first request
+                    if key.data and (key.data[1] <= now or (self.draining and key.fileobj in self._served)):
+                        self._selector.unregister(key.fileobj)
+                        self.shutdown_request(key.fileobj)
+                next_sweep = now + 0.5
+        for key in list(self._selector.get_map().values()):
+            if key.data:
+                self.shutdown_request(key.fileobj)
+        self._selector.close()
+
+    def _register_parked(self):
+        try:
+            while self._wakeup.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self._parking_lock:
+            parking, self._parking = self._parking, []
+            for request, client_address, deadline in parking:
+                try:
+                    self._selector.register(request, selectors.EVENT_READ, (client_address, deadline))
+                except (KeyError, ValueError):
+                    self.shutdown_request(request)
+
+    def _reject(self, request):
+        """Answer with 503 + Retry-After straight on the socket."""
+        body = json.dumps({'error': 'Server busy, retry later'}).encode('utf-8')
+        head = (
+            'HTTP/1.1 503 Service Unavailable\r\n'
+            f'Retry-After: {self.retry_after}\r\n'
+            'Content-Type: application/json\r\n'
+            'Access-Control-Allow-Origin: *\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode('ascii')
+        try:
+            request.sendall(head + body)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def queued(self):
+        """Number of connections waiting for a worker."""
+        return self._queue.qsize()
+
+    def parked(self):
+        """Number of connections waiting for their next request."""
+        return max(0, len(self._selector.get_map()) - 1)  # minus the wakeup socket
+
+    def busy(self):
+        """Whether any connection is queued, being served or parked."""
+        with self._parking_lock:
+            return bool(self._queue.unfinished_tasks or self._parking or self.parked())
+
+    def drain(self, timeout):
+        """Stop listening and let open connections finish, for up to timeout seconds.
+
+        Call after serve_forever() has returned. Connections already waiting
+        in the listen backlog are accepted first so closing the socket does
+        not reset them. Requests in progress run to completion and their
+        responses close the connection; idle keep-alive connections are
+        closed. Returns whether everything finished in time.
+        """
+        self.draining = True
+        self.socket.setblocking(False)
+        while True:
+            try:
+                request, client_address = self.socket.accept()
+            except OSError:
+                break
+            request.setblocking(True)
+            self.process_request(request, client_address)
+        self.socket.close()
+        self._wake()
+
+        deadline = time.monotonic() + timeout
+        while self.busy():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def server_close(self):
+        super().server_close()
+        self._closing = True
+        self._wake()
+        if self._poller is not None:  # None when binding failed in __init__
+            self._poller.join(timeout=1.0)
+        for _ in self._threads:
+            try:
+                self._queue.put(None, timeout=1.0)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._wakeup.close()
+        self._wakeup_sender.close()
+
+
+class PersistentConnectionMixin:
+    """HTTP/1.1 keep-alive for request handlers served by PooledHTTPServer.
+
+    Every response must be framed, with Content-Length or with chunked
+    encoding via start_chunked/write_chunk/end_chunked, so the connection can
+    carry the next request. Requests the client has already pipelined are
+    served in the same worker; otherwise the handler returns with idle set and
+    the server parks the connection until more data arrives.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; don't let the body wait for an ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        self.timeout = self.server.request_timeout
+        self.idle = False
+        self.requests_on_connection = 0
+        super().setup()
+
+    def handle(self):
+        """Serve requests until the connection closes or has nothing buffered."""
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self._input_pending():
+                self.idle = not self.close_connection
+                return
+            self.handle_one_request()
+
+    def _input_pending(self):
+        """Whether the next request has already arrived, without blocking."""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            self.close_connection = True
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def handle_one_request(self):
+        self._parsed = False
+        self._body_read = False
+        self._chunked = False
+        self._connection_header = False
+        super().handle_one_request()
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        self._parsed = True
+        self.requests_on_connection = self.server.note_request(self.request)
+        if self.requests_on_connection >= self.server.max_keepalive_requests or self.server.draining:
+            self.close_connection = True
+        return True
+
+    def read_body(self):
+        """The request body declared by Content-Length."""
+        length = int(self.headers.get('Content-Length') or 0)
+        self._body_read = True
+        return self.rfile.read(length) if length > 0 else b''
+
+    def _body_pending(self):
+        """Whether the request declared a body that has not been read."""
+        if self._body_read:
+            return False
+        return bool(self.headers.get('Transfer-Encoding')) or \
+            (self.headers.get('Content-Length') or '0').strip() != '0'
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'connection':
+            self._connection_header = True
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        """Tell the client whether the connection stays open."""
+        if not self._connection_header:
+            if self.close_connection:
+                if self.request_version == 'HTTP/1.1':
+                    self.send_header('Connection', 'close')
+            else:
+                if self.request_version == 'HTTP/1.0':
+                    self.send_header('Connection', 'keep-alive')
+                self.send_header('Keep-Alive', f'timeout={int(self.server.keepalive_timeout)}')
+        super().end_headers()
+
+    def send_error(self, code, message=None, explain=None):
+        """Send an error page framed by Content-Length.
+
+        Unlike the base class this keeps the connection open when the request
+        was read completely, so a 404 does not cost the client a reconnect.
+        """
+        if not self._parsed or self._body_pending():
+            self.close_connection = True
+        try:
+            shortmsg, longmsg = self.responses[code]
+        except KeyError:
+            shortmsg, longmsg = '???', '???'
+        if message is None:
+            message = shortmsg
+        if explain is None:
+            explain = longmsg
+        self.log_error('code %d, message %s', code, message)
+        self.send_response(code, message)
+        body = None
+        if code >= 200 and code not in (HTTPStatus.NO_CONTENT, HTTPStatus.RESET_CONTENT,
+                                        HTTPStatus.NOT_MODIFIED):
+            body = (self.error_message_format % {
+                'code': code,
+                'message': html.escape(message, quote=False),
+                'explain': html.escape(explain, quote=False)
+            }).encode('UTF-8', 'replace')
+            self.send_header('Content-Type', self.error_content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD' and body:
+            self.wfile.write(body)
+
+    def start_chunked(self):
+        """End the headers of a response whose length is not known up front."""
+        if self.request_version == 'HTTP/1.1':
+            self._chunked = True
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True  # HTTP/1.0 clients read until the connection closes
+        self.end_headers()
+
+    def write_chunk(self, data):
+        if not data:
+            return  # an empty chunk would end the body
+        if self._chunked:
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        else:
+            self.wfile.write(data)
+
+    def end_chunked(self):
+        if self._chunked:
+            self.wfile.write(b'0\r\n\r\n')
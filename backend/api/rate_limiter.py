@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Upstream rate limiting and retry scheduling.
+Each API key gets token buckets for requests and tokens per minute. Requests
+wait in a per-key priority queue until the buckets allow them, and 429/529
+responses are retried with jittered exponential backoff that honours
+retry-after instead of being passed straight back to the browser.
+"""
+
+import hashlib
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# Upstream statuses that mean "slow down", not "this request is bad"
+RETRY_STATUSES = (429, 503, 529)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 5
+MAX_PRIORITY = 9
+
+# How often idle per-key state is swept
+SWEEP_INTERVAL = 60.0
+
+
+class QueueTimeout(Exception):
+    """Raised when a request waits in the scheduler longer than allowed."""
+
+    def __init__(self, retry_after):
+        super().__init__('Rate limit queue timeout, retry later')
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount tokens are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _KeyState:
+    """Buckets, waiting requests and backoff state for one API key."""
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waiting = []
+        self.blocked_until = 0.0
+        self.active = 0         # run() calls holding this state
+        self.last_used = time.monotonic()
+
+    def idle(self, now, idle_ttl):
+        """Unused for idle_ttl with full buckets: dropping it loses nothing."""
+        return (not self.active and self.blocked_until <= now and now - self.last_used >= idle_ttl
+                and self.requests.full(now) and self.tokens.full(now))
+
+
+def estimate_tokens(payload):
+    """Rough token cost of a request: output budget plus ~4 chars per input token."""
+    input_chars = sum(len(str(m.get('content', ''))) for m in payload.get('messages', []))
+    input_chars += len(str(payload.get('system', '')))
+    return int(payload.get('max_tokens', 1024)) + input_chars // 4
+
+
+def parse_retry_after(headers):
+    """Seconds from a retry-after header, or None."""
+    value = headers.get('retry-after') if headers is not None else None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamScheduler:
+    """Per-key priority queue in front of the upstream API.
+
+    Keys unused for idle_ttl seconds whose buckets have refilled are dropped,
+    so one-off client keys do not accumulate; a returning key starts with
+    full buckets, exactly as it would have had.
+    """
+
+    def __init__(self, rpm=50, tpm=80000, max_retries=4, backoff_base=1.0,
+                 backoff_max=30.0, queue_timeout=120.0, idle_ttl=600.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+        self.idle_ttl = idle_ttl
+        self._cond = threading.Condition()
+        self._keys = {}
+        self._swept_at = time.monotonic()
+        self._seq = itertools.count()
+        self.retries = 0
+        self.queued = 0
+
+    def _state(self, api_key):
+        """The key's state (caller holds the lock), sweeping idle keys now and then."""
+        now = time.monotonic()
+        if now - self._swept_at >= SWEEP_INTERVAL:
+            self._swept_at = now
+            for digest in [d for d, state in self._keys.items() if state.idle(now, self.idle_ttl)]:
+                del self._keys[digest]
+        digest = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+        state = self._keys.get(digest)
+        if state is None:
+            state = self._keys[digest] = _KeyState(self.rpm, self.tpm)
+        return state
+
+    def _admit(self, state, ticket, cost, deadline):
+        """Wait until ticket heads its key's queue and the buckets allow it."""
+        with self._cond:
+            heapq.heappush(state.waiting, ticket)
+            self.queued += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if state.waiting[0] is ticket:
+                        wait = max(
+                            state.blocked_until - now,
+                            state.requests.wait_time(1, now),
+                            state.tokens.wait_time(cost, now)
+                        )
+                        if wait <= 0:
+                            state.requests.consume(1)
+                            state.tokens.consume(cost)
+                            heapq.heappop(state.waiting)
+                            self._cond.notify_all()
+                            return
+                    else:
+                        wait = 1.0
+                    if now + wait > deadline:
+                        state.waiting.remove(ticket)
+                        heapq.heapify(state.waiting)
+                        self._cond.notify_all()
+                        raise QueueTimeout(max(1, int(wait)))
+                    self._cond.wait(wait)
+            finally:
+                self.queued -= 1
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry number attempt: retry-after, else full-jitter exponential."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def run(self, api_key, cost, fn, priority=PRIORITY_INTERACTIVE):
+        """Call fn() -> (status, headers, result) under the key's limits, retrying overloads."""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            state = self._state(api_key)
+            state.active += 1
+        seq = next(self._seq)
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                # Retries keep their original sequence number so they go back to the front
+                ticket = (priority, seq)
+                self._admit(state, ticket, cost, deadline)
+
+                status, headers, result = fn()
+                if status not in RETRY_STATUSES or attempt == self.max_retries:
+                    return status, headers, result
+
+                delay = self.backoff(attempt, parse_retry_after(headers))
+                if time.monotonic() + delay > deadline:
+                    return status, headers, result
+                print(f"Upstream {status}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                with self._cond:
+                    # Hold back every request for this key, not just this one
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                    self.retries += 1
+                    self._cond.notify_all()
+            return status, headers, result
+        finally:
+            with self._cond:
+                state.active -= 1
+                state.last_used = time.monotonic()
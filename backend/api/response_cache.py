@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for upstream generation responses.
+Identical payloads (ignoring the API key) are answered from an in-memory LRU
+tier, optionally backed by an on-disk SQLite tier that survives restarts.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Request fields consumed by the proxy itself and never sent upstream
+PROXY_FIELDS = ('api_key', 'no_cache', 'priority')
+
+
+def cache_key(payload):
+    """Canonical SHA-256 of a request payload with the API key stripped."""
+    canonical = {k: v for k, v in payload.items() if k not in PROXY_FIELDS}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class MemoryCache:
+    """Thread-safe LRU with TTL, entry-count and byte-size limits."""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, expires_at = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body, ttl=None):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, time.time() + (ttl or self.ttl))
+            self.size += len(body)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        body, _ = self._entries.pop(key)
+        self.size -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DiskCache:
+    """SQLite-backed cache tier with TTL and total-size eviction."""
+
+    def __init__(self, db_file, max_bytes=512 * 1024 * 1024, ttl=86400):
+        self.db_file = db_file
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_response_cache_access ON response_cache (last_access)'
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, expires_at FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                'UPDATE response_cache SET last_access = ? WHERE key = ?', (now, key)
+            )
+            self._conn.commit()
+            return bytes(row[0])
+
+    def put(self, key, body, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, body, size, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, body, len(body), now + (ttl or self.ttl), now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired rows, then least recently used rows until under max_bytes."""
+        self._conn.execute('DELETE FROM response_cache WHERE expires_at < ?', (now,))
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute('SELECT key, size FROM response_cache ORDER BY last_access')
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany('DELETE FROM response_cache WHERE key = ?', stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Two-tier cache: memory first, then disk (promoting disk hits to memory)."""
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self.memory.get(key)
+        if body is None and self.disk is not None:
+            body = self.disk.get(key)
+            if body is not None:
+                self.memory.put(key, body)
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self.memory.put(key, body)
+        if self.disk is not None:
+            self.disk.put(key, body)
@@ -3,30 +3,640 @@
 Simple proxy server to handle Claude API requests and avoid CORS issues
 """
 
+import argparse
+import email.utils
+import hashlib
 import http.server
-import socketserver
 import json
-import urllib.request
-import urllib.parse
 import os
-from urllib.error import HTTPError, URLError
+import re
+import signal
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from proxy_engine import PooledHTTPServer, PersistentConnectionMixin, UpstreamGate, ServerBusy
+from upstream_pool import ConnectionPool, UpstreamError, UpstreamTimeout
+from slide_stream import SlideExtractor, SSEParser, text_delta, usage_from_event, format_event, extract_slides
+from metrics import Registry
+from response_cache import ResponseCache, MemoryCache, DiskCache, cache_key, PROXY_FIELDS
+from single_flight import SingleFlight
+from providers import ProviderRouter, ProviderRejected, NoProviderAvailable, default_adapters
+from static_files import StaticCache, TransferStats, parse_range, send_file_range
+from rate_limiter import UpstreamScheduler, QueueTimeout, estimate_tokens, PRIORITY_INTERACTIVE, PRIORITY_BATCH, MAX_PRIORITY
+from generation_jobs import JobQueue, JobStore, JobFailed, JobCancelled, QueueFull
+from prefork import PreforkSupervisor, ADDRESS_IN_USE, port_available, reuse_port_supported
+from deck_prompts import get_template, slide_count_value, topic_value, DEFAULT_MODEL, DEFAULT_MAX_TOKENS, DEFAULT_TEMPERATURE
+
+# Upstream API settings
+CLAUDE_API_URL = os.getenv('CLAUDE_API_URL', 'https://api.anthropic.com/v1/messages')
+UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', '8'))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', '10'))
+UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', '120'))
+UPSTREAM_MAX_IDLE = float(os.getenv('UPSTREAM_MAX_IDLE', '60'))
+UPSTREAM_CA_BUNDLE = os.getenv('UPSTREAM_CA_BUNDLE')  # e.g. for a local HTTPS stand-in
+
+# Response cache settings
+RESPONSE_CACHE_ENTRIES = int(os.getenv('RESPONSE_CACHE_ENTRIES', '256'))
+RESPONSE_CACHE_MB = int(os.getenv('RESPONSE_CACHE_MB', '64'))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '3600'))
+RESPONSE_CACHE_DB = os.getenv('RESPONSE_CACHE_DB')  # enables the on-disk tier
+RESPONSE_CACHE_DB_MB = int(os.getenv('RESPONSE_CACHE_DB_MB', '512'))
+
+# Per-key upstream rate limits and retry policy
+UPSTREAM_RPM = int(os.getenv('UPSTREAM_RPM', '50'))
+UPSTREAM_TPM = int(os.getenv('UPSTREAM_TPM', '80000'))
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', '4'))
+UPSTREAM_BACKOFF_BASE = float(os.getenv('UPSTREAM_BACKOFF_BASE', '1'))
+UPSTREAM_BACKOFF_MAX = float(os.getenv('UPSTREAM_BACKOFF_MAX', '30'))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv('UPSTREAM_QUEUE_TIMEOUT', '120'))
+
+# Provider routing settings
+HEDGE_DEFAULT_DELAY = float(os.getenv('HEDGE_DEFAULT_DELAY', '15'))  # before enough latency samples
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', '2'))
+
+# Static asset cache settings
+STATIC_CACHE_MB = int(os.getenv('STATIC_CACHE_MB', '64'))
+STATIC_MAX_FILE_KB = int(os.getenv('STATIC_MAX_FILE_KB', '2048'))
+STATIC_SENDFILE_KB = int(os.getenv('STATIC_SENDFILE_KB', '64'))
+
+# Concurrency settings
+PROXY_WORKERS = int(os.getenv('PROXY_WORKERS', '16'))
+PROXY_QUEUE_SIZE = int(os.getenv('PROXY_QUEUE_SIZE', '64'))
+PROXY_MAX_UPSTREAM = int(os.getenv('PROXY_MAX_UPSTREAM', '8'))
+PROXY_UPSTREAM_WAIT = float(os.getenv('PROXY_UPSTREAM_WAIT', '30'))
+PROXY_RETRY_AFTER = int(os.getenv('PROXY_RETRY_AFTER', '5'))
+PROXY_KEEPALIVE_TIMEOUT = float(os.getenv('PROXY_KEEPALIVE_TIMEOUT', '5'))
+PROXY_KEEPALIVE_REQUESTS = int(os.getenv('PROXY_KEEPALIVE_REQUESTS', '100'))
+PROXY_REQUEST_TIMEOUT = float(os.getenv('PROXY_REQUEST_TIMEOUT', '30'))
+PROXY_PORT = int(os.getenv('PROXY_PORT', '8000'))
+PROXY_PROCESSES = int(os.getenv('PROXY_PROCESSES', '1'))  # 0 = one per CPU core
+PROXY_DRAIN_TIMEOUT = float(os.getenv('PROXY_DRAIN_TIMEOUT', '300'))
+PORT_ATTEMPTS = 10
+
+# Asynchronous generation jobs (POST /api/jobs)
+# Kept next to the other databases by default; the static handler never serves SQLite files
+JOB_DB = os.getenv('JOB_DB', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'jobs.db'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', '500'))
+JOB_MAX_PER_OWNER = int(os.getenv('JOB_MAX_PER_OWNER', '10'))
+JOB_RETENTION_HOURS = float(os.getenv('JOB_RETENTION_HOURS', '24'))
+
+# Batch deck generation (POST /api/batch)
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '100'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', str(PROXY_MAX_UPSTREAM)))
+BATCH_ITEM_TIMEOUT = float(os.getenv('BATCH_ITEM_TIMEOUT', '600'))
+
+# Prometheus-style metrics served at /metrics
+metrics = Registry()
+http_requests = metrics.counter(
+    'slidecraft_http_requests_total', 'HTTP requests by route, method and status',
+    ('route', 'method', 'status')
+)
+http_duration = metrics.histogram(
+    'slidecraft_http_request_duration_seconds', 'Total HTTP request handling time', ('route',)
+)
+http_in_flight = metrics.up_down_counter(
+    'slidecraft_http_requests_in_flight', 'HTTP requests currently being handled'
+)
+http_connections = metrics.counter(
+    'slidecraft_http_connections_total', 'Client connections that sent at least one request'
+)
+upstream_connect = metrics.histogram(
+    'slidecraft_upstream_connect_seconds', 'Time to open new upstream connections', ('host',)
+)
+upstream_ttfb = metrics.histogram(
+    'slidecraft_upstream_ttfb_seconds', 'Time from upstream request start to response headers', ('host',)
+)
+upstream_duration = metrics.histogram(
+    'slidecraft_upstream_duration_seconds', 'Total upstream request time including body', ('host',)
+)
+upstream_tokens = metrics.counter(
+    'slidecraft_upstream_tokens_total', 'Upstream token usage reported by providers',
+    ('provider', 'type')
+)
+prompt_cache_requests = metrics.counter(
+    'slidecraft_prompt_cache_requests_total',
+    'Templated generations by upstream prompt-cache result (hit, write or miss)', ('prompt', 'result')
+)
+prompt_input_tokens = metrics.counter(
+    'slidecraft_prompt_input_tokens_total',
+    'Input tokens of templated generations: uncached, cache_write or cache_read', ('prompt', 'type')
+)
+
+# Routes reported individually in metrics; everything else is static
+METRIC_ROUTES = ('/api/claude', '/api/deck', '/api/generate', '/api/providers', '/api/jobs', '/api/batch', '/metrics')
+
+# SQLite databases and their journals are never served, wherever they live under the root
+PRIVATE_FILE_SUFFIXES = ('.db', '.db-journal', '-wal', '-shm')
+
+# /api/jobs/<id> and /api/jobs/<id>/events
+JOB_PATH = re.compile(r'^/api/jobs/([0-9a-f]{32})(/events)?$')
+
+def metrics_route(path):
+    path = path.split('?', 1)[0]
+    job_path = JOB_PATH.match(path)
+    if job_path:
+        return '/api/jobs/:id/events' if job_path.group(2) else '/api/jobs/:id'
+    return path if path in METRIC_ROUTES else 'static'
+
+def record_upstream_timing(host, connect_time, ttfb, total):
+    if connect_time:
+        upstream_connect.observe(connect_time, host)
+    upstream_ttfb.observe(ttfb, host)
+    upstream_duration.observe(total, host)
+
+def record_usage(provider, usage):
+    """Count input/output tokens from a provider usage dict"""
+    if not usage:
+        return
+    input_tokens = usage.get('input_tokens', usage.get('prompt_tokens', 0))
+    output_tokens = usage.get('output_tokens', usage.get('completion_tokens', 0))
+    if input_tokens:
+        upstream_tokens.inc(provider, 'input', amount=input_tokens)
+    if output_tokens:
+        upstream_tokens.inc(provider, 'output', amount=output_tokens)
+    if usage.get('cache_creation_input_tokens'):
+        upstream_tokens.inc(provider, 'cache_write', amount=usage['cache_creation_input_tokens'])
+    if usage.get('cache_read_input_tokens'):
+        upstream_tokens.inc(provider, 'cache_read', amount=usage['cache_read_input_tokens'])
+
+def record_prompt_cache(prompt, usage):
+    """Count whether a templated generation reused its cached prompt prefix"""
+    if not prompt or not usage or 'input_tokens' not in usage:
+        return
+    cache_write = usage.get('cache_creation_input_tokens') or 0
+    cache_read = usage.get('cache_read_input_tokens') or 0
+    result = 'hit' if cache_read else 'write' if cache_write else 'miss'
+    prompt_cache_requests.inc(prompt, result)
+    prompt_input_tokens.inc(prompt, 'uncached', amount=usage['input_tokens'] or 0)
+    prompt_input_tokens.inc(prompt, 'cache_write', amount=cache_write)
+    prompt_input_tokens.inc(prompt, 'cache_read', amount=cache_read)
+
+# Shared limit on concurrent upstream API calls
+upstream_gate = UpstreamGate(
+    max_in_flight=PROXY_MAX_UPSTREAM,
+    wait_timeout=PROXY_UPSTREAM_WAIT,
+    retry_after=PROXY_RETRY_AFTER
+)
+
+# Keep-alive connections to the upstream API, shared by all workers
+upstream_pool = ConnectionPool(
+    max_per_host=UPSTREAM_POOL_SIZE,
+    connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+    read_timeout=UPSTREAM_READ_TIMEOUT,
+    max_idle=UPSTREAM_MAX_IDLE,
+    ssl_context=ssl.create_default_context(cafile=UPSTREAM_CA_BUNDLE),
+    observer=record_upstream_timing
+)
+
+# Cache of successful generations keyed by canonical payload hash
+response_cache = ResponseCache(
+    MemoryCache(
+        max_entries=RESPONSE_CACHE_ENTRIES,
+        max_bytes=RESPONSE_CACHE_MB * 1024 * 1024,
+        ttl=RESPONSE_CACHE_TTL
+    ),
+    DiskCache(
+        RESPONSE_CACHE_DB,
+        max_bytes=RESPONSE_CACHE_DB_MB * 1024 * 1024,
+        ttl=RESPONSE_CACHE_TTL
+    ) if RESPONSE_CACHE_DB else None
+)
+
+# Coalesces concurrent identical upstream calls and streams
+single_flight = SingleFlight()
+
+# Queues upstream calls per API key and retries overload responses
+upstream_scheduler = UpstreamScheduler(
+    rpm=UPSTREAM_RPM,
+    tpm=UPSTREAM_TPM,
+    max_retries=UPSTREAM_MAX_RETRIES,
+    backoff_base=UPSTREAM_BACKOFF_BASE,
+    backoff_max=UPSTREAM_BACKOFF_MAX,
+    queue_timeout=UPSTREAM_QUEUE_TIMEOUT
+)
+
+def request_priority(data):
+    """Scheduling priority from the request (0 = most urgent)"""
+    try:
+        return min(MAX_PRIORITY, max(0, int(data.get('priority', PRIORITY_INTERACTIVE))))
+    except (TypeError, ValueError):
+        return PRIORITY_INTERACTIVE
+
+def claude_headers(api_key):
+    return {
+        'Content-Type': 'application/json',
+        'x-api-key': api_key,
+        'anthropic-version': '2023-06-01'
+    }
+
+def call_claude(claude_data, headers, priority=PRIORITY_INTERACTIVE, prompt=None):
+    """Send one non-streaming request upstream; returns (status, body)
+
+    prompt names the template the request was rendered from, for cache metrics.
+    """
+    def attempt():
+        with upstream_gate.slot():
+            return upstream_pool.request(
+                'POST', CLAUDE_API_URL,
+                body=json.dumps(claude_data).encode('utf-8'),
+                headers=headers
+            )
+    
+    status, _, body = upstream_scheduler.run(
+        headers['x-api-key'], estimate_tokens(claude_data), attempt, priority
+    )
+    if status >= 400:
+        print(f"Claude API Error: {status} - {body.decode('utf-8', 'replace')}")
+    else:
+        try:
+            usage = json.loads(body).get('usage')
+            record_usage('claude', usage)
+            record_prompt_cache(prompt, usage)
+        except (ValueError, AttributeError):
+            pass
+    return status, body
+
+def open_claude_stream(claude_data, headers, priority=PRIORITY_INTERACTIVE):
+    """Open a streaming request upstream; returns (status, body or open response)
+
+    On success the upstream slot stays held until the caller releases it.
+    """
+    def attempt():
+        upstream_gate.acquire()
+        try:
+            response = upstream_pool.open(
+                'POST', CLAUDE_API_URL,
+                body=json.dumps(claude_data).encode('utf-8'),
+                headers=headers
+            )
+        except Exception:
+            upstream_gate.release()
+            raise
+        if response.status < 400:
+            return response.status, response.headers, response
+        try:
+            with response:
+                error_body = response.read()
+        finally:
+            upstream_gate.release()
+        return response.status, response.headers, error_body
+    
+    status, _, result = upstream_scheduler.run(
+        headers['x-api-key'], estimate_tokens(claude_data), attempt, priority
+    )
+    if status >= 400:
+        print(f"Claude API Error: {status} - {result.decode('utf-8', 'replace')}")
+    return status, result
+
+def provider_transport(adapter, url, headers, body, cost):
+    """Send one provider call through the shared pool, gate and scheduler"""
+    def attempt():
+        with upstream_gate.slot():
+            return upstream_pool.request('POST', url, body=body, headers=headers)
+    
+    status, _, response_body = upstream_scheduler.run(
+        f'{adapter.name}:{adapter.api_key}', cost, attempt
+    )
+    return status, response_body
+
+# Routes /api/generate across the providers that have server-side keys
+provider_router = ProviderRouter(
+    default_adapters(),
+    provider_transport,
+    hedge_default=HEDGE_DEFAULT_DELAY,
+    hedge_min=HEDGE_MIN_DELAY,
+    max_workers=PROXY_MAX_UPSTREAM * 2
+)
+
+def relay_claude_stream(response, emit, prompt=None):
+    """Forward upstream SSE events to emit(chunk), adding slide events
+
+    Returns False as soon as emit() does (nobody is reading any more).
+    """
+    parser = SSEParser()
+    extractor = SlideExtractor()
+    pending = []
+    while True:
+        line = response.readline()
+        if not line:
+            break
+        pending.append(line)
+        event = parser.feed_line(line.decode('utf-8', 'replace'))
+        if event is None:
+            continue
+        
+        # Forward the upstream event untouched, then any slides it completed
+        if not emit(b''.join(pending)):
+            return False
+        pending = []
+        for slide in extractor.feed(text_delta(*event)):
+            if not emit(format_event('slide', slide)):
+                return False
+        event_usage = usage_from_event(*event)
+        record_usage('claude', event_usage)
+        record_prompt_cache(prompt, event_usage)
+    if pending:
+        return emit(b''.join(pending))
+    return True
+
+def pump_claude_stream(stream, key, claude_data, headers, priority=PRIORITY_INTERACTIVE, prompt=None):
+    """Read one upstream SSE stream into a SharedStream until it ends or every reader leaves"""
+    try:
+        status, result = open_claude_stream(claude_data, headers, priority)
+        if status >= 400:
+            stream.start(status, result)
+            return
+        
+        stream.start(200)
+        try:
+            # Leaving the with block early drops the connection, which stops the generation
+            with result as response:
+                if not relay_claude_stream(response, stream.append, prompt):
+                    print("All readers disconnected; stopping upstream stream")
+        finally:
+            upstream_gate.release()
+    except Exception as e:
+        if stream.status is None:
+            stream.finish(e)
+        else:
+            print(f"Upstream stream error: {e}")
+            stream.append(format_event('error', {'error': str(e)}))
+    finally:
+        single_flight.end_stream(key, stream)
+        stream.finish()
+
+def run_generation_job(job):
+    """Stream one job's generation upstream, emitting slides as they complete"""
+    claude_data = dict(job.request, stream=True)
+    headers = claude_headers(job.api_key or os.getenv('CLAUDE_API_KEY') or '')
+    
+    # Jobs wait for upstream capacity instead of failing like interactive requests
+    while True:
+        try:
+            status, result = open_claude_stream(claude_data, headers, job.priority)
+            break
+        except (ServerBusy, QueueTimeout) as e:
+            if job.cancel_requested.wait(e.retry_after):
+                raise JobCancelled()
+    if status >= 400:
+        raise JobFailed(f"Claude API error {status}: {result.decode('utf-8', 'replace')[:500]}", status)
+    
+    parser = SSEParser()
+    extractor = SlideExtractor()
+    slides = []
+    text = []
+    usage = {}
+    try:
+        with result as response:
+            while True:
+                # Closing the stream early also stops the upstream generation
+                if job.cancel_requested.is_set():
+                    raise JobCancelled()
+                line = response.readline()
+                if not line:
+                    break
+                event = parser.feed_line(line.decode('utf-8', 'replace'))
+                if event is None:
+                    continue
+                if event[0] == 'error':
+                    raise JobFailed(f'Claude API stream error: {event[1][:500]}')
+                delta = text_delta(*event)
+                text.append(delta)
+                for slide in extractor.feed(delta):
+                    slides.append(slide)
+                    job.emit('slide', slide)
+                event_usage = usage_from_event(*event)
+                if event_usage:
+                    usage.update(event_usage)
+                    record_usage('claude', event_usage)
+    finally:
+        upstream_gate.release()
+    
+    text = ''.join(text)
+    return {'slides': slides or extract_slides(text), 'text': text, 'usage': usage}
+
+def generate_deck(claude_data, headers, key, deadline, prompt=None):
+    """One non-streaming call at batch priority; returns (status, body, cached)
+
+    Busy or queue-timeout errors are retried until the deadline, so a batch
+    waits its turn for upstream capacity instead of failing items.
+    """
+    if key:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return 200, cached, True
+    
+    def fetch():
+        status, body = call_claude(claude_data, headers, PRIORITY_BATCH, prompt)
+        if status < 400 and key:
+            response_cache.put(key, body)
+        return status, body
+    
+    while True:
+        try:
+            if key:
+                (status, body), _ = single_flight.do(key, fetch)
+            else:
+                status, body = fetch()
+            return status, body, False
+        except (ServerBusy, QueueTimeout) as e:
+            if time.monotonic() + e.retry_after > deadline:
+                raise
+            time.sleep(e.retry_after)
+
+def run_batch_item(index, item, prompt_template, options, headers, use_cache):
+    """Generate one batch deck; returns its NDJSON result line as a dict"""
+    started = time.monotonic()
+    result = {'index': index}
+    try:
+        if not isinstance(item, dict):
+            raise ValueError('item must be an object')
+        if 'id' in item:
+            result['id'] = item['id']
+        result['topic'] = item.get('topic')
+        claude_data = prompt_template.render(
+            topic_value(item.get('topic')), slide_count_value(item.get('slideCount')), item.get('template'), **options
+        )
+    except (TypeError, ValueError) as e:
+        return dict(result, status='error', http_status=400, error=str(e))
+    
+    try:
+        key = cache_key(claude_data) if use_cache else None
+        status, body, cached = generate_deck(claude_data, headers, key, started + BATCH_ITEM_TIMEOUT,
+                                             prompt_template.id)
+        if status >= 400:
+            return dict(result, status='error', http_status=status,
+                        error=f"Claude API error: {body.decode('utf-8', 'replace')[:500]}")
+        
+        response = json.loads(body)
+        text = ''.join(block.get('text', '') for block in response.get('content', []) if isinstance(block, dict))
+        slides = extract_slides(text)
+        if not slides:
+            return dict(result, status='error', http_status=502, error='Response contained no slides', text=text)
+        return dict(result, status='ok', slides=slides, usage=response.get('usage', {}), cached=cached,
+                    elapsed=round(time.monotonic() - started, 3))
+    
+    except (ServerBusy, QueueTimeout) as e:
+        return dict(result, status='error', http_status=503, error=str(e))
+    except UpstreamTimeout as e:
+        return dict(result, status='error', http_status=504, error=f'Upstream timed out: {e}')
+    except UpstreamError as e:
+        return dict(result, status='error', http_status=503, error=f'Service unavailable: {e}')
+    except Exception as e:
+        print(f"Batch item {index} error: {e}")
+        return dict(result, status='error', http_status=500, error=str(e))
+
+def generate_request(data):
+    """Validate an /api/generate body; returns the provider request or raises ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError('request body must be a JSON object')
+    if not isinstance(data.get('prompt'), str) or not data['prompt'].strip():
+        raise ValueError('prompt is required')
+    if not isinstance(data.get('system', ''), str):
+        raise ValueError('system must be a string')
+    max_tokens = data.get('max_tokens')
+    if max_tokens is not None and (isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or max_tokens < 1):
+        raise ValueError('max_tokens must be a positive integer')
+    temperature = data.get('temperature')
+    if temperature is not None and (isinstance(temperature, bool) or not isinstance(temperature, (int, float))):
+        raise ValueError('temperature must be a number')
+    if data.get('provider') is not None and not isinstance(data['provider'], str):
+        raise ValueError('provider must be a string')
+    providers = data.get('providers')
+    if providers is not None and (not isinstance(providers, list) or not all(isinstance(p, str) for p in providers)):
+        raise ValueError('providers must be a list of provider names')
+    if not isinstance(data.get('hedge', True), bool):
+        raise ValueError('hedge must be true or false')
+    return {k: data[k] for k in ('prompt', 'system', 'max_tokens', 'temperature') if data.get(k) is not None}
+
+def job_owner(client_api_key, client_address):
+    """Fair-scheduling identity: the caller's API key, else their address"""
+    if client_api_key:
+        return 'key:' + hashlib.sha256(client_api_key.encode('utf-8')).hexdigest()[:16]
+    return 'ip:' + client_address
+
+# Queued generation jobs, run by a worker pool and persisted to JOB_DB (created at startup)
+job_queue = None
+
+def create_job_queue():
+    """Open JOB_DB and start this process's job workers"""
+    global job_queue
+    job_queue = JobQueue(
+        JobStore(JOB_DB),
+        run_generation_job,
+        workers=JOB_WORKERS,
+        max_queued=JOB_MAX_QUEUED,
+        max_per_owner=JOB_MAX_PER_OWNER,
+        retention=JOB_RETENTION_HOURS * 3600,
+        retry_after=PROXY_RETRY_AFTER
+    )
+    job_queue.start()
+    return job_queue
+
+# Pre-compressed, mtime-validated copies of the site's text assets
+static_cache = StaticCache(
+    os.getcwd(),
+    max_file_size=STATIC_MAX_FILE_KB * 1024,
+    max_total=STATIC_CACHE_MB * 1024 * 1024
+)
+
+# Bytes served per static file
+transfer_stats = TransferStats()
+
+def register_gauges():
+    """Gauges read from the shared components at scrape time"""
+    def cache_ratio():
+        lookups = response_cache.hits + response_cache.misses
+        return response_cache.hits / lookups if lookups else 0.0
+
+    def job_counts():
+        if job_queue is None:
+            return {}
+        return {('queued',): job_queue.queued, ('running',): job_queue.running,
+                **{(status,): count for status, count in job_queue.completed.items()}}
+
+    metrics.gauge('slidecraft_upstream_in_flight', 'Upstream calls holding a slot',
+                  lambda: upstream_gate.in_flight)
+    metrics.gauge('slidecraft_upstream_queued', 'Requests waiting in the rate-limit scheduler',
+                  lambda: upstream_scheduler.queued)
+    metrics.gauge('slidecraft_upstream_retries', 'Upstream retries after overload responses',
+                  lambda: upstream_scheduler.retries)
+    metrics.gauge('slidecraft_upstream_connections', 'Upstream connections opened or reused',
+                  lambda: {('created',): upstream_pool.created, ('reused',): upstream_pool.reused},
+                  ('state',))
+    metrics.gauge('slidecraft_cache_lookups', 'Response cache lookups by result',
+                  lambda: {('hit',): response_cache.hits, ('miss',): response_cache.misses},
+                  ('result',))
+    metrics.gauge('slidecraft_cache_hit_ratio', 'Response cache hit ratio', cache_ratio)
+    metrics.gauge('slidecraft_cache_memory_bytes', 'Bytes held by the in-memory response cache',
+                  lambda: response_cache.memory.size)
+    metrics.gauge('slidecraft_coalesced_requests', 'Requests served by another in-flight call',
+                  lambda: single_flight.coalesced)
+    metrics.gauge('slidecraft_provider_events', 'Provider router hedges and failovers',
+                  lambda: {('hedged',): provider_router.hedged, ('failover',): provider_router.failovers},
+                  ('event',))
+    metrics.gauge('slidecraft_jobs', 'Generation jobs queued, running and finished by status',
+                  job_counts, ('state',))
+    metrics.gauge('slidecraft_static_cache_bytes', 'Bytes held by the static asset cache',
+                  lambda: static_cache.total)
+    metrics.gauge('slidecraft_static_bytes_served', 'Static bytes served per file',
+                  lambda: {(path,): entry['bytes'] for path, entry in transfer_stats.snapshot().items()},
+                  ('file',))
+
+register_gauges()
+
+class ProxyHTTPRequestHandler(PersistentConnectionMixin, http.server.SimpleHTTPRequestHandler):
+    def parse_request(self):
+        """Parse the request line and headers, starting the request timer"""
+        self._status = None
+        self._started = None
+        if not super().parse_request():
+            return False
+        self._started = time.perf_counter()
+        http_in_flight.inc()
+        if self.requests_on_connection == 1:
+            http_connections.inc()
+        return True
+
+    def handle_one_request(self):
+        """Handle one request, recording its route, status and duration"""
+        self._started = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self._started is not None:
+                http_in_flight.dec()
+                if self._status is not None:
+                    route = metrics_route(self.path)
+                    http_requests.inc(route, self.command, str(int(self._status)))
+                    http_duration.observe(time.perf_counter() - self._started, route)
+
+    def log_request(self, code='-', size='-'):
+        if isinstance(code, int):
+            self._status = code
+        super().log_request(code, size)
 
-class ProxyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     def do_OPTIONS(self):
         """Handle preflight CORS requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, x-api-key, anthropic-version')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers',
+                         'Content-Type, Cache-Control, Last-Event-ID, x-api-key, anthropic-version')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_POST(self):
         """Handle POST requests to Claude API proxy"""
-        if self.path == '/api/claude':
+        # /api/deck takes only {topic, slideCount, template} and renders a server-side prompt
+        if self.path in ('/api/claude', '/api/deck'):
             try:
                 # Read request body
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
+                post_data = self.read_body()
                 
                 # Parse JSON data
                 data = json.loads(post_data.decode('utf-8'))
@@ -38,44 +648,70 @@ class ProxyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                     return
                 
                 # Prepare request to Claude API
-                claude_url = 'https://api.anthropic.com/v1/messages'
-                headers = {
-                    'Content-Type': 'application/json',
-                    'x-api-key': api_key,
-                    'anthropic-version': '2023-06-01'
-                }
-                
-                # Remove api_key from data before sending to Claude
-                claude_data = {k: v for k, v in data.items() if k != 'api_key'}
-                
-                # Make request to Claude API
-                req = urllib.request.Request(
-                    claude_url,
-                    data=json.dumps(claude_data).encode('utf-8'),
-                    headers=headers
-                )
-                
-                with urllib.request.urlopen(req) as response:
-                    response_data = response.read()
+                headers = claude_headers(api_key)
+                
+                if self.path == '/api/deck':
+                    prompt_template = get_template(data.get('prompt') or 'deck', data.get('prompt_version'))
+                    prompt = prompt_template.id
+                    claude_data = prompt_template.render(
+                        topic_value(data.get('topic')),
+                        slide_count_value(data.get('slideCount')),
+                        data.get('template'),
+                        model=data.get('model') or DEFAULT_MODEL,
+                        max_tokens=int(data.get('max_tokens', DEFAULT_MAX_TOKENS)),
+                        temperature=float(data.get('temperature', DEFAULT_TEMPERATURE)),
+                        stream=bool(data.get('stream'))
+                    )
+                else:
+                    # Remove api_key and proxy-only flags before sending to Claude
+                    prompt = None
+                    claude_data = {k: v for k, v in data.items() if k not in PROXY_FIELDS}
+                
+                # Identical payloads share cache entries and in-flight calls unless the client opts out
+                use_cache = not data.get('no_cache') and \
+                    'no-cache' not in self.headers.get('Cache-Control', '')
+                key = cache_key(claude_data) if use_cache else None
+                
+                # Relay server-sent events as they arrive
+                if claude_data.get('stream'):
+                    self._stream_claude(claude_data, headers, key, request_priority(data), prompt)
+                    return
+                
+                if key:
+                    cached = response_cache.get(key)
+                    if cached is not None:
+                        self._send_json(200, cached, {'X-Cache': 'HIT'})
+                        return
+                
+                # Make request to Claude API over a pooled keep-alive connection
+                priority = request_priority(data)
+                def fetch():
+                    status, body = call_claude(claude_data, headers, priority, prompt)
+                    if status < 400 and key:
+                        response_cache.put(key, body)
+                    return status, body
+                
+                if key:
+                    (status, response_data), shared = single_flight.do(key, fetch)
+                else:
+                    (status, response_data), shared = fetch(), False
                 
                 # Send response back to client
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(response_data)
+                extra_headers = {'X-Cache': 'MISS' if key else 'BYPASS'}
+                if shared:
+                    extra_headers['X-Coalesced'] = '1'
+                self._send_json(status, response_data, extra_headers)
                 
-            except HTTPError as e:
-                error_response = e.read().decode('utf-8')
-                print(f"Claude API Error: {e.code} - {error_response}")
+            except (ServerBusy, QueueTimeout) as e:
+                print(f"Upstream busy: {upstream_gate.in_flight} in flight, {upstream_scheduler.queued} queued")
+                error_body = json.dumps({'error': str(e)}).encode('utf-8')
+                self._send_json(503, error_body, {'Retry-After': str(e.retry_after)})
                 
-                self.send_response(e.code)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(error_response.encode('utf-8'))
+            except UpstreamTimeout as e:
+                print(f"Upstream Timeout: {e}")
+                self.send_error(504, f'Upstream timed out: {str(e)}')
                 
-            except URLError as e:
+            except UpstreamError as e:
                 print(f"Network Error: {e}")
                 self.send_error(503, f'Service unavailable: {str(e)}')
                 
@@ -83,38 +719,577 @@ class ProxyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 print(f"JSON Error: {e}")
                 self.send_error(400, f'Invalid JSON: {str(e)}')
                 
+            except (TypeError, ValueError) as e:
+                # Bad deck fields: missing topic, unknown template version, non-numeric counts
+                self._send_json(400, json.dumps({'error': str(e)}).encode('utf-8'))
+                
             except Exception as e:
                 print(f"Unexpected Error: {e}")
                 self.send_error(500, f'Internal server error: {str(e)}')
+        elif self.path == '/api/generate':
+            self._handle_generate()
+        elif self.path == '/api/jobs':
+            self._submit_job()
+        elif self.path == '/api/batch':
+            self._handle_batch()
         else:
-            # Handle normal file serving
-            super().do_POST()
+            self.send_error(501, 'Unsupported method (POST)')
+
+    def _handle_generate(self):
+        """Route a generic generation request to the best available provider"""
+        try:
+            data = json.loads(self.read_body().decode('utf-8'))
+            try:
+                request = generate_request(data)
+            except ValueError as e:
+                self._send_json(400, json.dumps({'success': False, 'error': str(e)}).encode('utf-8'))
+                return
+            
+            result = provider_router.generate(
+                request,
+                preferred=data.get('provider'),
+                allowed=data.get('providers'),
+                hedge=data.get('hedge', True)
+            )
+            record_usage(result['provider'], result.get('tokens'))
+            self._send_json(200, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+            
+        except ProviderRejected as e:
+            # The request itself was refused (bad model, too many tokens...): pass the status on
+            print(f"Provider rejected request: {e}")
+            body = {'success': False, 'error': str(e), 'provider': e.provider}
+            self._send_json(e.status, json.dumps(body).encode('utf-8'))
+            
+        except NoProviderAvailable as e:
+            print(f"Provider Error: {e}")
+            self._send_json(502, json.dumps({'success': False, 'error': str(e)}).encode('utf-8'))
+            
+        except json.JSONDecodeError as e:
+            print(f"JSON Error: {e}")
+            self.send_error(400, f'Invalid JSON: {str(e)}')
+            
+        except Exception as e:
+            print(f"Unexpected Error: {e}")
+            self.send_error(500, f'Internal server error: {str(e)}')
+
+    def _handle_batch(self):
+        """Generate many decks concurrently, streaming one NDJSON line per finished item"""
+        try:
+            data = json.loads(self.read_body().decode('utf-8'))
+            items = data.get('items')
+            if not isinstance(items, list) or not items:
+                self._send_json(400, json.dumps({'error': 'items must be a non-empty list'}).encode('utf-8'))
+                return
+            if len(items) > BATCH_MAX_ITEMS:
+                self._send_json(400, json.dumps({'error': f'at most {BATCH_MAX_ITEMS} items per batch'}).encode('utf-8'))
+                return
+            
+            api_key = os.getenv('CLAUDE_API_KEY') or data.get('api_key')
+            if not api_key:
+                self.send_error(401, 'API key required')
+                return
+            
+            prompt_template = get_template(data.get('prompt') or 'deck', data.get('prompt_version'))
+            options = {
+                'model': data.get('model') or DEFAULT_MODEL,
+                'max_tokens': int(data.get('max_tokens', DEFAULT_MAX_TOKENS)),
+                'temperature': float(data.get('temperature', DEFAULT_TEMPERATURE))
+            }
+            use_cache = not data.get('no_cache') and \
+                'no-cache' not in self.headers.get('Cache-Control', '')
+            
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+            print(f"JSON Error: {e}")
+            self.send_error(400, f'Invalid JSON: {str(e)}')
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.start_chunked()
+        
+        # Items beyond the upstream limit wait here rather than in the gate
+        started = time.monotonic()
+        headers = claude_headers(api_key)
+        executor = ThreadPoolExecutor(max_workers=min(len(items), BATCH_CONCURRENCY), thread_name_prefix='batch')
+        counts = {'ok': 0, 'error': 0}
+        try:
+            futures = [executor.submit(run_batch_item, index, item, prompt_template, options, headers, use_cache)
+                       for index, item in enumerate(items)]
+            for future in as_completed(futures):
+                result = future.result()
+                counts[result['status']] += 1
+                self.write_chunk(json.dumps(result, ensure_ascii=False).encode('utf-8') + b'\n')
+            summary = {'summary': {'items': len(items), 'ok': counts['ok'], 'failed': counts['error'],
+                                   'prompt': prompt_template.id, 'elapsed': round(time.monotonic() - started, 3)}}
+            self.write_chunk(json.dumps(summary).encode('utf-8') + b'\n')
+            self.end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            print("Client disconnected during batch; dropping queued items")
+            self.close_connection = True
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_job(self):
+        """Queue a generation job and return its id at once"""
+        try:
+            data = json.loads(self.read_body().decode('utf-8'))
+            if not isinstance(data, dict):
+                self._send_json(400, json.dumps({'error': 'Request body must be a JSON object'}).encode('utf-8'))
+                return
+            if not isinstance(data.get('messages'), list) or not data['messages']:
+                self._send_json(400, json.dumps({'error': 'messages is required'}).encode('utf-8'))
+                return
+            
+            # Same precedence as /api/claude: the server's key wins; a client key is only kept when it is used
+            client_key = None if os.getenv('CLAUDE_API_KEY') else data.get('api_key')
+            if not (client_key or os.getenv('CLAUDE_API_KEY')):
+                self.send_error(401, 'API key required')
+                return
+            
+            claude_data = {k: v for k, v in data.items() if k not in PROXY_FIELDS and k != 'stream'}
+            job = job_queue.submit(
+                job_owner(client_key, self.client_address[0]),
+                claude_data,
+                api_key=client_key,
+                priority=request_priority(data)
+            )
+            body = dict(job.to_dict(), status_url=f'/api/jobs/{job.id}', events_url=f'/api/jobs/{job.id}/events')
+            self._send_json(202, json.dumps(body).encode('utf-8'), {'Location': f'/api/jobs/{job.id}'})
+            
+        except QueueFull as e:
+            self._send_json(429, json.dumps({'error': str(e)}).encode('utf-8'), {'Retry-After': str(e.retry_after)})
+            
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            print(f"JSON Error: {e}")
+            self.send_error(400, f'Invalid JSON: {str(e)}')
+            
+        except Exception as e:
+            print(f"Unexpected Error: {e}")
+            self.send_error(500, f'Internal server error: {str(e)}')
+
+    def _job_status(self, job_id):
+        """Current state of a job, with its slides once done"""
+        job = job_queue.get(job_id)
+        if job is None:
+            self._send_json(404, json.dumps({'error': 'Job not found'}).encode('utf-8'))
+            return
+        include_text = 'text=1' in self.path.partition('?')[2]
+        self._send_json(200, json.dumps(job.to_dict(include_text), ensure_ascii=False).encode('utf-8'))
+
+    def _job_events(self, job_id):
+        """Follow a job as server-sent events; Last-Event-ID resumes after a reconnect"""
+        if job_queue.get(job_id) is None:
+            self._send_json(404, json.dumps({'error': 'Job not found'}).encode('utf-8'))
+            return
+        try:
+            last_id = int(self.headers.get('Last-Event-ID', '-1'))
+        except ValueError:
+            last_id = -1
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.start_chunked()
+        
+        try:
+            for item in job_queue.follow(job_id, last_id):
+                if item is None:
+                    self.write_chunk(b': keep-alive\n\n')
+                    continue
+                event_id, event, payload = item
+                self.write_chunk(f'id: {event_id}\n'.encode('ascii') + format_event(event, payload))
+            self.end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # the job keeps running; the client can reconnect or poll
+
+    def do_DELETE(self):
+        """Cancel a queued or running job"""
+        job_path = JOB_PATH.match(self.path)
+        if not job_path or job_path.group(2):
+            self.send_error(404, 'Not found')
+            return
+        job = job_queue.cancel(job_path.group(1))
+        if job is None:
+            self._send_json(404, json.dumps({'error': 'Job not found'}).encode('utf-8'))
+            return
+        self._send_json(200, json.dumps(job.to_dict()).encode('utf-8'))
+
+    def _send_json(self, status, body, extra_headers=None):
+        """Send a complete JSON response body with CORS headers"""
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'X-Cache, X-Coalesced, Retry-After, Location')
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_claude(self, claude_data, headers, key, priority=PRIORITY_INTERACTIVE, prompt=None):
+        """Relay an upstream SSE stream, sharing it with identical concurrent requests"""
+        if not key:
+            self._relay_claude_stream(claude_data, headers, priority, prompt)
+            return
+        
+        stream, reader, leader = single_flight.join_stream(key)
+        try:
+            if leader:
+                threading.Thread(
+                    target=pump_claude_stream, args=(stream, key, claude_data, headers, priority, prompt),
+                    name='claude-stream', daemon=True
+                ).start()
+            
+            status = stream.wait_status()
+            if status >= 400:
+                self._send_json(status, stream.error_body)
+                return
+            
+            self._start_event_stream({} if leader else {'X-Coalesced': '1'})
+            try:
+                for chunk in stream.read(reader):
+                    self.write_chunk(chunk)
+                self.end_chunked()
+            except (BrokenPipeError, ConnectionResetError):
+                print("Client disconnected during stream")
+                self.close_connection = True
+        finally:
+            stream.detach(reader)
+
+    def _relay_claude_stream(self, claude_data, headers, priority, prompt):
+        """Stream an uncoalesced request straight from upstream to this client"""
+        status, result = open_claude_stream(claude_data, headers, priority)
+        if status >= 400:
+            self._send_json(status, result)
+            return
+        
+        def emit(chunk):
+            try:
+                self.write_chunk(chunk)
+                return True
+            except (BrokenPipeError, ConnectionResetError):
+                print("Client disconnected during stream; stopping upstream stream")
+                self.close_connection = True
+                return False
+        
+        try:
+            self._start_event_stream()
+            with result as response:
+                try:
+                    finished = relay_claude_stream(response, emit, prompt)
+                except (OSError, UpstreamError) as e:
+                    print(f"Upstream stream error: {e}")
+                    finished = emit(format_event('error', {'error': str(e)}))
+            if finished:
+                self.end_chunked()
+        except (BrokenPipeError, ConnectionResetError):
+            print("Client disconnected during stream")
+            self.close_connection = True
+        finally:
+            upstream_gate.release()
+
+    def _start_event_stream(self, extra_headers=None):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.start_chunked()
 
     def do_GET(self):
         """Handle GET requests (serve files normally)"""
-        super().do_GET()
+        if self.path == '/api/providers':
+            body = json.dumps(provider_router.snapshot()).encode('utf-8')
+            self._send_json(200, body)
+            return
+        job_path = JOB_PATH.match(self.path.split('?', 1)[0])
+        if job_path:
+            if job_path.group(2):
+                self._job_events(job_path.group(1))
+            else:
+                self._job_status(job_path.group(1))
+            return
+        if self.path == '/metrics':
+            body = metrics.render()
+            self.send_response(200)
+            self.send_header('Content-Type', metrics.content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if not self._serve_static():
+            super().do_GET()
 
-def run_server(port=8000):
-    """Run the proxy server"""
-    try:
-        with socketserver.TCPServer(("", port), ProxyHTTPRequestHandler) as httpd:
-            print(f"SlideCraft AI server is running!")
-            print(f"Open http://localhost:{port} in your browser")
-            print(f"Proxy API: http://localhost:{port}/api/claude")
-            print(f"Stop server: Ctrl+C")
-            print("-" * 50)
+    def do_HEAD(self):
+        """Handle HEAD requests for static files"""
+        if not self._serve_static(head_only=True):
+            super().do_HEAD()
+
+    def _serve_static(self, head_only=False):
+        """Serve a cached static asset; returns False to fall back to the default handler"""
+        fs_path = self.translate_path(self.path)
+        if os.path.basename(fs_path).lower().endswith(PRIVATE_FILE_SUFFIXES):
+            self.send_error(404, 'File not found')
+            return True
+        if os.path.isdir(fs_path):
+            if not self.path.split('?', 1)[0].endswith('/'):
+                return False  # let SimpleHTTPRequestHandler redirect to the slash URL
+            fs_path = os.path.join(fs_path, 'index.html')
+        
+        asset, cache_control = static_cache.lookup(fs_path)
+        if asset is None or ('Range' in self.headers and not asset.rewritten):
+            # Large or uncached files (and byte ranges) are streamed from disk;
+            # ranges of rewritten HTML are ignored since the disk bytes differ
+            if asset is not None:
+                fs_path = asset.path
+            if not os.path.isfile(fs_path):
+                return False
+            return self._serve_file(fs_path, head_only)
+        
+        last_modified = asset.mtime // 1_000_000_000
+        if self._not_modified(asset.matches, last_modified):
+            self.send_response(304)
+            self.send_header('ETag', asset.representation(self.headers.get('Accept-Encoding'))[2])
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return True
+        
+        body, encoding, etag = asset.representation(self.headers.get('Accept-Encoding'))
+        self.send_response(200)
+        self.send_header('Content-Type', asset.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.date_time_string(last_modified))
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        if not asset.rewritten:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+            transfer_stats.record(os.path.relpath(asset.path, static_cache.root), len(body))
+        return True
+
+    def _serve_file(self, fs_path, head_only=False):
+        """Send a file from disk with Range support, zero-copy above the sendfile threshold"""
+        try:
+            f = open(fs_path, 'rb')
+        except OSError:
+            self.send_error(404, 'File not found')
+            return True
+        
+        with f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            last_modified = int(stat.st_mtime)
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            
+            if self._not_modified(lambda tags: etag in tags or tags.strip() == '*', last_modified):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return True
+            
+            # If-Range: only honour Range when the client's copy is still current
+            byte_range = parse_range(self.headers.get('Range'), size)
+            if_range = self.headers.get('If-Range')
+            if if_range and if_range != etag:
+                byte_range = None
+            
+            if byte_range is False:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return True
+            
+            if byte_range:
+                start, end = byte_range
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+            else:
+                start, end = 0, size - 1
+                self.send_response(200)
+            length = end - start + 1
+            
+            self.send_header('Content-Type', self.guess_type(fs_path))
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.date_time_string(last_modified))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            
+            if not head_only and length > 0:
+                send_file_range(self.connection, self.wfile, f, start, length,
+                                STATIC_SENDFILE_KB * 1024)
+                transfer_stats.record(os.path.relpath(fs_path, static_cache.root), length)
+        return True
+
+    def _not_modified(self, etag_matches, last_modified):
+        """Evaluate If-None-Match, then If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            return etag_matches(if_none_match)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since is not None and last_modified <= since.timestamp()
+        return False
+
+def create_server(port, workers, queue_size, reuse_port=False):
+    return PooledHTTPServer(("", port), ProxyHTTPRequestHandler,
+                            workers=workers, queue_size=queue_size,
+                            retry_after=PROXY_RETRY_AFTER,
+                            keepalive_timeout=PROXY_KEEPALIVE_TIMEOUT,
+                            max_keepalive_requests=PROXY_KEEPALIVE_REQUESTS,
+                            request_timeout=PROXY_REQUEST_TIMEOUT,
+                            reuse_port=reuse_port)
+
+def print_banner(port, workers, queue_size):
+    print(f"SlideCraft AI server is running!")
+    print(f"Open http://localhost:{port} in your browser")
+    print(f"Proxy API: http://localhost:{port}/api/claude")
+    print(f"Deck API: http://localhost:{port}/api/deck (prompt {get_template().id})")
+    print(f"Provider router: http://localhost:{port}/api/generate")
+    print(f"Generation jobs: http://localhost:{port}/api/jobs ({JOB_WORKERS} workers)")
+    print(f"Batch decks: http://localhost:{port}/api/batch (up to {BATCH_MAX_ITEMS} items, {BATCH_CONCURRENCY} at once)")
+    print(f"Workers: {workers} (queue {queue_size}, max upstream {PROXY_MAX_UPSTREAM})")
+    print(f"Keep-alive: {PROXY_KEEPALIVE_TIMEOUT:g}s idle, {PROXY_KEEPALIVE_REQUESTS} requests per connection")
+
+def stop_on_signal(httpd, signum):
+    """Stop accepting on signum; serve_forever() returns and the caller drains"""
+    def stop(signum, frame):
+        if not httpd.draining:
+            httpd.draining = True
+            # shutdown() waits for serve_forever(), which runs in this (the main) thread
+            threading.Thread(target=httpd.shutdown, daemon=True).start()
+    signal.signal(signum, stop)
+
+def drain(httpd, timeout=PROXY_DRAIN_TIMEOUT):
+    """Let open requests and this process's jobs finish, for up to timeout seconds"""
+    started = time.monotonic()
+    print(f"Draining (pid {os.getpid()}): {job_queue.running} jobs running, "
+          f"{job_queue.queued} queued, up to {timeout:g}s...")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        jobs = executor.submit(job_queue.stop, timeout)
+        finished = httpd.drain(timeout)
+        unfinished_jobs = jobs.result()
+    elapsed = time.monotonic() - started
+    if finished and not unfinished_jobs:
+        print(f"Drained (pid {os.getpid()}) in {elapsed:.1f}s")
+    else:
+        print(f"Drain timed out (pid {os.getpid()}) after {elapsed:.1f}s; "
+              f"{unfinished_jobs} jobs handed back, failed or still running")
+
+def run_server(port=PROXY_PORT, workers=PROXY_WORKERS, queue_size=PROXY_QUEUE_SIZE, processes=PROXY_PROCESSES):
+    """Run the proxy server in this process, or as a supervised pool of processes"""
+    if processes != 1:
+        if reuse_port_supported():
+            run_supervisor(port, processes or os.cpu_count() or 1, workers, queue_size)
+            return
+        print("Multi-process mode needs SO_REUSEPORT; running a single process")
+    
+    for attempt in range(PORT_ATTEMPTS):
+        try:
+            httpd = create_server(port, workers, queue_size)
+            break
+        except OSError as e:
+            if e.errno not in ADDRESS_IN_USE or attempt == PORT_ATTEMPTS - 1:
+                print(f"Server start error: {e}")
+                return
+            print(f"Port {port} is already in use. Trying port {port + 1}...")
+            port += 1
+    
+    with httpd:
+        print_banner(port, workers, queue_size)
+        print(f"Static assets cached: {static_cache.preload()} ({static_cache.total // 1024} KB)")
+        print(f"Stop server: Ctrl+C (kill -TERM {os.getpid()} finishes open requests first)")
+        print("-" * 50)
+        create_job_queue()
+        upstream_pool.start_reaper()
+        stop_on_signal(httpd, signal.SIGTERM)
+        try:
             httpd.serve_forever()
-    except KeyboardInterrupt:
-        print("\nServer stopped.")
-    except OSError as e:
-        if e.errno == 10048:  # Port already in use on Windows
-            print(f"Port {port} is already in use. Trying another port...")
-            print(f"Retrying with port {port + 1}...")
-            run_server(port + 1)
-        else:
-            print(f"Server start error: {e}")
+        except KeyboardInterrupt:
+            job_queue.stop()
+            print("\nServer stopped.")
+            return
+        drain(httpd)
+        print("Server stopped.")
+
+def run_supervisor(port, processes, workers, queue_size):
+    """Pre-fork processes workers that share the port, and keep them running"""
+    for attempt in range(PORT_ATTEMPTS):
+        if port_available(port):
+            break
+        if attempt == PORT_ATTEMPTS - 1:
+            print(f"Server start error: ports {port - attempt}-{port} are in use")
+            return
+        print(f"Port {port} is already in use. Trying port {port + 1}...")
+        port += 1
+    
+    print_banner(port, workers, queue_size)
+    print(f"Processes: {processes} sharing port {port} (SO_REUSEPORT), drain up to {PROXY_DRAIN_TIMEOUT:g}s")
+    print("Stop server: Ctrl+C")
+    print("-" * 50)
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--port', str(port),
+               '--workers', str(workers), '--queue-size', str(queue_size)]
+    PreforkSupervisor(command, processes, drain_timeout=PROXY_DRAIN_TIMEOUT).run()
+
+def run_worker(port, workers, queue_size, ready_fd=None):
+    """One supervised process: serve on the shared port until SIGTERM, then drain"""
+    # Ctrl+C reaches the whole process group; the supervisor turns it into SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with create_server(port, workers, queue_size, reuse_port=True) as httpd:
+        stop_on_signal(httpd, signal.SIGTERM)
+        static_cache.preload()
+        create_job_queue()
+        upstream_pool.start_reaper()
+        
+        supervisor = os.getppid()
+        def watch_supervisor():
+            while os.getppid() == supervisor:
+                time.sleep(1.0)
+            print(f"Supervisor exited; worker {os.getpid()} draining")
+            os.kill(os.getpid(), signal.SIGTERM)
+        threading.Thread(target=watch_supervisor, name='supervisor-watch', daemon=True).start()
+        
+        if ready_fd is not None:
+            os.write(ready_fd, b'1')
+            os.close(ready_fd)
+        httpd.serve_forever()
+        drain(httpd)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='SlideCraft AI proxy server')
+    parser.add_argument('--port', type=int, default=PROXY_PORT, help='port to listen on (default: PROXY_PORT)')
+    parser.add_argument('--processes', type=int, default=PROXY_PROCESSES,
+                        help='worker processes sharing the port; 0 = one per CPU core (default: PROXY_PROCESSES)')
+    # Set by the supervisor when it starts a worker process
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--workers', type=int, default=PROXY_WORKERS, help=argparse.SUPPRESS)
+    parser.add_argument('--queue-size', type=int, default=PROXY_QUEUE_SIZE, help=argparse.SUPPRESS)
+    parser.add_argument('--ready-fd', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(args.port, args.workers, args.queue_size, args.ready_fd)
+        sys.exit(0)
+    
     # Check for API key
     api_key = os.getenv('CLAUDE_API_KEY')
     if not api_key:
@@ -122,4 +1297,4 @@ if __name__ == "__main__":
         print("You can enter API key directly in the web interface.")
         print()
     
-    run_server()
\ No newline at end of file
+    run_server(args.port, processes=args.processes)
\ No newline at end of file
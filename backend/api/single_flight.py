@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Request coalescing for identical upstream calls.
+Concurrent requests with the same key share a single upstream call; every
+waiter receives the same result, or the same error. Streams are shared only
+while they can still be replayed from the start, and hold at most a bounded
+window of unread chunks.
+"""
+
+import threading
+from collections import deque
+
+DEFAULT_REPLAY_BYTES = 256 * 1024
+DEFAULT_MAX_LAG = 256 * 1024
+
+
+class _Call:
+    """One in-progress call and the outcome shared with its waiters."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Reader:
+    """Position of one attached reader in a SharedStream."""
+
+    __slots__ = ('position',)
+
+    def __init__(self):
+        self.position = 0
+
+
+class SharedStream:
+    """Chunks that one producer writes and the attached readers consume.
+
+    Readers can join, and replay from the first chunk, until the stream has
+    produced more than replay_limit bytes. After that it takes no new readers
+    (SingleFlight starts a fresh call for them) and only keeps chunks that an
+    attached reader has not read yet. The producer waits while the slowest
+    reader is more than max_lag bytes behind, and append() returns False once
+    every reader has detached so the producer can stop reading upstream.
+    """
+
+    def __init__(self, replay_limit=DEFAULT_REPLAY_BYTES, max_lag=DEFAULT_MAX_LAG):
+        self.replay_limit = replay_limit
+        self.max_lag = max_lag
+        self._cond = threading.Condition()
+        self._chunks = deque()
+        self._base = 0          # absolute index of _chunks[0]
+        self._buffered = 0      # bytes held in _chunks
+        self._produced = 0      # bytes appended so far
+        self._readers = set()
+        self._joinable = True
+        self._finished = False
+        self._started = False
+        self.status = None
+        self.error_body = None
+        self.error = None
+
+    def attach(self):
+        """Add a reader starting at the first chunk; None once replay is no longer possible."""
+        with self._cond:
+            if not self._joinable:
+                return None
+            reader = _Reader()
+            self._readers.add(reader)
+            return reader
+
+    def detach(self, reader):
+        """Remove a reader (idempotent); with none left the producer is told to stop."""
+        with self._cond:
+            self._readers.discard(reader)
+            if not self._readers:
+                self._joinable = False
+            self._trim()
+            self._cond.notify_all()
+
+    def _trim(self):
+        """Drop chunks every reader has read, once late joiners are no longer accepted."""
+        if self._joinable:
+            return
+        keep_from = min((r.position for r in self._readers), default=self._base + len(self._chunks))
+        while self._base < keep_from:
+            self._buffered -= len(self._chunks.popleft())
+            self._base += 1
+
+    def start(self, status, error_body=None):
+        """Publish the upstream status (and body, for error responses)."""
+        with self._cond:
+            self.status = status
+            self.error_body = error_body
+            self._started = True
+            self._cond.notify_all()
+
+    def append(self, chunk):
+        """Add a chunk, waiting for slow readers; returns False when nobody is reading."""
+        with self._cond:
+            while self._readers and not self._joinable and self._buffered > self.max_lag:
+                self._cond.wait()
+            if not self._readers and not self._joinable:
+                return False
+            self._chunks.append(chunk)
+            self._buffered += len(chunk)
+            self._produced += len(chunk)
+            if self._produced > self.replay_limit:
+                self._joinable = False
+                self._trim()
+            self._cond.notify_all()
+            return True
+
+    def finish(self, error=None):
+        """Mark the stream complete; error is re-raised by waiting readers."""
+        with self._cond:
+            if error is not None:
+                self.error = error
+            self._finished = True
+            self._joinable = False
+            self._started = True
+            self._cond.notify_all()
+
+    def wait_status(self):
+        """Block until the upstream status is known, raising any startup error."""
+        with self._cond:
+            while not self._started:
+                self._cond.wait()
+            if self.status is None:
+                raise self.error or RuntimeError('Stream ended before it started')
+            return self.status
+
+    def read(self, reader):
+        """Yield the reader's chunks in order, waiting for new ones until finished."""
+        while True:
+            with self._cond:
+                while reader.position >= self._base + len(self._chunks) and not self._finished:
+                    self._cond.wait()
+                if reader.position >= self._base + len(self._chunks):
+                    return
+                chunk = self._chunks[reader.position - self._base]
+                reader.position += 1
+                self._trim()
+                self._cond.notify_all()
+            yield chunk
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls and streams that share a key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn once per key at a time; returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def join_stream(self, key):
+        """Return (stream, reader, leader); the leader must produce and finish the stream.
+
+        A stream that can no longer be replayed from the start is not joined;
+        the caller becomes the leader of a new one instead.
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None:
+                reader = stream.attach()
+                if reader is not None:
+                    self.coalesced += 1
+                    return stream, reader, False
+            stream = self._streams[key] = SharedStream()
+            return stream, stream.attach(), True
+
+    def end_stream(self, key, stream):
+        """Stop sharing a stream so later requests start a fresh upstream call."""
+        with self._lock:
+            if self._streams.get(key) is stream:
+                del self._streams[key]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Streaming helpers for slide generation.
+Parses upstream server-sent events and pulls each completed slide object out
+of the partial JSON array as soon as its closing brace arrives.
+"""
+
+import json
+import re
+
+# Same fallback as script.js: everything from the first '[' to the last ']'
+SLIDE_ARRAY = re.compile(r'\[[\s\S]*\]')
+
+# Upstream prompt-cache token counts reported alongside input_tokens
+CACHE_USAGE_FIELDS = ('cache_creation_input_tokens', 'cache_read_input_tokens')
+
+
+class SlideExtractor:
+    """Incremental parser for a JSON array of {title, content} objects.
+
+    Text is fed in arbitrary chunks; every call to feed() returns the slides
+    completed by that chunk. Consumed text is dropped so memory stays bounded
+    by the size of a single slide.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+        self.count = 0
+
+    def feed(self, text):
+        """Add text and return the list of slides it completed."""
+        self._buffer += text
+        slides = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if not self._in_array:
+                if char == '[':
+                    self._in_array = True
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif char == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    slide = self._parse(buffer[self._object_start:i + 1])
+                    if slide is not None:
+                        slides.append(slide)
+                    self._object_start = None
+            i += 1
+
+        # Keep only the unfinished object (if any) in the buffer
+        if self._object_start is not None:
+            self._buffer = buffer[self._object_start:]
+            self._pos = i - self._object_start
+            self._object_start = 0
+        else:
+            self._buffer = ''
+            self._pos = 0
+        return slides
+
+    def _parse(self, raw):
+        try:
+            obj = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(obj, dict) or 'title' not in obj:
+            return None
+        slide = {'index': self.count, 'title': obj.get('title', ''), 'content': obj.get('content', '')}
+        self.count += 1
+        return slide
+
+
+class SSEParser:
+    """Line-oriented parser for a server-sent events stream."""
+
+    def __init__(self):
+        self._event = None
+        self._data = []
+
+    def feed_line(self, line):
+        """Consume one raw line; return (event, data) when an event completes."""
+        line = line.rstrip('\r\n')
+        if not line:
+            if not self._data and self._event is None:
+                return None
+            event = (self._event or 'message', '\n'.join(self._data))
+            self._event = None
+            self._data = []
+            return event
+        if line.startswith(':'):
+            return None
+        field, _, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'event':
+            self._event = value
+        elif field == 'data':
+            self._data.append(value)
+        return None
+
+
+def text_delta(event, data):
+    """Return the generated text carried by an upstream SSE event, if any."""
+    if event != 'content_block_delta':
+        return ''
+    try:
+        payload = json.loads(data)
+    except json.JSONDecodeError:
+        return ''
+    delta = payload.get('delta') or {}
+    if delta.get('type') == 'text_delta':
+        return delta.get('text', '')
+    return ''
+
+
+def usage_from_event(event, data):
+    """Return the token usage reported by an upstream SSE event, if any.
+
+    message_start carries input_tokens and any prompt-cache counts,
+    message_delta the output_tokens.
+    """
+    if event not in ('message_start', 'message_delta'):
+        return None
+    try:
+        payload = json.loads(data)
+    except json.JSONDecodeError:
+        return None
+    if event == 'message_start':
+        usage = (payload.get('message') or {}).get('usage') or {}
+        result = {'input_tokens': usage.get('input_tokens', 0)}
+        for field in CACHE_USAGE_FIELDS:
+            if usage.get(field):
+                result[field] = usage[field]
+        return result
+    usage = payload.get('usage') or {}
+    return {'output_tokens': usage.get('output_tokens', 0)}
+
+
+def extract_slides(text):
+    """Slides from a complete response text, for when none were streamed."""
+    match = SLIDE_ARRAY.search(text)
+    if not match:
+        return []
+    try:
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(items, list):
+        return []
+    slides = [item for item in items if isinstance(item, dict) and 'title' in item]
+    return [{'index': i, 'title': slide.get('title', ''), 'content': slide.get('content', '')}
+            for i, slide in enumerate(slides)]
+
+
+def format_event(event, payload):
+    """Encode one server-sent event."""
+    return f'event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n'.encode('utf-8')
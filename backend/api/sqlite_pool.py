@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Pooled SQLite access for the waitlist server.
+Each thread keeps one long-lived connection in WAL mode with tuned pragmas and
+a statement cache, so requests skip connection setup and reuse prepared
+statements. Writes run in BEGIN IMMEDIATE transactions and are retried with
+jittered backoff when the database stays busy past the busy timeout.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# OperationalError messages that mean "try again", not "this query is wrong"
+BUSY_ERRORS = ('database is locked', 'database is busy', 'database table is locked')
+
+
+def is_busy_error(error):
+    return isinstance(error, sqlite3.OperationalError) and str(error).startswith(BUSY_ERRORS)
+
+
+class SQLitePool:
+    """Per-thread SQLite connections sharing one configuration."""
+
+    def __init__(self, db_file, cache_mb=16, mmap_mb=64, busy_timeout=5.0,
+                 synchronous='FULL', max_retries=5, cached_statements=256):
+        self.db_file = db_file
+        self.cache_mb = cache_mb
+        self.mmap_mb = mmap_mb
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self.max_retries = max_retries
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._pid = os.getpid()
+        self.opened = 0
+        self.retries = 0
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly below
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA cache_size={-self.cache_mb * 1024}')
+        conn.execute(f'PRAGMA mmap_size={self.mmap_mb * 1024 * 1024}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+
+    def connection(self):
+        """This thread's connection, opened on first use."""
+        if os.getpid() != self._pid:
+            # Connections must not cross fork(); start over in the child
+            self._local = threading.local()
+            self._connections = []
+            self._pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._connections.append(conn)
+                self.opened += 1
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT on this thread's connection."""
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+    def _retry(self, attempt, error):
+        if attempt >= self.max_retries or not is_busy_error(error):
+            return False
+        with self._lock:
+            self.retries += 1
+        time.sleep(random.uniform(0, min(1.0, 0.01 * (2 ** attempt))))
+        return True
+
+    def write(self, fn):
+        """Run fn(conn) in a write transaction, retrying while the database is busy."""
+        attempt = 0
+        while True:
+            try:
+                with self.transaction() as conn:
+                    return fn(conn)
+            except sqlite3.OperationalError as e:
+                if not self._retry(attempt, e):
+                    raise
+                attempt += 1
+
+    def read(self, fn):
+        """Run fn(conn) outside an explicit transaction, retrying while busy."""
+        attempt = 0
+        while True:
+            try:
+                return fn(self.connection())
+            except sqlite3.OperationalError as e:
+                if not self._retry(attempt, e):
+                    raise
+                attempt += 1
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
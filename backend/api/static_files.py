@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+In-memory static asset cache for the proxy server.
+Text assets are read once, pre-compressed (gzip, and brotli when the module is
+installed) and revalidated by mtime. HTML pages are served with their local
+JS/CSS references rewritten to content-hashed URLs that can be cached forever.
+Other file types, large files and anything past the memory budget bypass the
+cache and are sent uncompressed with os.sendfile (or mmap), with support for
+single byte-range requests.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import mmap
+import os
+import posixpath
+import re
+import threading
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'image/svg+xml'
+)
+CACHEABLE_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg', '.txt', '.md')
+SKIP_DIRS = ('.git', '.venv', 'venv', '__pycache__', 'node_modules')
+
+# name.<8 hex chars>.ext as produced by hashed_name()
+HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{8})(?P<ext>\.[A-Za-z0-9]+)$')
+# src="..." / href="..." references to local scripts and stylesheets
+ASSET_REFERENCE = re.compile(r'''(?P<attr>(?:src|href)=["'])(?P<url>[^"'#?:]+\.(?:js|css))(?P<end>["'])''')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+def hashed_name(path, content_hash):
+    """design-system.js -> design-system.<hash8>.js"""
+    stem, ext = posixpath.splitext(path)
+    return f'{stem}.{content_hash[:8]}{ext}'
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (ignoring those with q=0)."""
+    accepted = set()
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """Parse a single 'bytes=' range into (start, end) inclusive.
+
+    Returns None when the header is absent or not a single byte range (serve
+    the whole file), and False when the range cannot be satisfied.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[6:].strip().partition('-')
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def send_file_range(sock, wfile, f, offset, count, sendfile_threshold):
+    """Write count bytes of f from offset, zero-copy for large bodies."""
+    if count >= sendfile_threshold and hasattr(os, 'sendfile'):
+        # socket.sendfile waits for buffer space when the socket has a timeout
+        sock.sendfile(f, offset, count)
+        return
+    if count >= sendfile_threshold:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                wfile.write(view[offset:offset + count])
+            finally:
+                view.release()
+        return
+    f.seek(offset)
+    while count > 0:
+        chunk = f.read(min(count, 64 * 1024))
+        if not chunk:
+            break
+        wfile.write(chunk)
+        count -= len(chunk)
+
+
+class TransferStats:
+    """Bytes and responses served per file."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def record(self, path, nbytes):
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None:
+                entry = self._files[path] = [0, 0]
+            entry[0] += nbytes
+            entry[1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {path: {'bytes': b, 'responses': n} for path, (b, n) in self._files.items()}
+
+
+class StaticAsset:
+    """One file's bytes, compressed variants and validators."""
+
+    def __init__(self, path, body, mtime, source_size, content_type):
+        self.path = path
+        self.body = body
+        self.mtime = mtime
+        self.source_size = source_size
+        self.content_type = content_type
+        self.content_hash = hashlib.sha1(body).hexdigest()
+        self.etag = f'"{self.content_hash[:16]}"'
+        self.variants = {}
+        self.deps = {}
+        self.rewritten = False  # body differs from the file on disk
+
+        if content_type.startswith(COMPRESSIBLE_TYPES) and len(body) >= 512:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.variants['br'] = compressed
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def representation(self, accept_encoding):
+        """Return (body, content-encoding or None, etag) for the client."""
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ('br', 'gzip'):
+            if coding in self.variants and coding in accepted:
+                return self.variants[coding], coding, f'"{self.content_hash[:16]}-{coding}"'
+        return self.body, None, self.etag
+
+    def matches(self, if_none_match):
+        """True if If-None-Match names any representation of this content."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        prefix = f'"{self.content_hash[:16]}'
+        return any(tag.strip().lstrip('W/').startswith(prefix) for tag in if_none_match.split(','))
+
+
+class StaticCache:
+    """Thread-safe cache of StaticAssets keyed by filesystem path."""
+
+    def __init__(self, root, max_file_size=2 * 1024 * 1024, max_total=64 * 1024 * 1024):
+        self.root = os.path.abspath(root)
+        self.max_file_size = max_file_size
+        self.max_total = max_total
+        self._assets = {}
+        self._oversize = {}  # fs_path -> (mtime_ns, size) of files that did not fit
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def preload(self):
+        """Load and compress every cacheable asset under root."""
+        count = 0
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.')]
+            for filename in filenames:
+                if filename.endswith(CACHEABLE_EXTENSIONS):
+                    if self.get(os.path.join(dirpath, filename)) is not None:
+                        count += 1
+        return count
+
+    def get(self, fs_path):
+        """Fresh asset for fs_path, reloading it if its mtime or size changed."""
+        try:
+            stat = os.stat(fs_path)
+        except OSError:
+            return None
+        if not fs_path.lower().endswith(CACHEABLE_EXTENSIONS) or not os.path.isfile(fs_path) \
+                or stat.st_size > self.max_file_size:
+            return None
+
+        with self._lock:
+            asset = self._assets.get(fs_path)
+            # Past the budget: served from disk until the file changes, never recompressed per request
+            if self._oversize.get(fs_path) == (stat.st_mtime_ns, stat.st_size):
+                return None
+            if asset is None and self.total + stat.st_size > self.max_total:
+                self._oversize[fs_path] = (stat.st_mtime_ns, stat.st_size)
+                return None
+        if asset is not None and asset.mtime == stat.st_mtime_ns and asset.source_size == stat.st_size:
+            if asset.deps and not self._deps_fresh(asset):
+                return self._load(fs_path, stat)
+            return asset
+        return self._load(fs_path, stat)
+
+    def _load(self, fs_path, stat):
+        try:
+            with open(fs_path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        content_type = mimetypes.guess_type(fs_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+
+        deps = {}
+        source = body
+        if fs_path.endswith('.html'):
+            body, deps = self._rewrite_html(fs_path, body)
+        asset = StaticAsset(fs_path, body, stat.st_mtime_ns, len(source), content_type)
+        asset.deps = deps
+        asset.rewritten = body != source
+
+        with self._lock:
+            old = self._assets.pop(fs_path, None)
+            if old is not None:
+                self.total -= old.size
+            if self.total + asset.size > self.max_total:
+                self._oversize[fs_path] = (stat.st_mtime_ns, stat.st_size)
+                return None
+            self._oversize.pop(fs_path, None)
+            self._assets[fs_path] = asset
+            self.total += asset.size
+        return asset
+
+    def _deps_fresh(self, asset):
+        for dep_path, dep_hash in asset.deps.items():
+            dep = self.get(dep_path)
+            if dep is None or dep.content_hash != dep_hash:
+                return False
+        return True
+
+    def _rewrite_html(self, fs_path, body):
+        """Point local script/stylesheet references at their hashed URLs."""
+        try:
+            text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            return body, {}
+        base_dir = os.path.dirname(fs_path)
+        deps = {}
+
+        def replace(match):
+            url = match.group('url')
+            if url.startswith('/'):
+                dep_path = os.path.join(self.root, url.lstrip('/'))
+            else:
+                dep_path = os.path.join(base_dir, url)
+            dep_path = os.path.normpath(dep_path)
+            if not dep_path.startswith(self.root):
+                return match.group(0)
+            dep = self.get(dep_path)
+            if dep is None:
+                return match.group(0)
+            deps[dep_path] = dep.content_hash
+            return f"{match.group('attr')}{hashed_name(url, dep.content_hash)}{match.group('end')}"
+
+        return ASSET_REFERENCE.sub(replace, text).encode('utf-8'), deps
+
+    def lookup(self, fs_path):
+        """Resolve a request path to (asset, cache-control) or (None, None).
+
+        Content-hashed names resolve to the real file and are immutable as long
+        as the hash still matches; anything else must be revalidated.
+        """
+        asset = self.get(fs_path)
+        if asset is not None:
+            return asset, REVALIDATE
+
+        directory, name = os.path.split(fs_path)
+        match = HASHED_NAME.match(name)
+        if not match:
+            return None, None
+        asset = self.get(os.path.join(directory, match.group('stem') + match.group('ext')))
+        if asset is None:
+            return None, None
+        if asset.content_hash.startswith(match.group('hash')):
+            return asset, IMMUTABLE
+        return asset, REVALIDATE
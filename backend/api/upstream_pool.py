@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Keep-alive connection pool for upstream LLM API calls.
+Connections are reused per (scheme, host, port) so each generation does not
+pay a fresh TCP + TLS handshake. A background reaper closes connections that
+have sat idle longer than max_idle.
+"""
+
+import http.client
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_MAX_IDLE = 60.0
+
+# Errors that mean a reused keep-alive socket was closed under us
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class UpstreamError(Exception):
+    """Raised when the upstream API cannot be reached."""
+
+
+class UpstreamTimeout(UpstreamError):
+    """Raised when connecting to or reading from the upstream API times out."""
+
+
+class PooledResponse:
+    """Upstream response that returns its connection to the pool on close."""
+
+    def __init__(self, pool, key, conn, response, started, connect_time):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.started = started
+        self.connect_time = connect_time
+        self.ttfb = time.perf_counter() - started
+        self._closed = False
+
+    def read(self, amt=None):
+        try:
+            return self._response.read(amt)
+        except socket.timeout as e:
+            self._discard()
+            raise UpstreamTimeout(f'Upstream read timed out: {e}') from e
+        except (OSError, http.client.HTTPException) as e:
+            self._discard()
+            raise UpstreamError(f'Upstream read failed: {e}') from e
+
+    def readline(self):
+        try:
+            return self._response.readline()
+        except socket.timeout as e:
+            self._discard()
+            raise UpstreamTimeout(f'Upstream read timed out: {e}') from e
+        except (OSError, http.client.HTTPException) as e:
+            self._discard()
+            raise UpstreamError(f'Upstream read failed: {e}') from e
+
+    def _discard(self):
+        if not self._closed:
+            self._closed = True
+            self._pool._release(self._key, self._conn, reusable=False)
+            self._pool._observe(self)
+
+    def close(self):
+        """Release the connection; it is only reused if the body was drained."""
+        if self._closed:
+            return
+        self._closed = True
+        reusable = self._response.isclosed() and not self._response.will_close
+        if not reusable:
+            self._response.close()
+        self._pool._release(self._key, self._conn, reusable=reusable)
+        self._pool._observe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _HostPool:
+    """Idle connections plus a cap on open connections for one host."""
+
+    def __init__(self, max_size):
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(max_size)
+
+
+class ConnectionPool:
+    """Thread-safe keep-alive HTTP(S) connection pool keyed by host."""
+
+    def __init__(self, max_per_host=DEFAULT_POOL_SIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_idle=DEFAULT_MAX_IDLE, ssl_context=None, observer=None):
+        self.max_per_host = max_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_idle = max_idle
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        # observer(host, connect_seconds, ttfb_seconds, total_seconds) after each response
+        self.observer = observer
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+
+    def _host_pool(self, key):
+        with self._lock:
+            pool = self._hosts.get(key)
+            if pool is None:
+                pool = self._hosts[key] = _HostPool(self.max_per_host)
+            return pool
+
+    def _new_connection(self, scheme, host, port):
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(
+                host, port, timeout=self.connect_timeout, context=self.ssl_context
+            )
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.connect_timeout)
+        try:
+            conn.connect()
+        except socket.timeout as e:
+            conn.close()
+            raise UpstreamTimeout(f'Connect to {host}:{port} timed out') from e
+        except OSError as e:
+            conn.close()
+            raise UpstreamError(f'Connect to {host}:{port} failed: {e}') from e
+        conn.sock.settimeout(self.read_timeout)
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def _checkout(self, key):
+        """Take an idle connection for key, evicting stale ones; None if empty."""
+        pool = self._host_pool(key)
+        now = time.monotonic()
+        with self._lock:
+            while pool.idle:
+                conn, idle_since = pool.idle.pop()
+                if now - idle_since <= self.max_idle and conn.sock is not None:
+                    self.reused += 1
+                    return conn
+                conn.close()
+        return None
+
+    def _release(self, key, conn, reusable):
+        pool = self._host_pool(key)
+        if reusable and conn.sock is not None:
+            with self._lock:
+                pool.idle.append((conn, time.monotonic()))
+        else:
+            conn.close()
+        pool.slots.release()
+
+    def _observe(self, response):
+        if self.observer is not None:
+            self.observer(
+                self._key_host(response._key), response.connect_time, response.ttfb,
+                time.perf_counter() - response.started
+            )
+
+    @staticmethod
+    def _key_host(key):
+        return key[1] if key[2] in (80, 443) else f'{key[1]}:{key[2]}'
+
+    def evict_idle(self):
+        """Close every connection idle for longer than max_idle."""
+        cutoff = time.monotonic() - self.max_idle
+        with self._lock:
+            for pool in self._hosts.values():
+                fresh = deque(item for item in pool.idle if item[1] >= cutoff)
+                for conn, idle_since in pool.idle:
+                    if idle_since < cutoff:
+                        conn.close()
+                pool.idle = fresh
+
+    def start_reaper(self, interval=None):
+        """Run evict_idle() every interval seconds (default max_idle / 2) in the background."""
+        if self._reaper is not None:
+            return
+        interval = interval or max(1.0, self.max_idle / 2)
+
+        def reap():
+            while not self._reaper_stop.wait(interval):
+                self.evict_idle()
+
+        self._reaper = threading.Thread(target=reap, name='upstream-pool-reaper', daemon=True)
+        self._reaper.start()
+
+    def open(self, method, url, body=None, headers=None):
+        """Send a request and return a PooledResponse with the body unread."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        pool = self._host_pool(key)
+        if not pool.slots.acquire(timeout=self.connect_timeout):
+            raise UpstreamTimeout(f'No free connection to {parts.hostname} in pool')
+
+        conn = None
+        started = time.perf_counter()
+        connect_time = 0.0
+        try:
+            conn = self._checkout(key)
+            reused = conn is not None
+            if conn is None:
+                conn = self._new_connection(scheme, parts.hostname, port)
+                connect_time = time.perf_counter() - started
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive socket; retry once fresh
+                retry_started = time.perf_counter()
+                conn = self._new_connection(scheme, parts.hostname, port)
+                connect_time = time.perf_counter() - retry_started
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+        except UpstreamError:
+            pool.slots.release()
+            raise
+        except socket.timeout as e:
+            conn.close()
+            pool.slots.release()
+            raise UpstreamTimeout(f'Upstream request timed out: {e}') from e
+        except (OSError, http.client.HTTPException) as e:
+            if conn is not None:
+                conn.close()
+            pool.slots.release()
+            raise UpstreamError(f'Upstream request failed: {e}') from e
+
+        return PooledResponse(self, key, conn, response, started, connect_time)
+
+    def request(self, method, url, body=None, headers=None):
+        """Send a request and return (status, headers, body bytes)."""
+        with self.open(method, url, body=body, headers=headers) as response:
+            data = response.read()
+            return response.status, response.headers, data
+
+    def close(self):
+        """Stop the reaper and close every idle connection."""
+        self._reaper_stop.set()
+        with self._lock:
+            for pool in self._hosts.values():
+                while pool.idle:
+                    conn, _ = pool.idle.pop()
+                    conn.close()
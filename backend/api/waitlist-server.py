@@ -4,36 +4,126 @@ SlideCraft AI Waitlist Server
 A simple Flask server to handle waitlist signups for the landing page.
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, render_template_string, Response, stream_with_context
 from flask_cors import CORS
+import base64
+import csv
 import json
 import os
 import datetime
 import re
 import sqlite3
+import zlib
+from concurrent.futures import TimeoutError as WriteTimeout
 from typing import Dict, Any, Optional
 from email_config import email_sender
+from email_templates import normalize_language
+from sqlite_pool import SQLitePool
+from group_commit import GroupCommitWriter
+from email_outbox import EmailOutbox
+from email_index import EmailIndex
+from waitlist_stats import StatsService
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
 
 # Configuration
-DATABASE_FILE = 'waitlist.db'
+DATABASE_FILE = os.getenv('WAITLIST_DB', 'waitlist.db')
 MAX_EMAIL_LENGTH = 254
 MAX_NAME_LENGTH = 100
+USER_TYPES = ('business', 'educator', 'student', 'consultant', 'entrepreneur', 'other')
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 500
+ADMIN_STREAM_PAGE_SIZE = 1000
+EXPORT_FETCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Exportable columns: query parameter name -> (CSV header, SQL column)
+EXPORT_COLUMNS = {
+    'id': ('ID', 'id'),
+    'email': ('Email', 'email'),
+    'name': ('Name', 'name'),
+    'user_type': ('User Type', 'user_type'),
+    'source': ('Source', 'source'),
+    'language': ('Language', 'language'),
+    'created_at': ('Created At', 'created_at')
+}
+DEFAULT_EXPORT_COLUMNS = ('email', 'name', 'user_type', 'source', 'created_at')
+
+# SQLite connection pool tuning
+SQLITE_CACHE_MB = int(os.getenv('SQLITE_CACHE_MB', '16'))
+SQLITE_MMAP_MB = int(os.getenv('SQLITE_MMAP_MB', '64'))
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '5'))
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'FULL')  # fsync every commit; group commit amortizes it
+
+# Group commit: signups that queue up during a commit share the next transaction
+SIGNUP_BATCH_SIZE = int(os.getenv('SIGNUP_BATCH_SIZE', '200'))
+SIGNUP_BATCH_MS = float(os.getenv('SIGNUP_BATCH_MS', '0'))
+SIGNUP_WRITE_TIMEOUT = float(os.getenv('SIGNUP_WRITE_TIMEOUT', '30'))
+
+# Background email delivery from the outbox table
+EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', '2'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '6'))
+EMAIL_BACKOFF_BASE = float(os.getenv('EMAIL_BACKOFF_BASE', '30'))
+EMAIL_BACKOFF_MAX = float(os.getenv('EMAIL_BACKOFF_MAX', '3600'))
+
+# Stats are served from memory and reloaded from the rollup table after this long
+STATS_TTL = float(os.getenv('STATS_TTL', '5'))
+
+# Outbox message kinds and how each one is sent
+EMAIL_SENDERS = {
+    'welcome': lambda payload: email_sender.send_welcome_email(
+        payload['email'], payload.get('name'), payload.get('language')
+    ),
+    'admin_notification': email_sender.send_admin_notification
+}
+
+# Statements are kept as constants so each connection's statement cache reuses them
+# The UNIQUE email constraint decides duplicates: rowcount is 0 for an existing email
+INSERT_SIGNUP = '''
+    INSERT INTO waitlist_signups 
+    (email, name, user_type, source, ip_address, user_agent, language)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (email) DO NOTHING
+'''
+SELECT_EMAILS = 'SELECT email FROM waitlist_signups'
+COUNT_SIGNUPS = 'SELECT COUNT(*) FROM waitlist_signups'
+UPDATE_SIGNUP_STATS = 'UPDATE waitlist_stats SET total_signups = total_signups + ?, last_updated = CURRENT_TIMESTAMP'
 
 class WaitlistDatabase:
-    """Simple SQLite database handler for waitlist management."""
+    """SQLite database handler for waitlist management."""
     
     def __init__(self, db_file: str):
         self.db_file = db_file
+        self.pool = SQLitePool(
+            db_file,
+            cache_mb=SQLITE_CACHE_MB,
+            mmap_mb=SQLITE_MMAP_MB,
+            busy_timeout=SQLITE_BUSY_TIMEOUT,
+            synchronous=SQLITE_SYNCHRONOUS
+        )
+        self.outbox = EmailOutbox(
+            self.pool,
+            EMAIL_SENDERS,
+            workers=EMAIL_WORKERS,
+            max_attempts=EMAIL_MAX_ATTEMPTS,
+            backoff_base=EMAIL_BACKOFF_BASE,
+            backoff_max=EMAIL_BACKOFF_MAX
+        )
+        self.stats = StatsService(self.pool, ttl=STATS_TTL)
         self.init_database()
+        self.email_index = self.load_email_index()
+        self.writer = GroupCommitWriter(
+            self.pool,
+            self._insert_signups,
+            max_batch=SIGNUP_BATCH_SIZE,
+            max_delay=SIGNUP_BATCH_MS / 1000
+        )
     
     def init_database(self):
         """Initialize the database with required tables."""
-        with sqlite3.connect(self.db_file) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        def create(conn):
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS waitlist_signups (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     email TEXT UNIQUE NOT NULL,
@@ -44,11 +134,17 @@ class WaitlistDatabase:
                     user_agent TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     is_confirmed BOOLEAN DEFAULT FALSE,
-                    confirmation_token TEXT
+                    confirmation_token TEXT,
+                    language TEXT DEFAULT 'en'
                 )
             ''')
             
-            cursor.execute('''
+            # Databases created before per-signup email language
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(waitlist_signups)')}
+            if 'language' not in columns:
+                conn.execute("ALTER TABLE waitlist_signups ADD COLUMN language TEXT DEFAULT 'en'")
+            
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS waitlist_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     total_signups INTEGER DEFAULT 0,
@@ -58,116 +154,208 @@ class WaitlistDatabase:
             ''')
             
             # Initialize stats if empty
-            cursor.execute('SELECT COUNT(*) FROM waitlist_stats')
-            if cursor.fetchone()[0] == 0:
-                cursor.execute('INSERT INTO waitlist_stats (total_signups, confirmed_signups) VALUES (0, 0)')
+            if conn.execute('SELECT COUNT(*) FROM waitlist_stats').fetchone()[0] == 0:
+                conn.execute('INSERT INTO waitlist_stats (total_signups, confirmed_signups) VALUES (0, 0)')
+            
+            # Keyset pagination for the admin views: newest first, optionally per type/source
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_signups_created ON waitlist_signups (created_at, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_signups_type_created ON waitlist_signups (user_type, created_at, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_signups_source_created ON waitlist_signups (source, created_at, id)')
             
-            conn.commit()
+            EmailOutbox.init_schema(conn)
+            StatsService.init_schema(conn)
+        
+        self.pool.write(create)
+    
+    def load_email_index(self) -> EmailIndex:
+        """Build the in-memory index of registered emails."""
+        def load(conn):
+            index = EmailIndex(capacity=conn.execute(COUNT_SIGNUPS).fetchone()[0])
+            index.update(email for (email,) in conn.execute(SELECT_EMAILS))
+            return index
+        
+        return self.pool.read(load)
     
     def add_signup(self, email: str, name: str = None, user_type: str = None, 
                    source: str = 'landing_page', ip_address: str = None, 
-                   user_agent: str = None) -> Dict[str, Any]:
+                   user_agent: str = None, language: str = 'en') -> Dict[str, Any]:
         """Add a new waitlist signup."""
+        # Known duplicates are refused from memory; anything else goes to the database
+        if email in self.email_index:
+            return {'success': False, 'error': 'Email already registered'}
+        
+        row = (email, name, user_type, source, ip_address, user_agent, language)
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                
-                # Check if email already exists
-                cursor.execute('SELECT id FROM waitlist_signups WHERE email = ?', (email,))
-                if cursor.fetchone():
-                    return {'success': False, 'error': 'Email already registered'}
-                
-                # Insert new signup
-                cursor.execute('''
-                    INSERT INTO waitlist_signups 
-                    (email, name, user_type, source, ip_address, user_agent)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (email, name, user_type, source, ip_address, user_agent))
-                
-                # Update stats
-                cursor.execute('UPDATE waitlist_stats SET total_signups = total_signups + 1, last_updated = CURRENT_TIMESTAMP')
-                
-                conn.commit()
-                
-                # Send welcome email to user
-                try:
-                    email_sent = email_sender.send_welcome_email(email, name)
-                    if email_sent:
-                        print(f"✅ Welcome email sent to {email}")
-                    else:
-                        print(f"⚠️ Failed to send welcome email to {email}")
-                except Exception as e:
-                    print(f"❌ Email sending error: {str(e)}")
-                
-                # Send admin notification
-                try:
-                    signup_data = {
-                        'email': email,
-                        'name': name,
-                        'user_type': user_type,
-                        'ip_address': ip_address,
-                        'user_agent': user_agent,
-                        'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    admin_email_sent = email_sender.send_admin_notification(signup_data)
-                    if admin_email_sent:
-                        print(f"📧 Admin notification sent for {email}")
-                except Exception as e:
-                    print(f"❌ Admin notification error: {str(e)}")
-                
-                return {'success': True, 'message': 'Successfully added to waitlist! Check your email for confirmation.'}
-                
+            signup_id = self.writer.submit(row).result(timeout=SIGNUP_WRITE_TIMEOUT)
+        except WriteTimeout:
+            return {'success': False, 'error': 'Database error: signup write timed out'}
         except sqlite3.Error as e:
             return {'success': False, 'error': f'Database error: {str(e)}'}
+        
+        # Registered either way now (possibly by another worker process)
+        self.email_index.add(email)
+        if not signup_id:
+            return {'success': False, 'error': 'Email already registered'}
+        
+        self.stats.applied(signup_id, user_type, source)
+        # Welcome and admin emails were queued with the signup; wake the senders
+        self.outbox.notify(2)
+        
+        return {'success': True, 'message': 'Successfully added to waitlist! Check your email for confirmation.'}
+    
+    def _insert_signups(self, conn, rows):
+        """Insert a batch of signups in the writer's transaction; the new id per added row."""
+        results = []
+        added = 0
+        counts = {}
+        for row in rows:
+            conn.execute('SAVEPOINT signup')
+            try:
+                cursor = conn.execute(INSERT_SIGNUP, row)
+                # Duplicates (including earlier rows in this batch) insert nothing
+                if cursor.rowcount:
+                    self._queue_emails(conn, row)
+            except sqlite3.Error as e:
+                conn.execute('ROLLBACK TO signup')
+                results.append(e)
+            else:
+                if cursor.rowcount:
+                    added += 1
+                    key = (row[2], row[3])
+                    counts[key] = counts.get(key, 0) + 1
+                    results.append(cursor.lastrowid)
+                else:
+                    results.append(False)
+            conn.execute('RELEASE signup')
+        
+        if added:
+            conn.execute(UPDATE_SIGNUP_STATS, (added,))
+            StatsService.record(conn, counts)
+        return results
+    
+    def _queue_emails(self, conn, row):
+        """Queue the welcome and admin emails in the signup's transaction."""
+        email, name, user_type, source, ip_address, user_agent, language = row
+        EmailOutbox.enqueue(conn, 'welcome', email, {'email': email, 'name': name, 'language': language})
+        EmailOutbox.enqueue(conn, 'admin_notification', os.getenv('ADMIN_EMAIL', email_sender.sender_email), {
+            'email': email,
+            'name': name,
+            'user_type': user_type,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'language': language,
+            'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get waitlist statistics."""
+        """Get waitlist statistics (from the in-memory stats cache)."""
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT total_signups, confirmed_signups FROM waitlist_stats')
-                row = cursor.fetchone()
-                
-                if row:
-                    return {
-                        'total_signups': row[0],
-                        'confirmed_signups': row[1],
-                        'success': True
-                    }
-                else:
-                    return {'total_signups': 0, 'confirmed_signups': 0, 'success': True}
-                    
+            stats = self.stats.summary()
+            stats['success'] = True
+            return stats
         except sqlite3.Error as e:
             return {'success': False, 'error': f'Database error: {str(e)}'}
     
-    def get_all_signups(self) -> Dict[str, Any]:
-        """Get all signups (admin function)."""
+    @staticmethod
+    def _signup_filter_clauses(user_type=None, source=None, since=None, until=None):
+        """WHERE clauses and parameters for the admin signup filters."""
+        where = []
+        params = []
+        if user_type:
+            where.append('user_type = ?')
+            params.append(user_type)
+        if source:
+            where.append('source = ?')
+            params.append(source)
+        if since:
+            where.append('created_at >= ?')
+            params.append(since)
+        if until:
+            where.append('created_at <= ?')
+            params.append(until)
+        return where, params
+    
+    def get_signups_page(self, limit: int = ADMIN_PAGE_SIZE, cursor: Optional[str] = None,
+                         descending: bool = True, user_type: str = None, source: str = None,
+                         since: str = None, until: str = None) -> Dict[str, Any]:
+        """One page of signups ordered by (created_at, id), continuing after cursor."""
+        where, params = self._signup_filter_clauses(user_type, source, since, until)
+        if cursor:
+            # Row-value comparison lets SQLite seek straight into the index
+            where.append('(created_at, id) < (?, ?)' if descending else '(created_at, id) > (?, ?)')
+            params.extend(decode_cursor(cursor))
+        
+        direction = 'DESC' if descending else 'ASC'
+        sql = (
+            'SELECT id, email, name, user_type, source, language, created_at FROM waitlist_signups'
+            + (' WHERE ' + ' AND '.join(where) if where else '')
+            + f' ORDER BY created_at {direction}, id {direction} LIMIT ?'
+        )
+        params.append(limit + 1)
+        
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT email, name, user_type, source, created_at 
-                    FROM waitlist_signups 
-                    ORDER BY created_at DESC
-                ''')
-                
-                signups = []
-                for row in cursor.fetchall():
-                    signups.append({
-                        'email': row[0],
-                        'name': row[1],
-                        'user_type': row[2],
-                        'source': row[3],
-                        'created_at': row[4]
-                    })
-                
-                return {'success': True, 'signups': signups}
-                
+            rows = self.pool.read(lambda conn: conn.execute(sql, params).fetchall())
         except sqlite3.Error as e:
             return {'success': False, 'error': f'Database error: {str(e)}'}
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        signups = [{
+            'email': row[1],
+            'name': row[2],
+            'user_type': row[3],
+            'source': row[4],
+            'language': row[5],
+            'created_at': row[6]
+        } for row in rows]
+        next_cursor = encode_cursor(rows[-1][6], rows[-1][0]) if has_more else None
+        return {'success': True, 'signups': signups, 'next_cursor': next_cursor, 'has_more': has_more}
+    
+    def iter_signups(self, page_size: int = ADMIN_STREAM_PAGE_SIZE, **filters):
+        """Yield every matching signup, one keyset page (and short read) at a time."""
+        cursor = None
+        while True:
+            page = self.get_signups_page(limit=page_size, cursor=cursor, **filters)
+            if not page['success']:
+                raise sqlite3.DatabaseError(page['error'])
+            yield from page['signups']
+            cursor = page['next_cursor']
+            if cursor is None:
+                return
+    
+    def max_signup_id(self) -> int:
+        return self.pool.read(lambda conn: conn.execute('SELECT MAX(id) FROM waitlist_signups').fetchone()[0]) or 0
+    
+    def iter_export_rows(self, columns, since_id: int = None, up_to_id: int = None,
+                         descending: bool = True, **filters):
+        """Yield export rows from one server-side cursor, EXPORT_FETCH_SIZE at a time."""
+        where, params = self._signup_filter_clauses(**filters)
+        if since_id:
+            where.append('id > ?')
+            params.append(since_id)
+        if up_to_id is not None:
+            where.append('id <= ?')
+            params.append(up_to_id)
+        
+        direction = 'DESC' if descending else 'ASC'
+        sql = (
+            'SELECT ' + ', '.join(EXPORT_COLUMNS[c][1] for c in columns) + ' FROM waitlist_signups'
+            + (' WHERE ' + ' AND '.join(where) if where else '')
+            + f' ORDER BY created_at {direction}, id {direction}'
+        )
+        cursor = self.pool.connection().execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
 
 # Initialize database
 db = WaitlistDatabase(DATABASE_FILE)
+db.outbox.start()
 
 def validate_email(email: str) -> bool:
     """Validate email format."""
@@ -183,6 +371,39 @@ def sanitize_input(text: str, max_length: int) -> str:
         return ''
     return text.strip()[:max_length]
 
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """Opaque pagination cursor for the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def parse_date_param(value: str, end_of_day: bool = False) -> Optional[str]:
+    """'2025-01-31' or an ISO timestamp -> the 'YYYY-MM-DD HH:MM:SS' form stored in created_at."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+    if end_of_day and len(value.strip()) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+def signup_filters(args) -> Dict[str, Any]:
+    """Filter and sort options shared by the admin list, stream and export."""
+    return {
+        'user_type': sanitize_input(args.get('user_type', ''), 50) or None,
+        'source': sanitize_input(args.get('source', ''), 50) or None,
+        'since': parse_date_param(args.get('since')),
+        'until': parse_date_param(args.get('until'), end_of_day=True),
+        'descending': args.get('order', 'desc').lower() != 'asc'
+    }
+
 @app.route('/')
 def index():
     """Serve basic information about the waitlist API."""
@@ -192,7 +413,9 @@ def index():
         'endpoints': {
             'POST /api/waitlist/signup': 'Add email to waitlist',
             'GET /api/waitlist/stats': 'Get waitlist statistics',
-            'GET /admin/signups': 'Get all signups (admin only)'
+            'GET /admin/signups': 'Page through signups, or stream them as NDJSON (admin only)',
+            'GET /admin/stats': 'Signup counts by period, user type and source (admin only)',
+            'GET /admin/stats/timeseries': 'Signups per day, week or month (admin only)'
         }
     })
 
@@ -208,8 +431,9 @@ def signup():
         # Extract and validate data
         email = data.get('email', '').strip().lower()
         name = sanitize_input(data.get('name', ''), MAX_NAME_LENGTH)
-        user_type = sanitize_input(data.get('user_type', ''), 50)
+        user_type = sanitize_input(data.get('user_type', ''), 50).lower()
         source = sanitize_input(data.get('source', 'landing_page'), 50)
+        language = normalize_language(data.get('language'))
         
         # Validate required fields
         if not email:
@@ -218,6 +442,9 @@ def signup():
         if not validate_email(email):
             return jsonify({'success': False, 'error': 'Invalid email format'}), 400
         
+        if user_type and user_type not in USER_TYPES:
+            return jsonify({'success': False, 'error': 'Invalid user type'}), 400
+        
         # Get client info
         ip_address = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR'))
         user_agent = request.environ.get('HTTP_USER_AGENT', '')[:500]  # Limit user agent length
@@ -229,7 +456,8 @@ def signup():
             user_type=user_type,
             source=source,
             ip_address=ip_address,
-            user_agent=user_agent
+            user_agent=user_agent,
+            language=language
         )
         
         if result['success']:
@@ -262,7 +490,7 @@ def get_stats():
             base_signups = stats['total_signups']
             demo_signups = base_signups + 10847  # Make it look like we have more signups
             
-            return jsonify({
+            response = jsonify({
                 'success': True,
                 'total_signups': demo_signups,
                 'real_signups': base_signups,
@@ -271,6 +499,9 @@ def get_stats():
                 'hours_saved': demo_signups * 2.3,  # Estimate
                 'average_rating': 4.9
             })
+            # Counts are at most STATS_TTL old anyway; let browsers and proxies reuse them
+            response.headers['Cache-Control'] = f'public, max-age={int(STATS_TTL)}'
+            return response
         else:
             return jsonify(stats), 500
             
@@ -283,14 +514,33 @@ def get_stats():
 
 @app.route('/admin/signups', methods=['GET'])
 def admin_signups():
-    """Get all signups (basic admin endpoint)."""
+    """Page through signups (basic admin endpoint).
+    
+    Query: limit, cursor (from next_cursor), order=asc|desc, user_type, source,
+    since/until (dates), format=ndjson to stream every matching signup.
+    """
     try:
         # Simple authentication check (in production, use proper auth)
         auth_token = request.headers.get('Authorization')
         if auth_token != 'Bearer admin_token_123':
             return jsonify({'error': 'Unauthorized'}), 401
         
-        result = db.get_all_signups()
+        try:
+            filters = signup_filters(request.args)
+            limit = min(max(int(request.args.get('limit', ADMIN_PAGE_SIZE)), 1), ADMIN_MAX_PAGE_SIZE)
+            cursor = request.args.get('cursor')
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                for signup in db.iter_signups(**filters):
+                    yield json.dumps(signup, ensure_ascii=False) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        result = db.get_signups_page(limit=limit, cursor=cursor, **filters)
         
         if result['success']:
             return jsonify(result)
@@ -304,32 +554,124 @@ def admin_signups():
             'error': 'Internal server error'
         }), 500
 
+@app.route('/admin/stats', methods=['GET'])
+def admin_stats():
+    """Signup totals, recent days and breakdowns by user type and source."""
+    auth_token = request.headers.get('Authorization')
+    if auth_token != 'Bearer admin_token_123':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    stats = db.get_stats()
+    if stats['success']:
+        return jsonify(stats)
+    return jsonify(stats), 500
+
+@app.route('/admin/stats/timeseries', methods=['GET'])
+def admin_stats_timeseries():
+    """Signups over time.
+    
+    Query: bucket=day|week|month, since/until (dates), user_type, source.
+    """
+    auth_token = request.headers.get('Authorization')
+    if auth_token != 'Bearer admin_token_123':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    bucket = request.args.get('bucket', 'day')
+    try:
+        since = parse_date_param(request.args.get('since'))
+        until = parse_date_param(request.args.get('until'))
+        series = db.stats.timeseries(
+            bucket,
+            since=since[:10] if since else None,
+            until=until[:10] if until else None,
+            user_type=request.args.get('user_type') or None,
+            source=request.args.get('source') or None
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except sqlite3.Error as e:
+        app.logger.error(f'Stats error: {str(e)}')
+        return jsonify({'success': False, 'error': 'Internal server error'}), 500
+    
+    return jsonify({'success': True, 'bucket': bucket, 'series': series})
+
+class _CSVLine:
+    """File-like target that hands csv.writer's output straight back."""
+    
+    def write(self, value):
+        return value
+
+def csv_chunks(header, rows):
+    """Encode rows as CSV, yielding ~EXPORT_CHUNK_BYTES of UTF-8 at a time."""
+    writer = csv.writer(_CSVLine())
+    # BOM so spreadsheet apps read the file as UTF-8 (names are often Korean)
+    buffer = ['\ufeff', writer.writerow(header)]
+    size = 0
+    for row in rows:
+        line = writer.writerow(row)
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+def gzip_chunks(chunks):
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
 @app.route('/admin/export', methods=['GET'])
 def export_signups():
-    """Export signups as CSV."""
+    """Stream signups as CSV.
+    
+    Query: columns (comma-separated), the /admin/signups filters, since_id for
+    incremental exports, compress=gzip for a .csv.gz download. The response
+    carries X-Export-Last-Id to pass as since_id next time.
+    """
     try:
         # Simple authentication check
         auth_token = request.headers.get('Authorization')
         if auth_token != 'Bearer admin_token_123':
             return jsonify({'error': 'Unauthorized'}), 401
         
-        result = db.get_all_signups()
+        try:
+            filters = signup_filters(request.args)
+            columns = [c.strip() for c in request.args.get('columns', '').split(',') if c.strip()]
+            columns = columns or list(DEFAULT_EXPORT_COLUMNS)
+            unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+            since_id = int(request.args.get('since_id', 0) or 0)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        if not result['success']:
-            return jsonify(result), 500
+        # Pin the export to rows that exist now so since_id chains without gaps
+        last_id = db.max_signup_id()
+        rows = db.iter_export_rows(columns, since_id=since_id, up_to_id=last_id, **filters)
+        body = csv_chunks([EXPORT_COLUMNS[c][0] for c in columns], rows)
         
-        # Create CSV content
-        csv_content = "Email,Name,User Type,Source,Created At\n"
-        for signup in result['signups']:
-            csv_content += f"{signup['email']},{signup['name']},{signup['user_type']},{signup['source']},{signup['created_at']}\n"
-        
-        # Return CSV file
-        from flask import Response
-        return Response(
-            csv_content,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=waitlist_signups.csv'}
-        )
+        filename = 'waitlist_signups.csv'
+        headers = {'X-Export-Last-Id': str(last_id), 'Access-Control-Expose-Headers': 'X-Export-Last-Id'}
+        mimetype = 'text/csv'
+        if request.args.get('compress') == 'gzip':
+            body = gzip_chunks(body)
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            body = gzip_chunks(body)
+            headers['Content-Encoding'] = 'gzip'
+            headers['Vary'] = 'Accept-Encoding'
+        headers['Content-Disposition'] = f'attachment; filename={filename}'
+        
+        # No Content-Length: the server sends this with chunked transfer encoding
+        return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
         
     except Exception as e:
         app.logger.error(f'Export error: {str(e)}')
@@ -344,7 +686,9 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.datetime.now().isoformat(),
-        'database': 'connected' if os.path.exists(DATABASE_FILE) else 'not_found'
+        'database': 'connected' if os.path.exists(DATABASE_FILE) else 'not_found',
+        'email_outbox': db.outbox.counts(),
+        'email_index': len(db.email_index)
     })
 
 @app.route('/api/test-email', methods=['POST'])
@@ -409,13 +753,17 @@ if __name__ == '__main__':
     print("  POST /api/waitlist/signup - Add to waitlist")
     print("  GET  /api/waitlist/stats - Get statistics")
     print("  GET  /admin/signups - View all signups (requires auth)")
+    print("  GET  /admin/stats - Stats breakdown (requires auth)")
+    print("  GET  /admin/stats/timeseries - Signups over time (requires auth)")
     print("  GET  /health - Health check")
     print("\nPress Ctrl+C to stop the server")
+    print("For production use the pre-fork server instead:")
+    print("  gunicorn -c backend/api/gunicorn.conf.py waitlist_wsgi:app")
     
-    # Run the server
+    # Development server; the debugger and reloader are opt-in
     app.run(
         host='0.0.0.0',
         port=5001,
-        debug=True,
+        debug=os.getenv('WAITLIST_DEBUG', 'false').lower() == 'true',
         threaded=True
     )
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Waitlist statistics served from memory.
+Signup counts per (day, user_type, source) are kept in a small rollup table
+that is updated in the same transaction as each signup batch. The service
+holds the rollup in memory, applies this process's own signups to it as they
+commit, and reloads it after a short TTL to pick up other processes' writes,
+so reads are served from memory.
+"""
+
+import datetime
+import threading
+import time
+from collections import defaultdict
+
+UPSERT_DAILY = '''
+    INSERT INTO waitlist_daily_stats (day, user_type, source, signups)
+    VALUES (date('now'), ?, ?, ?)
+    ON CONFLICT (day, user_type, source) DO UPDATE SET signups = signups + excluded.signups
+'''
+BACKFILL_DAILY = '''
+    INSERT INTO waitlist_daily_stats (day, user_type, source, signups)
+    SELECT date(created_at), COALESCE(user_type, ''), COALESCE(source, ''), COUNT(*)
+    FROM waitlist_signups
+    GROUP BY 1, 2, 3
+'''
+SELECT_DAILY = 'SELECT day, user_type, source, signups FROM waitlist_daily_stats'
+SELECT_CONFIRMED = 'SELECT confirmed_signups FROM waitlist_stats'
+SELECT_MAX_ID = 'SELECT MAX(id) FROM waitlist_signups'
+
+BUCKETS = ('day', 'week', 'month')
+
+
+def bucket_start(day, bucket):
+    """First day ('YYYY-MM-DD') of the day/ISO week/month containing day."""
+    if bucket == 'day':
+        return day
+    if bucket == 'month':
+        return day[:8] + '01'
+    date = datetime.date.fromisoformat(day)
+    return (date - datetime.timedelta(days=date.weekday())).isoformat()
+
+
+class StatsService:
+    """Cached, incrementally maintained signup counters."""
+
+    def __init__(self, pool, ttl=5.0):
+        self.pool = pool
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._daily = {}
+        self._confirmed = 0
+        self._through_id = 0
+        self._loaded_at = 0.0
+        self.reloads = 0
+
+    @staticmethod
+    def init_schema(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS waitlist_daily_stats (
+                day TEXT NOT NULL,
+                user_type TEXT NOT NULL DEFAULT '',
+                source TEXT NOT NULL DEFAULT '',
+                signups INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, user_type, source)
+            )
+        ''')
+        # First run on an existing database: build the rollup from the signups
+        if conn.execute('SELECT COUNT(*) FROM waitlist_daily_stats').fetchone()[0] == 0:
+            conn.execute(BACKFILL_DAILY)
+
+    @staticmethod
+    def record(conn, counts):
+        """Add {(user_type, source): n} for today inside the signup transaction."""
+        for (user_type, source), n in counts.items():
+            conn.execute(UPSERT_DAILY, (user_type or '', source or '', n))
+
+    def applied(self, signup_id, user_type, source):
+        """Count a committed signup in memory unless the last reload already saw it."""
+        key = (datetime.datetime.utcnow().strftime('%Y-%m-%d'), user_type or '', source or '')
+        with self._lock:
+            if signup_id > self._through_id:
+                self._daily[key] = self._daily.get(key, 0) + 1
+
+    def invalidate(self):
+        """Force the next read to reload from the rollup table."""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def _snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._loaded_at < self.ttl:
+                return self._daily, self._confirmed
+
+        def load(conn):
+            # One read transaction, so the rollup and the id watermark agree
+            conn.execute('BEGIN')
+            try:
+                return (conn.execute(SELECT_DAILY).fetchall(),
+                        conn.execute(SELECT_CONFIRMED).fetchone(),
+                        conn.execute(SELECT_MAX_ID).fetchone()[0] or 0)
+            finally:
+                conn.execute('COMMIT')
+
+        rows, confirmed, through_id = self.pool.read(load)
+        with self._lock:
+            self._daily = {(day, user_type, source): n for day, user_type, source, n in rows}
+            self._confirmed = confirmed[0] if confirmed else 0
+            self._through_id = through_id
+            self._loaded_at = now
+            self.reloads += 1
+            return self._daily, self._confirmed
+
+    def summary(self):
+        """Totals plus breakdowns by user type, source and recent days."""
+        daily, confirmed = self._snapshot()
+        today = datetime.datetime.utcnow().date()
+        week_start = (today - datetime.timedelta(days=6)).isoformat()
+        month_start = (today - datetime.timedelta(days=29)).isoformat()
+        today = today.isoformat()
+
+        total = 0
+        periods = {'today': 0, 'week': 0, 'month': 0}
+        by_user_type = defaultdict(int)
+        by_source = defaultdict(int)
+        for (day, user_type, source), n in list(daily.items()):
+            total += n
+            by_user_type[user_type or 'unknown'] += n
+            by_source[source or 'unknown'] += n
+            if day >= month_start:
+                periods['month'] += n
+                if day >= week_start:
+                    periods['week'] += n
+                    if day == today:
+                        periods['today'] += n
+
+        return {
+            'total_signups': total,
+            'confirmed_signups': confirmed,
+            'today_signups': periods['today'],
+            'week_signups': periods['week'],
+            'month_signups': periods['month'],
+            'by_user_type': dict(by_user_type),
+            'by_source': dict(by_source)
+        }
+
+    def timeseries(self, bucket='day', since=None, until=None, user_type=None, source=None):
+        """[{'bucket': 'YYYY-MM-DD', 'signups': n}, ...] in ascending order."""
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+        daily, _ = self._snapshot()
+        series = defaultdict(int)
+        for (day, row_type, row_source), n in list(daily.items()):
+            if (since and day < since) or (until and day > until):
+                continue
+            if (user_type and row_type != user_type) or (source and row_source != source):
+                continue
+            series[bucket_start(day, bucket)] += n
+        return [{'bucket': key, 'signups': series[key]} for key in sorted(series)]
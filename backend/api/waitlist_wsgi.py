@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for the waitlist server.
+waitlist-server.py and email-config.py have hyphens in their file names, so
+they are loaded by path here and registered under importable names. Run it
+with the pre-fork config next to this file:
+
+    gunicorn -c backend/api/gunicorn.conf.py waitlist_wsgi:app
+"""
+
+import importlib.util
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.join(os.path.dirname(API_DIR), 'config')
+
+for path in (API_DIR, CONFIG_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def _load(module_name, path):
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_load('email_config', os.path.join(CONFIG_DIR, 'email-config.py'))
+waitlist_server = _load('waitlist_server', os.path.join(API_DIR, 'waitlist-server.py'))
+
+app = waitlist_server.app
+db = waitlist_server.db
+
+
+def start_background():
+    """Start this process's email outbox workers (safe to call after fork)."""
+    db.outbox.start()
+
+
+def shutdown(timeout=10.0):
+    """Flush queued signups and stop the outbox workers before a worker exits."""
+    db.writer.close()
+    db.outbox.stop(timeout)
+    waitlist_server.email_sender.close()
@@ -2,17 +2,22 @@
 """
 Email configuration and sender for SlideCraft AI Waitlist
 Supports Gmail SMTP with app passwords
+Message bodies come from the precompiled templates in email_templates.py
 """
 
 import smtplib
 import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+from collections import deque
 from email.utils import formataddr
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable
 from dotenv import load_dotenv
+from email_templates import (
+    WELCOME, ADMIN_NOTIFICATION, DEFAULT_LANGUAGE, RenderedEmail, encode_header, normalize_language
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -31,144 +36,42 @@ class EmailSender:
         self.sender_email = os.getenv('SENDER_EMAIL', '')
         self.sender_password = os.getenv('SENDER_PASSWORD', '')
         self.sender_name = os.getenv('SENDER_NAME', 'SlideCraft AI Team')
+        self.use_starttls = os.getenv('SMTP_STARTTLS', 'true').lower() != 'false'
+        
+        # Session reuse and provider limits (SMTP_POOL_SIZE=0 opens a session per message)
+        self.pool_size = int(os.getenv('SMTP_POOL_SIZE', '2'))
+        self.max_messages_per_connection = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', '100'))
+        self.max_per_minute = int(os.getenv('SMTP_MAX_PER_MINUTE', '60'))
+        self.noop_after = float(os.getenv('SMTP_NOOP_AFTER', '30'))
+        self.max_idle = float(os.getenv('SMTP_MAX_IDLE', '240'))
+        
+        # Built once and reused by every rendered message
+        self._from_header = encode_header('From', formataddr((self.sender_name, self.sender_email), 'utf-8'))
+        self._msgid_domain = self.sender_email.rpartition('@')[2] or 'slidecraft-ai.com'
+        
+        self._sessions = deque()
+        self._session_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._sent_times = deque()
         
         # Validate configuration
         if not self.sender_email or not self.sender_password:
             logger.warning("Email configuration not complete. Set SENDER_EMAIL and SENDER_PASSWORD environment variables.")
     
-    def send_welcome_email(self, recipient_email: str, recipient_name: str = "") -> bool:
+    def welcome_message(self, recipient_email: str, recipient_name: str = "",
+                        language: str = None) -> RenderedEmail:
+        """Render the welcome email for one recipient (also used for campaigns)."""
+        return WELCOME.render(
+            language, recipient_email,
+            {'name': recipient_name or ('고객' if normalize_language(language) == 'ko' else 'there')},
+            self._from_header, self._msgid_domain
+        )
+    
+    def send_welcome_email(self, recipient_email: str, recipient_name: str = "",
+                           language: str = None) -> bool:
         """Send welcome email to new waitlist signup."""
         try:
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = "🚀 Welcome to SlideCraft AI Waitlist!"
-            msg["From"] = formataddr((self.sender_name, self.sender_email))
-            msg["To"] = recipient_email
-            
-            # Email content
-            recipient_display = recipient_name if recipient_name else "there"
-            
-            # Plain text version
-            text_content = f"""
-Hi {recipient_display}!
-
-🎉 Welcome to the SlideCraft AI waitlist!
-
-Thank you for your interest in SlideCraft AI - the revolutionary AI-powered presentation generator that turns 8 hours of work into 8 minutes.
-
-What's Next?
-✅ You're now on our exclusive waitlist
-✅ You'll be among the first to get early access
-✅ We'll notify you as soon as new features are available
-✅ Get tips and updates on AI-powered presentation creation
-
-In the meantime, feel free to try our current version at:
-🔗 https://slidecraft-ai.com
-
-Questions? Just reply to this email - we'd love to hear from you!
-
-Best regards,
-The SlideCraft AI Team
-
----
-Follow us for updates:
-🌐 Website: https://slidecraft-ai.com
-🎬 Demo: https://youtu.be/pBW2L7jmffw
-📧 Contact: support@slidecraft-ai.com
-            """
-            
-            # HTML version
-            html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Welcome to SlideCraft AI!</title>
-</head>
-<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-    
-    <div style="text-align: center; margin-bottom: 30px;">
-        <h1 style="color: #3b82f6; font-size: 28px; margin-bottom: 10px;">
-            🚀 Welcome to SlideCraft AI!
-        </h1>
-        <p style="color: #6b7280; font-size: 16px; margin: 0;">
-            Turn 8 Hours of Work into 8 Minutes
-        </p>
-    </div>
-    
-    <div style="background: linear-gradient(135deg, #3b82f6 0%, #1e40af 100%); color: white; padding: 30px; border-radius: 12px; margin-bottom: 30px;">
-        <h2 style="margin: 0 0 15px 0; font-size: 24px;">Hi {recipient_display}! 👋</h2>
-        <p style="margin: 0; font-size: 18px; opacity: 0.9;">
-            Thank you for joining our exclusive waitlist! You're now part of the future of AI-powered presentations.
-        </p>
-    </div>
-    
-    <div style="margin-bottom: 30px;">
-        <h3 style="color: #1f2937; margin-bottom: 20px;">🎯 What's Next?</h3>
-        <ul style="list-style: none; padding: 0;">
-            <li style="padding: 10px 0; border-bottom: 1px solid #e5e7eb;">
-                ✅ <strong>You're on the list!</strong> - First in line for early access
-            </li>
-            <li style="padding: 10px 0; border-bottom: 1px solid #e5e7eb;">
-                📧 <strong>Stay updated</strong> - Get notified of new features and releases
-            </li>
-            <li style="padding: 10px 0; border-bottom: 1px solid #e5e7eb;">
-                🎁 <strong>Exclusive access</strong> - Special features just for waitlist members
-            </li>
-            <li style="padding: 10px 0;">
-                💡 <strong>Pro tips</strong> - Learn AI presentation best practices
-            </li>
-        </ul>
-    </div>
-    
-    <div style="text-align: center; margin-bottom: 30px;">
-        <a href="https://slidecraft-ai.com" 
-           style="display: inline-block; background: #3b82f6; color: white; padding: 15px 30px; text-decoration: none; border-radius: 8px; font-weight: 600; font-size: 16px;">
-            🚀 Try SlideCraft AI Now
-        </a>
-    </div>
-    
-    <div style="background: #f8fafc; padding: 25px; border-radius: 8px; margin-bottom: 30px;">
-        <h4 style="color: #374151; margin: 0 0 15px 0;">📺 See SlideCraft AI in Action</h4>
-        <p style="margin: 0 0 15px 0; color: #6b7280;">
-            Watch our demo video to see how easy it is to create professional presentations with AI.
-        </p>
-        <a href="https://youtu.be/pBW2L7jmffw" 
-           style="color: #3b82f6; text-decoration: none; font-weight: 500;">
-            ▶️ Watch Demo Video
-        </a>
-    </div>
-    
-    <div style="text-align: center; padding: 20px 0; border-top: 1px solid #e5e7eb; margin-top: 30px;">
-        <p style="color: #9ca3af; font-size: 14px; margin: 0 0 10px 0;">
-            Questions? Just reply to this email - we'd love to help!
-        </p>
-        <p style="color: #6b7280; font-size: 14px; margin: 0;">
-            Best regards,<br>
-            <strong>The SlideCraft AI Team</strong>
-        </p>
-    </div>
-    
-    <div style="text-align: center; padding: 15px 0; color: #9ca3af; font-size: 12px;">
-        <p style="margin: 0;">
-            You received this email because you signed up for the SlideCraft AI waitlist.
-        </p>
-    </div>
-    
-</body>
-</html>
-            """
-            
-            # Attach both versions
-            text_part = MIMEText(text_content, "plain")
-            html_part = MIMEText(html_content, "html")
-            
-            msg.attach(text_part)
-            msg.attach(html_part)
-            
-            # Send email
-            return self._send_email(msg)
+            return self._send_email(self.welcome_message(recipient_email, recipient_name, language))
             
         except Exception as e:
             logger.error(f"Failed to send welcome email to {recipient_email}: {str(e)}")
@@ -178,61 +81,150 @@ Follow us for updates:
         """Send notification to admin about new signup."""
         try:
             admin_email = os.getenv('ADMIN_EMAIL', self.sender_email)
-            
-            # Create message
-            msg = MIMEMultipart()
-            msg["Subject"] = f"🎯 New SlideCraft AI Waitlist Signup - {signup_data.get('email', 'Unknown')}"
-            msg["From"] = formataddr((self.sender_name, self.sender_email))
-            msg["To"] = admin_email
-            
-            # Email content
-            content = f"""
-New Waitlist Signup Alert!
-
-📧 Email: {signup_data.get('email', 'N/A')}
-👤 Name: {signup_data.get('name', 'Not provided')}
-🏢 User Type: {signup_data.get('user_type', 'Not specified')}
-📅 Signup Time: {signup_data.get('created_at', 'N/A')}
-🌐 IP Address: {signup_data.get('ip_address', 'N/A')}
-📱 User Agent: {signup_data.get('user_agent', 'N/A')[:100]}...
-
----
-Total signups can be viewed at: http://localhost:8000/admin.html
-
-Manage your waitlist from the admin dashboard.
-            """
-            
-            text_part = MIMEText(content, "plain")
-            msg.attach(text_part)
-            
-            # Send email
-            return self._send_email(msg)
+            values = {
+                'email': signup_data.get('email') or 'N/A',
+                'name': signup_data.get('name') or 'Not provided',
+                'user_type': signup_data.get('user_type') or 'Not specified',
+                'language': signup_data.get('language') or 'N/A',
+                'created_at': signup_data.get('created_at') or 'N/A',
+                'ip_address': signup_data.get('ip_address') or 'N/A',
+                'user_agent': (signup_data.get('user_agent') or 'N/A')[:100]
+            }
+            message = ADMIN_NOTIFICATION.render(
+                DEFAULT_LANGUAGE, admin_email, values, self._from_header, self._msgid_domain
+            )
+            return self._send_email(message)
             
         except Exception as e:
             logger.error(f"Failed to send admin notification: {str(e)}")
             return False
     
-    def _send_email(self, message: MIMEMultipart) -> bool:
+    def _connect(self) -> smtplib.SMTP:
+        """Open an authenticated SMTP session."""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        try:
+            if self.use_starttls:
+                server.starttls(context=ssl.create_default_context())
+            # EHLO again: extensions (AUTH, 8BITMIME) are only advertised after STARTTLS
+            server.ehlo()
+            # Configured credentials are always used; never fall back to sending unauthenticated
+            if self.sender_email and self.sender_password:
+                if not server.has_extn('auth'):
+                    raise smtplib.SMTPNotSupportedError(
+                        f"{self.smtp_server}:{self.smtp_port} does not offer SMTP AUTH; "
+                        f"cannot log in as {self.sender_email} (check SMTP_SERVER, SMTP_PORT and SMTP_STARTTLS)"
+                    )
+                server.login(self.sender_email, self.sender_password)
+        except Exception:
+            server.close()
+            raise
+        server.sent_count = 0
+        server.last_used = time.monotonic()
+        return server
+    
+    def _acquire_session(self) -> smtplib.SMTP:
+        """Reuse an idle session (NOOP-checked if it sat idle) or open a new one."""
+        while True:
+            with self._session_lock:
+                server = self._sessions.pop() if self._sessions else None
+            if server is None:
+                return self._connect()
+            
+            idle = time.monotonic() - server.last_used
+            if idle > self.max_idle:
+                self._close_session(server)
+                continue
+            if idle > self.noop_after:
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected('NOOP failed')
+                except (smtplib.SMTPException, OSError):
+                    self._close_session(server)
+                    continue
+            return server
+    
+    def _release_session(self, server: smtplib.SMTP, healthy: bool = True):
+        """Return a session to the pool, or close it if broken or used up."""
+        server.last_used = time.monotonic()
+        if healthy and server.sent_count < self.max_messages_per_connection:
+            with self._session_lock:
+                if len(self._sessions) < self.pool_size:
+                    self._sessions.append(server)
+                    return
+        self._close_session(server)
+    
+    @staticmethod
+    def _close_session(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
+    def _throttle(self):
+        """Block until sending one more message stays within SMTP_MAX_PER_MINUTE."""
+        if self.max_per_minute <= 0:
+            return
+        while True:
+            with self._rate_lock:
+                now = time.monotonic()
+                while self._sent_times and now - self._sent_times[0] >= 60:
+                    self._sent_times.popleft()
+                if len(self._sent_times) < self.max_per_minute:
+                    self._sent_times.append(now)
+                    return
+                wait = 60 - (now - self._sent_times[0])
+            time.sleep(wait)
+    
+    def _deliver(self, server: smtplib.SMTP, message):
+        data = message.as_bytes()
+        options = []
+        if getattr(message, 'eight_bit', False):
+            if server.has_extn('8bitmime'):
+                options.append('BODY=8BITMIME')
+            else:
+                data = message.as_bytes_7bit()
+        self._throttle()
+        server.sendmail(self.sender_email, message["To"], data, mail_options=options)
+        server.sent_count += 1
+    
+    def _send_pooled(self, message):
+        """Send over a pooled session, reconnecting once if the server dropped it."""
+        for attempt in range(2):
+            server = self._acquire_session()
+            try:
+                self._deliver(server, message)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError):
+                self._close_session(server)
+                if attempt == 1:
+                    raise
+                continue
+            except smtplib.SMTPResponseException as e:
+                # 421: the server is closing this connection
+                self._release_session(server, healthy=e.smtp_code != 421)
+                if e.smtp_code != 421 or attempt == 1:
+                    raise
+                continue
+            except Exception:
+                self._release_session(server)
+                raise
+            self._release_session(server)
+            return
+    
+    def _send_email(self, message) -> bool:
         """Send email using SMTP."""
         try:
             if not self.sender_email or not self.sender_password:
                 logger.warning("Email credentials not configured. Email not sent.")
                 return False
             
-            # Create SMTP connection
-            context = ssl.create_default_context()
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.sender_email, self.sender_password)
-                
-                # Send email
-                text = message.as_string()
-                server.sendmail(
-                    self.sender_email, 
-                    message["To"], 
-                    text
-                )
+            if self.pool_size > 0:
+                self._send_pooled(message)
+            else:
+                server = self._connect()
+                try:
+                    self._deliver(server, message)
+                finally:
+                    self._close_session(server)
                 
             logger.info(f"Email sent successfully to {message['To']}")
             return True
@@ -241,6 +233,77 @@ Manage your waitlist from the admin dashboard.
             logger.error(f"SMTP error: {str(e)}")
             return False
     
+    def send_bulk(self, messages: Iterable, connections: int = 1) -> Dict[str, Any]:
+        """Send many messages over long-lived sessions, within provider limits.
+        
+        Each of `connections` threads keeps one authenticated session open,
+        rotates it after SMTP_MAX_MESSAGES_PER_CONNECTION messages and shares
+        the SMTP_MAX_PER_MINUTE budget. A refused recipient only fails that
+        message; a dropped connection is reopened and the message retried once.
+        """
+        if not self.sender_email or not self.sender_password:
+            logger.warning("Email credentials not configured. Bulk send skipped.")
+            return {'success': False, 'sent': 0, 'failed': [], 'elapsed': 0.0}
+        
+        source = iter(messages)
+        source_lock = threading.Lock()
+        results = {'sent': 0, 'failed': []}
+        results_lock = threading.Lock()
+        started = time.monotonic()
+        
+        def next_message():
+            with source_lock:
+                return next(source, None)
+        
+        def worker():
+            server = None
+            message = next_message()
+            retried = False
+            while message is not None:
+                try:
+                    if server is None or server.sent_count >= self.max_messages_per_connection:
+                        if server is not None:
+                            self._close_session(server)
+                        server = self._connect()
+                    self._deliver(server, message)
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError) as e:
+                    if server is not None:
+                        server.close()
+                    server = None
+                    if not retried:
+                        retried = True
+                        continue
+                    with results_lock:
+                        results['failed'].append({'recipient': message["To"], 'error': str(e)})
+                except smtplib.SMTPException as e:
+                    with results_lock:
+                        results['failed'].append({'recipient': message["To"], 'error': str(e)})
+                else:
+                    with results_lock:
+                        results['sent'] += 1
+                message = next_message()
+                retried = False
+            if server is not None:
+                self._close_session(server)
+        
+        threads = [threading.Thread(target=worker) for _ in range(max(1, connections))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        elapsed = time.monotonic() - started
+        logger.info(f"Bulk send finished: {results['sent']} sent, {len(results['failed'])} failed in {elapsed:.1f}s")
+        return {'success': not results['failed'], 'sent': results['sent'],
+                'failed': results['failed'], 'elapsed': elapsed}
+    
+    def close(self):
+        """Close all pooled SMTP sessions."""
+        with self._session_lock:
+            sessions, self._sessions = list(self._sessions), deque()
+        for server in sessions:
+            self._close_session(server)
+    
     def test_connection(self) -> Dict[str, Any]:
         """Test email configuration and connection."""
         try:
@@ -250,11 +313,8 @@ Manage your waitlist from the admin dashboard.
                     "message": "Email credentials not configured"
                 }
             
-            context = ssl.create_default_context()
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls(context=context)
-                server.login(self.sender_email, self.sender_password)
+            server = self._connect()
+            self._close_session(server)
                 
             return {
                 "success": True,
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Precompiled email templates for SlideCraft AI Waitlist
+Templates in templates/<name>.<language>.<txt|html> are parsed once into
+pre-encoded UTF-8 chunks and {{field}} slots. Rendering a message for one
+recipient only encodes the substituted fields and a few headers; MIME part
+headers, static subjects and the From header are built once and reused.
+"""
+
+import base64
+import html
+import os
+import re
+import secrets
+from collections import OrderedDict
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from threading import Lock
+from typing import Dict, Any, Optional
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Same languages as frontend/assets/js/i18n.js
+SUPPORTED_LANGUAGES = ('ko', 'en')
+DEFAULT_LANGUAGE = 'en'
+
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+CRLF = b'\r\n'
+
+
+def normalize_language(value: Optional[str]) -> str:
+    """'ko-KR' -> 'ko'; anything unsupported falls back to English."""
+    language = (value or '').strip().lower()[:2]
+    return language if language in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+
+
+def encode_header(name: str, value: str) -> bytes:
+    """One folded 'Name: value' header line, RFC 2047-encoded if needed."""
+    return f'{name}: {Header(value, "utf-8", header_name=name).encode()}'.encode('ascii') + CRLF
+
+
+class CompiledBody:
+    """Template body split into encoded literal chunks and field slots."""
+
+    def __init__(self, source: str, subtype: str, cache_size: int = 4096):
+        self.subtype = subtype
+        source = source.replace('\r\n', '\n').replace('\n', '\r\n')
+        parts = PLACEHOLDER.split(source)
+        self.literals = [part.encode('utf-8') for part in parts[0::2]]
+        self.fields = tuple(parts[1::2])
+        self.part_header = (
+            f'Content-Type: text/{subtype}; charset="utf-8"\r\n'
+            'Content-Transfer-Encoding: 8bit\r\n\r\n'
+        ).encode('ascii')
+        self.part_header_7bit = self.part_header.replace(b'8bit', b'base64')
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = Lock()
+
+    def _encode_value(self, value: Any) -> bytes:
+        text = '' if value is None else str(value)
+        # Field values must never add lines (or MIME boundaries) to the body
+        text = text.replace('\r', ' ').replace('\n', ' ')
+        if self.subtype == 'html':
+            text = html.escape(text)
+        return text.encode('utf-8')
+
+    def render(self, values: Dict[str, Any]) -> bytes:
+        """Body bytes for these field values (cached per distinct values)."""
+        key = tuple(values.get(field) for field in self.fields)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+
+        chunks = [self.literals[0]]
+        for value, literal in zip(key, self.literals[1:]):
+            chunks.append(self._encode_value(value))
+            chunks.append(literal)
+        body = b''.join(chunks)
+
+        with self._lock:
+            self._cache[key] = body
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+
+class RenderedEmail:
+    """Ready-to-send message bytes for one recipient."""
+
+    eight_bit = True
+
+    def __init__(self, recipient: str, headers: bytes, boundary: Optional[bytes], parts):
+        self.recipient = recipient
+        self.headers = headers
+        self.boundary = boundary
+        self.parts = parts
+
+    def __getitem__(self, name: str) -> str:
+        if name.lower() == 'to':
+            return self.recipient
+        raise KeyError(name)
+
+    def _assemble(self, seven_bit: bool) -> bytes:
+        chunks = [self.headers]
+        for part, body in self.parts:
+            if self.boundary is not None:
+                chunks.append(b'--' + self.boundary + CRLF)
+            if seven_bit:
+                chunks.append(part.part_header_7bit)
+                chunks.append(base64.encodebytes(body).replace(b'\n', CRLF))
+            else:
+                chunks.append(part.part_header)
+                chunks.append(body + CRLF)
+        if self.boundary is not None:
+            chunks.append(b'--' + self.boundary + b'--' + CRLF)
+        return b''.join(chunks)
+
+    def as_bytes(self) -> bytes:
+        """Message with 8bit bodies, for servers that advertise 8BITMIME."""
+        return self._assemble(False)
+
+    def as_bytes_7bit(self) -> bytes:
+        """Message with base64 bodies, for servers without 8BITMIME."""
+        return self._assemble(True)
+
+
+class EmailTemplate:
+    """Subject plus text (and optional HTML) bodies, per language."""
+
+    def __init__(self, name: str, subjects: Dict[str, str], template_dir: str = TEMPLATE_DIR):
+        self.name = name
+        self.variants = {}
+        for language in SUPPORTED_LANGUAGES:
+            parts = []
+            for subtype, extension in (('plain', 'txt'), ('html', 'html')):
+                path = os.path.join(template_dir, f'{name}.{language}.{extension}')
+                if os.path.exists(path):
+                    with open(path, encoding='utf-8') as f:
+                        parts.append(CompiledBody(f.read(), subtype))
+            if parts:
+                self.variants[language] = (subjects.get(language) or subjects[DEFAULT_LANGUAGE], parts)
+
+        # Multipart structure is fixed per template, so the header block is too
+        self.boundary = f'=_slidecraft_{secrets.token_hex(12)}'.encode('ascii')
+        self._subject_headers = {
+            language: encode_header('Subject', subject)
+            for language, (subject, _) in self.variants.items()
+            if not PLACEHOLDER.search(subject)
+        }
+        self._multipart_header = (
+            b'MIME-Version: 1.0\r\n'
+            b'Content-Type: multipart/alternative; boundary="' + self.boundary + b'"\r\n\r\n'
+        )
+        self._single_header = b'MIME-Version: 1.0\r\n'
+
+    def render(self, language: Optional[str], recipient: str, values: Dict[str, Any],
+               from_header: bytes, msgid_domain: Optional[str] = None) -> RenderedEmail:
+        """Build the message for one recipient."""
+        language = normalize_language(language)
+        if language not in self.variants:
+            language = DEFAULT_LANGUAGE
+        subject, parts = self.variants[language]
+
+        subject_header = self._subject_headers.get(language)
+        if subject_header is None:
+            subject = PLACEHOLDER.sub(lambda m: str(values.get(m.group(1)) or ''), subject)
+            subject_header = encode_header('Subject', subject)
+
+        headers = [
+            from_header,
+            b'To: ' + recipient.encode('ascii') + CRLF,
+            subject_header,
+            b'Date: ' + formatdate(localtime=True).encode('ascii') + CRLF,
+            b'Message-ID: ' + make_msgid(domain=msgid_domain).encode('ascii') + CRLF
+        ]
+        rendered = [(part, part.render(values)) for part in parts]
+        if len(rendered) > 1:
+            headers.append(self._multipart_header)
+            return RenderedEmail(recipient, b''.join(headers), self.boundary, rendered)
+
+        # Single part: its Content-Type headers end the message header block
+        headers.append(self._single_header)
+        return RenderedEmail(recipient, b''.join(headers), None, rendered)
+
+
+WELCOME = EmailTemplate('welcome', {
+    'en': '🚀 Welcome to SlideCraft AI Waitlist!',
+    'ko': '🚀 SlideCraft AI 웨이트리스트에 오신 것을 환영합니다!'
+})
+
+ADMIN_NOTIFICATION = EmailTemplate('admin_notification', {
+    'en': '🎯 New SlideCraft AI Waitlist Signup - {{email}}'
+})
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Batch deck generation client.
+Sends a list of topics to the proxy's POST /api/batch in one call, prints
+each deck's result as the server finishes it, and writes every generated deck
+to the output directory as <index>-<topic>.json.
+
+Input file formats (- reads JSON or JSON lines from stdin):
+    .json   [{"topic": "...", "slideCount": 8, "template": "pitch-deck"}, ...]
+    .jsonl  one such object per line
+    .csv    header row with topic, slideCount, template and optional id columns
+
+    python backend/scripts/batch-generate.py customers.csv --out decks/
+    python backend/scripts/batch-generate.py topics.jsonl --slides 10 --template corporate-modern
+
+Exits with status 1 if any deck failed, so it can be re-run on just those.
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+
+def read_items(path):
+    """Batch items from a JSON, JSON lines or CSV file"""
+    if path == '-':
+        text = sys.stdin.read()
+        extension = '.json' if text.lstrip().startswith('[') else '.jsonl'
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            text = f.read()
+        extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        rows = csv.DictReader(text.splitlines())
+        return [{k: v for k, v in row.items() if k and v not in (None, '')} for row in rows]
+    if extension == '.jsonl':
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    items = json.loads(text)
+    return items['items'] if isinstance(items, dict) else items
+
+
+def slug(text, length=40):
+    return re.sub(r'\W+', '-', text).strip('-')[:length].lower() or 'deck'
+
+
+def write_deck(out_dir, result):
+    name = f"{result['index'] + 1:03d}-{slug(result.get('topic', ''))}.json"
+    deck = {k: result[k] for k in ('id', 'topic', 'slides', 'usage') if k in result}
+    with open(os.path.join(out_dir, name), 'w', encoding='utf-8') as f:
+        json.dump(deck, f, ensure_ascii=False, indent=2)
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate many decks through /api/batch')
+    parser.add_argument('input', help='JSON, JSON lines or CSV file of items (- for stdin)')
+    parser.add_argument('--url', default='http://localhost:8000', help='proxy server URL')
+    parser.add_argument('--out', default='decks', help='directory for the generated decks')
+    parser.add_argument('--api-key', default=os.getenv('CLAUDE_API_KEY'),
+                        help='Claude API key (default: CLAUDE_API_KEY, else the server key)')
+    parser.add_argument('--slides', type=int, help='slideCount for items that do not set one')
+    parser.add_argument('--template', help='template for items that do not set one')
+    parser.add_argument('--model', help='Claude model for every deck')
+    parser.add_argument('--max-tokens', type=int, help='max_tokens for every deck')
+    parser.add_argument('--prompt-version', type=int, help='deck prompt template version (default: 1; 2 caches its '
+                             'prompt prefix upstream, which pays off for large batches)')
+    parser.add_argument('--no-cache', action='store_true', help='bypass the response cache')
+    parser.add_argument('--timeout', type=float, default=1800, help='seconds to wait for the whole batch')
+    args = parser.parse_args()
+
+    items = read_items(args.input)
+    for item in items:
+        if isinstance(item, dict):
+            if args.slides and 'slideCount' not in item:
+                item['slideCount'] = args.slides
+            if args.template and 'template' not in item:
+                item['template'] = args.template
+
+    payload = {'items': items, 'no_cache': args.no_cache}
+    for field, value in (('api_key', args.api_key), ('model', args.model), ('max_tokens', args.max_tokens),
+                         ('prompt_version', args.prompt_version)):
+        if value:
+            payload[field] = value
+
+    os.makedirs(args.out, exist_ok=True)
+    url = urlsplit(args.url)
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    conn = connection_class(url.hostname, url.port, timeout=args.timeout)
+    started = time.monotonic()
+    conn.request('POST', url.path.rstrip('/') + '/api/batch', body=json.dumps(payload).encode('utf-8'),
+                 headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    if response.status != 200:
+        print(f'Batch rejected: {response.status} {response.read().decode("utf-8", "replace")}', file=sys.stderr)
+        sys.exit(1)
+
+    print(f'{len(items)} decks submitted to {args.url}')
+    failed = 0
+    summary = None
+    while True:
+        line = response.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        if 'summary' in result:
+            summary = result['summary']
+            continue
+        label = f"#{result['index'] + 1} {result.get('topic', '')}"
+        if result['status'] == 'ok':
+            name = write_deck(args.out, result)
+            source = 'cache' if result.get('cached') else f"{result['elapsed']:.1f}s"
+            print(f"  ok    {label}: {len(result['slides'])} slides ({source}) -> {name}")
+        else:
+            failed += 1
+            print(f"  FAIL  {label}: [{result.get('http_status')}] {result.get('error')}")
+    conn.close()
+
+    elapsed = time.monotonic() - started
+    if summary is None:
+        print(f'Batch ended early after {elapsed:.1f}s (connection closed)', file=sys.stderr)
+        sys.exit(1)
+    print(f"Done in {elapsed:.1f}s with prompt {summary['prompt']}: {summary['ok']} ok, {summary['failed']} failed; "
+          f"decks in {args.out}/")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
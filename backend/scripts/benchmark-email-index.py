@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Duplicate-email index benchmark.
+Builds each candidate index over the same N normalised emails and reports its
+memory footprint (tracemalloc), build time, and lookup rate for registered and
+new addresses, next to the SQLite UNIQUE-index lookup it replaces.
+
+    set[str]        Python set of the email strings
+    set[int]        Python set of 64-bit fingerprints
+    EmailIndex      fingerprints in a flat array('Q') hash table (used by the server)
+    Bloom 1%        Bloom filter sized for 1% false positives; a hit is only
+                    "maybe", so it cannot answer duplicates without SQLite
+
+Usage: python backend/scripts/benchmark-email-index.py [--emails 1000000] [--lookups 200000] [--no-sqlite]
+"""
+
+import argparse
+import gc
+import hashlib
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+from email_index import EmailIndex, fingerprint
+
+
+def iter_emails(count, prefix='user'):
+    for n in range(count):
+        yield f'{prefix}.{n:07d}.{n * 7919 % 100003}@example{n % 97}.com'
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, email):
+        digest = hashlib.blake2b(email.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, email):
+        for position in self._positions(email):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, email):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(email))
+
+
+def build_str_set(count):
+    return set(iter_emails(count))
+
+
+def build_int_set(count):
+    return {fingerprint(email) for email in iter_emails(count)}
+
+
+def build_email_index(count):
+    index = EmailIndex(capacity=count)
+    index.update(iter_emails(count))
+    return index
+
+
+def build_bloom(count):
+    bloom = BloomFilter(count)
+    for email in iter_emails(count):
+        bloom.add(email)
+    return bloom
+
+
+CANDIDATES = [
+    ('set[str]', build_str_set, lambda s, email: email in s),
+    ('set[int]', build_int_set, lambda s, email: fingerprint(email) in s),
+    ('EmailIndex', build_email_index, lambda s, email: email in s),
+    ('Bloom 1%', build_bloom, lambda s, email: email in s)
+]
+
+
+def measure_memory(build, count):
+    gc.collect()
+    tracemalloc.start()
+    structure = build(count)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del structure
+    return used
+
+
+def measure_lookups(contains, structure, emails):
+    started = time.perf_counter()
+    hits = sum(1 for email in emails if contains(structure, email))
+    return len(emails) / (time.perf_counter() - started), hits
+
+
+def sqlite_lookups(count, hits, misses):
+    """The SELECT on the UNIQUE email index that each signup used to run."""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE waitlist_signups (id INTEGER PRIMARY KEY, email TEXT UNIQUE NOT NULL)')
+        conn.executemany('INSERT INTO waitlist_signups (email) VALUES (?)', ((e,) for e in iter_emails(count)))
+        conn.commit()
+        size = os.path.getsize(os.path.join(tmp, 'bench.db'))
+        rates = []
+        for emails in (hits, misses):
+            started = time.perf_counter()
+            for email in emails:
+                conn.execute('SELECT id FROM waitlist_signups WHERE email = ?', (email,)).fetchone()
+            rates.append(len(emails) / (time.perf_counter() - started))
+        conn.close()
+        return size, rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark duplicate-email indexes')
+    parser.add_argument('--emails', type=int, default=1_000_000, help='registered emails')
+    parser.add_argument('--lookups', type=int, default=200_000, help='lookups per hit/miss run')
+    parser.add_argument('--no-sqlite', action='store_true', help='skip the SQLite comparison')
+    args = parser.parse_args()
+
+    step = max(1, args.emails // args.lookups)
+    hits = list(iter_emails(args.emails))[::step][:args.lookups]
+    misses = list(iter_emails(args.lookups, prefix='new'))
+
+    print(f'{args.emails:,} emails, {args.lookups:,} lookups per run')
+    print(f"{'index':<12} {'memory MB':>10} {'bytes/email':>12} {'build s':>8} "
+          f"{'hit lookups/s':>14} {'new lookups/s':>14} {'false hits':>11}")
+    for name, build, contains in CANDIDATES:
+        memory = measure_memory(build, args.emails)
+        started = time.perf_counter()
+        structure = build(args.emails)
+        build_time = time.perf_counter() - started
+        hit_rate, _ = measure_lookups(contains, structure, hits)
+        miss_rate, false_hits = measure_lookups(contains, structure, misses)
+        print(f'{name:<12} {memory / 2**20:>10.1f} {memory / args.emails:>12.1f} {build_time:>8.2f} '
+              f'{hit_rate:>14,.0f} {miss_rate:>14,.0f} {false_hits / len(misses):>10.2%}')
+        del structure
+
+    if not args.no_sqlite:
+        size, (hit_rate, miss_rate) = sqlite_lookups(args.emails, hits, misses)
+        print(f"{'SQLite':<12} {size / 2**20:>10.1f} {size / args.emails:>12.1f} {'':>8} "
+              f'{hit_rate:>14,.0f} {miss_rate:>14,.0f}   (file size, in-process lookups)')
+
+
+if __name__ == '__main__':
+    main()
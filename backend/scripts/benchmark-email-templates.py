@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Email rendering micro-benchmark.
+Compares building every welcome email from scratch (string formatting, a new
+MIMEMultipart and as_string(), as EmailSender used to) with the precompiled
+templates in backend/config/email_templates.py.
+
+Usage: python backend/scripts/benchmark-email-templates.py [--recipients 100000] [--distinct-names 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config'))
+from email_templates import WELCOME, TEMPLATE_DIR, encode_header
+
+SENDER = ('SlideCraft AI Team', 'team@slidecraft-ai.com')
+
+
+def load_sources():
+    sources = {}
+    for extension in ('txt', 'html'):
+        with open(os.path.join(TEMPLATE_DIR, f'welcome.en.{extension}'), encoding='utf-8') as f:
+            sources[extension] = f.read().replace('{{name}}', '{name}')
+    return sources
+
+
+def legacy(recipients, sources):
+    """Old path: format both bodies and serialise a fresh MIMEMultipart per recipient."""
+    total = 0
+    for email, name in recipients:
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = '🚀 Welcome to SlideCraft AI Waitlist!'
+        msg['From'] = formataddr(SENDER)
+        msg['To'] = email
+        msg.attach(MIMEText(sources['txt'].format(name=name), 'plain'))
+        msg.attach(MIMEText(sources['html'].format(name=name), 'html'))
+        total += len(msg.as_string())
+    return total
+
+
+def compiled(recipients, sources):
+    from_header = encode_header('From', formataddr(SENDER, 'utf-8'))
+    total = 0
+    for email, name in recipients:
+        total += len(WELCOME.render('en', email, {'name': name}, from_header, 'slidecraft-ai.com').as_bytes())
+    return total
+
+
+def measure(fn, recipients, sources):
+    tracemalloc.start()
+    started = time.perf_counter()
+    total = fn(recipients, sources)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark welcome email rendering')
+    parser.add_argument('--recipients', type=int, default=100000)
+    parser.add_argument('--distinct-names', type=int, default=1000,
+                        help='distinct first names across recipients (names repeat in real lists)')
+    args = parser.parse_args()
+
+    sources = load_sources()
+    recipients = [(f'user{i}@example.com', f'Name{i % args.distinct_names}') for i in range(args.recipients)]
+
+    print(f"{'renderer':<10} {'msgs/sec':>10} {'us/msg':>8} {'peak KB':>9} {'MB out':>8}")
+    for name, fn in (('legacy', legacy), ('compiled', compiled)):
+        elapsed, peak, total = measure(fn, recipients, sources)
+        print(f'{name:<10} {args.recipients / elapsed:>10.0f} {elapsed / args.recipients * 1e6:>8.1f} '
+              f'{peak / 1024:>9.0f} {total / 1e6:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Waitlist database write benchmark.
+Measures signups/sec with 1-64 concurrent writer threads, comparing the old
+connect-per-call rollback-journal access against the pooled WAL connections
+used by WaitlistDatabase, with and without group commit.
+
+Usage: python backend/scripts/benchmark-waitlist-db.py [--signups 4000] [--writers 1,2,4,8,16,32,64]
+                                                       [--synchronous FULL|NORMAL]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+from sqlite_pool import SQLitePool
+from group_commit import GroupCommitWriter
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS waitlist_signups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        name TEXT,
+        user_type TEXT,
+        source TEXT DEFAULT 'landing_page',
+        ip_address TEXT,
+        user_agent TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_confirmed BOOLEAN DEFAULT FALSE,
+        confirmation_token TEXT,
+        language TEXT DEFAULT 'en'
+    )''',
+    '''CREATE TABLE IF NOT EXISTS waitlist_stats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        total_signups INTEGER DEFAULT 0,
+        confirmed_signups INTEGER DEFAULT 0,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''',
+    'INSERT INTO waitlist_stats (total_signups, confirmed_signups) VALUES (0, 0)'
+]
+
+# Same statements as WaitlistDatabase.add_signup / _insert_signups
+INSERT_SIGNUP = '''
+    INSERT INTO waitlist_signups (email, name, user_type, source, ip_address, user_agent, language)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (email) DO NOTHING
+'''
+UPDATE_SIGNUP_STATS = 'UPDATE waitlist_stats SET total_signups = total_signups + ?, last_updated = CURRENT_TIMESTAMP'
+
+
+def signup_row(n):
+    return (f'user{n}@example.com', f'User {n}', 'business', 'benchmark', '127.0.0.1', 'bench/1.0', 'en')
+
+
+def insert(conn, row):
+    if conn.execute(INSERT_SIGNUP, row).rowcount:
+        conn.execute(UPDATE_SIGNUP_STATS, (1,))
+
+
+def insert_batch(conn, rows):
+    added = 0
+    results = []
+    for row in rows:
+        if conn.execute(INSERT_SIGNUP, row).rowcount:
+            added += 1
+            results.append(True)
+        else:
+            results.append(False)
+    if added:
+        conn.execute(UPDATE_SIGNUP_STATS, (added,))
+    return results
+
+
+def make_db(path, wal):
+    with sqlite3.connect(path) as conn:
+        if wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+
+class ConnectPerCall:
+    """The previous access pattern: a fresh connection and transaction per signup."""
+
+    name = 'connect-per-call'
+    wal = False
+
+    def __init__(self, path, synchronous):
+        self.path = path
+        self.synchronous = synchronous
+
+    def add(self, row):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            insert(conn, row)
+            conn.commit()
+
+    def close(self):
+        pass
+
+    def detail(self):
+        return ''
+
+
+class Pooled:
+    name = 'pooled WAL'
+    wal = True
+
+    def __init__(self, path, synchronous):
+        self.pool = SQLitePool(path, synchronous=synchronous)
+
+    def add(self, row):
+        self.pool.write(lambda conn: insert(conn, row))
+
+    def close(self):
+        self.pool.close_all()
+
+    def detail(self):
+        return f'{self.pool.retries} busy retries'
+
+
+class GroupCommit(Pooled):
+    name = 'group commit'
+
+    def __init__(self, path, synchronous):
+        super().__init__(path, synchronous)
+        self.writer = GroupCommitWriter(self.pool, insert_batch, max_batch=200, max_delay=0)
+
+    def add(self, row):
+        self.writer.submit(row).result()
+
+    def close(self):
+        self.writer.close()
+        super().close()
+
+    def detail(self):
+        return f'{self.writer.items / max(1, self.writer.batches):.1f} rows/commit'
+
+
+def run(strategy_class, writers, signups, synchronous):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        make_db(path, strategy_class.wal)
+        strategy = strategy_class(path, synchronous)
+        errors = []
+        per_writer = signups // writers
+
+        def worker(offset):
+            for n in range(offset, offset + per_writer):
+                try:
+                    strategy.add(signup_row(n))
+                except sqlite3.Error as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i * per_writer,)) for i in range(writers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        strategy.close()
+        done = per_writer * writers - len(errors)
+        return done / elapsed, len(errors), strategy.detail()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark waitlist signup writes')
+    parser.add_argument('--signups', type=int, default=4000, help='signups per run')
+    parser.add_argument('--writers', default='1,2,4,8,16,32,64', help='comma-separated writer counts')
+    parser.add_argument('--synchronous', default='FULL', help='PRAGMA synchronous for every strategy (FULL is the shipped default)')
+    args = parser.parse_args()
+
+    print(f"{'writers':>8}  {'strategy':<18} {'signups/sec':>12}  {'errors':>6}")
+    for writers in (int(w) for w in args.writers.split(',')):
+        for strategy_class in (ConnectPerCall, Pooled, GroupCommit):
+            rate, errors, detail = run(strategy_class, writers, args.signups, args.synchronous)
+            print(f'{writers:>8}  {strategy_class.name:<18} {rate:>12.0f}  {errors:>6}  {detail}')
+
+
+if __name__ == '__main__':
+    main()
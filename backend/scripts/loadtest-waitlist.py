@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Waitlist server load test.
+Keep-alive client threads send a mix of GET /api/waitlist/stats (what the
+landing page polls) and POST /api/waitlist/signup with unique emails, then
+report throughput and latency percentiles per endpoint.
+
+Against a server that is already running:
+    python backend/scripts/loadtest-waitlist.py --url http://localhost:5001
+
+Start each serving mode on a fresh database in turn and compare them
+(gunicorn must be installed: uv sync --group waitlist):
+    python backend/scripts/loadtest-waitlist.py --serve dev,gunicorn --concurrency 64 --duration 30
+
+Email delivery is disabled for servers started with --serve (EMAIL_WORKERS=0).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api')
+
+# How each --serve mode starts the app; {port} is filled in per run
+SERVE_COMMANDS = {
+    # What `python waitlist-server.py` runs: the threaded Werkzeug dev server
+    'dev': [sys.executable, '-c',
+            "import waitlist_wsgi; waitlist_wsgi.app.run(host='127.0.0.1', port={port}, threaded=True)"],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', os.path.join(API_DIR, 'gunicorn.conf.py'),
+                 'waitlist_wsgi:app']
+}
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoadTest:
+    def __init__(self, url, concurrency, duration, signup_ratio, timeout=10.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.concurrency = concurrency
+        self.duration = duration
+        self.signup_ratio = signup_ratio
+        self.timeout = timeout
+        self.run_id = uuid.uuid4().hex[:8]
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def _request(self, conn, worker, n):
+        if random.random() < self.signup_ratio:
+            kind = 'signup'
+            body = json.dumps({
+                'email': f'load-{self.run_id}-{worker}-{n}@example.com',
+                'name': f'Load {n}',
+                'user_type': random.choice(['business', 'student', 'developer']),
+                'source': 'loadtest'
+            })
+            conn.request('POST', '/api/waitlist/signup', body, {'Content-Type': 'application/json'})
+        else:
+            kind = 'stats'
+            conn.request('GET', '/api/waitlist/stats')
+        response = conn.getresponse()
+        response.read()
+        return kind, response.status, response.will_close
+
+    def _worker(self, worker, deadline):
+        latencies = defaultdict(list)
+        statuses = defaultdict(int)
+        errors = defaultdict(int)
+        connections = 0
+        conn = None
+        n = 0
+        while time.monotonic() < deadline:
+            if conn is None:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                connections += 1
+            started = time.perf_counter()
+            try:
+                kind, status, will_close = self._request(conn, worker, n)
+            except (OSError, http.client.HTTPException) as e:
+                errors[e.__class__.__name__] += 1
+                conn.close()
+                conn = None
+                continue
+            latencies[kind].append(time.perf_counter() - started)
+            statuses[status] += 1
+            n += 1
+            if will_close:
+                conn.close()
+                conn = None
+        if conn is not None:
+            conn.close()
+
+        with self._lock:
+            for kind, values in latencies.items():
+                self.latencies[kind].extend(values)
+            for status, count in statuses.items():
+                self.statuses[status] += count
+            for name, count in errors.items():
+                self.errors[name] += count
+            self.connections += connections
+
+    def run(self):
+        deadline = time.monotonic() + self.duration
+        threads = [threading.Thread(target=self._worker, args=(i, deadline), daemon=True)
+                   for i in range(self.concurrency)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.elapsed = time.perf_counter() - started
+        return self
+
+    def report(self, label):
+        total = sum(len(values) for values in self.latencies.values())
+        print(f'\n== {label}: {self.concurrency} clients, {self.elapsed:.1f}s ==')
+        print(f'{total} requests, {total / self.elapsed:.0f} req/s, {self.connections} connections opened')
+        print(f"{'endpoint':<8} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for kind in sorted(self.latencies):
+            values = sorted(self.latencies[kind])
+            print(f'{kind:<8} {len(values):>9} {len(values) / self.elapsed:>8.0f} '
+                  f'{percentile(values, 50) * 1000:>8.1f} {percentile(values, 95) * 1000:>8.1f} '
+                  f'{percentile(values, 99) * 1000:>8.1f} {values[-1] * 1000:>8.1f}')
+        print('status: ' + ', '.join(f'{status}={count}' for status, count in sorted(self.statuses.items())))
+        if self.errors:
+            print('errors: ' + ', '.join(f'{name}={count}' for name, count in sorted(self.errors.items())))
+        return total / self.elapsed
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_health(port, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with status {process.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('server did not become healthy')
+
+
+def serve_and_test(mode, args):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   WAITLIST_DB=os.path.join(tmp, 'waitlist.db'),
+                   WAITLIST_HOST='127.0.0.1',
+                   WAITLIST_PORT=str(port),
+                   EMAIL_WORKERS='0')
+        if args.workers:
+            env['WAITLIST_WORKERS'] = str(args.workers)
+        command = [part.replace('{port}', str(port)) for part in SERVE_COMMANDS[mode]]
+        process = subprocess.Popen(command, cwd=API_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_health(port, process)
+            # Warm up imports, connections and the stats cache before measuring
+            LoadTest(f'http://127.0.0.1:{port}', args.concurrency, 2, args.signup_ratio).run()
+            test = LoadTest(f'http://127.0.0.1:{port}', args.concurrency, args.duration, args.signup_ratio)
+            return test.run().report(mode)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the waitlist server')
+    parser.add_argument('--url', default='http://localhost:5001', help='server to test (without --serve)')
+    parser.add_argument('--serve', help=f"comma-separated modes to start and test: {', '.join(SERVE_COMMANDS)}")
+    parser.add_argument('--workers', type=int, help='WAITLIST_WORKERS for --serve gunicorn')
+    parser.add_argument('--concurrency', type=int, default=32, help='client threads')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per run')
+    parser.add_argument('--signup-ratio', type=float, default=0.1, help='fraction of requests that are signups')
+    args = parser.parse_args()
+
+    if not args.serve:
+        LoadTest(args.url, args.concurrency, args.duration, args.signup_ratio).run().report(args.url)
+        return
+
+    results = {}
+    for mode in args.serve.split(','):
+        if mode not in SERVE_COMMANDS:
+            parser.error(f'unknown serve mode: {mode}')
+        results[mode] = serve_and_test(mode, args)
+
+    if len(results) > 1:
+        print('\n== summary ==')
+        baseline = next(iter(results.values()))
+        for mode, rate in results.items():
+            print(f'{mode:<10} {rate:>8.0f} req/s  ({rate / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -149,110 +149,52 @@ class ClaudeProvider extends AIProviderBase {
     }
 }
 
-class OpenAIProvider extends AIProviderBase {
-    constructor(apiKey) {
-        super(apiKey, {
-            model: 'gpt-4-turbo-preview',
+// Server-side routing: the proxy picks a provider using its own API keys.
+// OpenAI and Gemini are only reached this way (preferredProvider is a hint;
+// the proxy fails over to another provider when the preferred one is down).
+class RoutedProvider extends AIProviderBase {
+    constructor(preferredProvider = null) {
+        super('', {
             maxTokens: 4000,
             temperature: 0.7,
-            apiUrl: 'https://api.openai.com/v1/chat/completions'
+            apiUrl: '/api/generate',
+            preferredProvider: preferredProvider
         });
     }
 
     async generateContent(prompt, options = {}) {
         try {
             const response = await fetch(this.config.apiUrl, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${this.apiKey}`
-                },
-                body: JSON.stringify({
-                    model: this.config.model,
-                    messages: [
-                        {
-                            role: 'system',
-                            content: 'You are a professional presentation content creator.'
-                        },
-                        {
-                            role: 'user',
-                            content: prompt
-                        }
-                    ],
-                    max_tokens: this.config.maxTokens,
-                    temperature: this.config.temperature
-                })
-            });
-
-            if (!response.ok) {
-                throw new Error(`OpenAI API error: ${response.status}`);
-            }
-
-            const data = await response.json();
-            return {
-                success: true,
-                content: data.choices[0].message.content,
-                provider: 'openai',
-                model: this.config.model,
-                tokens: data.usage || {}
-            };
-        } catch (error) {
-            return {
-                success: false,
-                error: error.message,
-                provider: 'openai'
-            };
-        }
-    }
-}
-
-class GeminiProvider extends AIProviderBase {
-    constructor(apiKey) {
-        super(apiKey, {
-            model: 'gemini-pro',
-            maxTokens: 4000,
-            temperature: 0.7,
-            apiUrl: 'https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent'
-        });
-    }
-
-    async generateContent(prompt, options = {}) {
-        try {
-            const response = await fetch(`${this.config.apiUrl}?key=${this.apiKey}`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    contents: [{
-                        parts: [{
-                            text: prompt
-                        }]
-                    }],
-                    generationConfig: {
-                        temperature: this.config.temperature,
-                        maxOutputTokens: this.config.maxTokens
-                    }
+                    prompt: prompt,
+                    system: 'You are a professional presentation content creator.',
+                    max_tokens: this.config.maxTokens,
+                    temperature: this.config.temperature,
+                    provider: options.provider || this.config.preferredProvider
                 })
             });
 
             if (!response.ok) {
-                throw new Error(`Gemini API error: ${response.status}`);
+                throw new Error(`Provider router error: ${response.status}`);
             }
 
             const data = await response.json();
             return {
                 success: true,
-                content: data.candidates[0].content.parts[0].text,
-                provider: 'gemini',
-                model: this.config.model,
-                tokens: {}
+                content: data.content,
+                provider: data.provider,
+                model: data.model,
+                tokens: data.tokens || {}
             };
         } catch (error) {
             return {
                 success: false,
                 error: error.message,
-                provider: 'gemini'
+                provider: this.config.preferredProvider || 'auto'
             };
         }
     }
@@ -262,7 +204,7 @@ class GeminiProvider extends AIProviderBase {
 class AIProviderManager {
     constructor() {
         this.providers = new Map();
-        this.defaultProvider = 'claude';
+        this.defaultProvider = 'auto';
         this.qualityScorer = new ContentQualityScorer();
     }
 
@@ -407,8 +349,7 @@ class ContentQualityScorer {
 if (typeof window !== 'undefined') {
     window.AIProviderManager = AIProviderManager;
     window.ClaudeProvider = ClaudeProvider;
-    window.OpenAIProvider = OpenAIProvider;
-    window.GeminiProvider = GeminiProvider;
+    window.RoutedProvider = RoutedProvider;
 } else if (typeof module !== 'undefined' && module.exports) {
-    module.exports = { AIProviderManager, ClaudeProvider, OpenAIProvider, GeminiProvider };
+    module.exports = { AIProviderManager, ClaudeProvider, RoutedProvider };
 }
\ No newline at end of file
@@ -5,8 +5,6 @@
 let currentSlides = [];
 let currentSlideIndex = 0;
 let CLAUDE_API_KEY = localStorage.getItem('claude_api_key') || '';
-let OPENAI_API_KEY = localStorage.getItem('openai_api_key') || '';
-let GEMINI_API_KEY = localStorage.getItem('gemini_api_key') || '';
 
 // Initialize AI Provider Manager
 let aiManager = null;
@@ -303,10 +301,8 @@ async function generateSlidesWithAI(topic, slideCount, analysis) {
         
         if (enableComparison) {
             // Use multiple providers and select best result
-            const availableProviders = [];
-            if (CLAUDE_API_KEY) availableProviders.push('claude');
-            if (OPENAI_API_KEY) availableProviders.push('openai');
-            if (GEMINI_API_KEY) availableProviders.push('gemini');
+            const availableProviders = ['openai', 'gemini'];
+            if (CLAUDE_API_KEY) availableProviders.unshift('claude');
             
             const prompt = aiManager.getProvider(selectedProvider).formatPrompt(topic, slideCount, analysis);
             result = await aiManager.generateBestContent(prompt, { providers: availableProviders });
@@ -357,59 +353,17 @@ async function generateSlidesWithAI(topic, slideCount, analysis) {
 
 // Keep original Claude function as fallback
 async function generateSlidesWithClaude(topic, slideCount, analysis) {
-    const prompt = `
-    당신은 전문 프레젠테이션 디자이너입니다. 다음 정보로 완벽한 프레젠테이션을 만들어주세요:
-
-    📋 프로젝트 정보:
-    ${topic}
-    
-    📐 프레젠테이션 구조 가이드:
-    - 1번 슬라이드: 타이틀 + 매력적인 부제목
-    - 2번 슬라이드: 목차/개요 (전체 흐름 제시)
-    - 중간 슬라이드들: 핵심 내용 (논리적 순서)
-    - 마지막 슬라이드: 결론/행동 촉구
-
-    🎯 내용 작성 원칙:
-    1. 각 슬라이드는 하나의 핵심 메시지에 집중
-    2. 제목은 임팩트 있고 명확하게 (10자 이내 권장)
-    3. 내용은 3-5개 핵심 포인트로 구성
-    4. 전문적이면서도 이해하기 쉽게
-    5. 실행 가능한 구체적 내용 포함
-
-    ⚡ 필수 규칙:
-    - bullet point 기호(•, -, *, ○ 등) 절대 사용 금지
-    - 각 포인트는 줄바꿈(\\n)으로만 구분
-    - 숫자, 통계, 구체적 예시 적극 활용
-
-    📊 JSON 형식으로 반환:
-    [
-        {
-            "title": "매력적인 슬라이드 제목",
-            "content": "첫 번째 핵심 내용\\n두 번째 핵심 내용\\n세 번째 핵심 내용"
-        }
-    ]
-    
-    ${slideCount}개의 완벽한 슬라이드를 생성해주세요.
-    `;
-
     try {
-        // Use local proxy server to avoid CORS issues
-        const response = await fetch('/api/claude', {
+        // The proxy builds the prompt from its deck template (streamed as server-sent events)
+        const response = await fetch('/api/deck', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                model: 'claude-3-5-sonnet-20241022',
-                max_tokens: 4000,
-                temperature: 0.7,
-                system: '당신은 전문적인 프레젠테이션 콘텐츠 작성자입니다.',
-                messages: [
-                    {
-                        role: 'user',
-                        content: prompt
-                    }
-                ],
+                topic: topic,
+                slideCount: slideCount,
+                stream: true,
                 api_key: CLAUDE_API_KEY  // Send API key in request body
             })
         });
@@ -419,14 +373,18 @@ async function generateSlidesWithClaude(topic, slideCount, analysis) {
             throw new Error(`Claude API 오류: ${response.status} - ${errorText}`);
         }
 
-        const data = await response.json();
-        const responseText = data.content[0].text;
+        const { slides, responseText } = await readSlideStream(response, (slide) => {
+            updateLoadingMessage(`📝 슬라이드 ${slide.index + 1}/${slideCount} 생성 완료...`);
+        });
+        
+        if (slides.length > 0) {
+            return slides;
+        }
         
         // Extract JSON from response
         const jsonMatch = responseText.match(/\[[\s\S]*\]/);
         if (jsonMatch) {
-            const slides = JSON.parse(jsonMatch[0]);
-            return slides;
+            return JSON.parse(jsonMatch[0]);
         } else {
             // Fallback: parse text manually
             return parseTextToSlides(responseText, slideCount);
@@ -449,6 +407,48 @@ async function generateSlidesWithClaude(topic, slideCount, analysis) {
     }
 }
 
+// Read the proxy's SSE stream, collecting slides as the proxy extracts them
+async function readSlideStream(response, onSlide) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const slides = [];
+    let responseText = '';
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventType = 'message';
+            const dataLines = [];
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event:')) eventType = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart());
+            }
+            if (dataLines.length === 0) continue;
+            const data = JSON.parse(dataLines.join('\n'));
+            
+            if (eventType === 'slide') {
+                const slide = { title: data.title, content: data.content };
+                slides.push(slide);
+                if (onSlide) onSlide(data);
+            } else if (eventType === 'content_block_delta' && data.delta && data.delta.type === 'text_delta') {
+                responseText += data.delta.text;
+            } else if (eventType === 'error') {
+                throw new Error(`Claude API 오류: ${data.error && data.error.message ? data.error.message : data.error}`);
+            }
+        }
+    }
+    
+    return { slides, responseText };
+}
+
 // Parse Text to Slides (Fallback)
 function parseTextToSlides(text, slideCount) {
     const lines = text.split('\n');
@@ -553,8 +553,6 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('forceDownloadPPT').addEventListener('click', forceDownloadPPT);
     document.getElementById('downloadJSON').addEventListener('click', downloadJSON);
     document.getElementById('saveApiKey').addEventListener('click', saveApiKey);
-    document.getElementById('saveOpenAIKey').addEventListener('click', saveOpenAIKey);
-    document.getElementById('saveGeminiKey').addEventListener('click', saveGeminiKey);
     
     // AI Provider selection event listeners
     document.getElementsByName('aiProvider').forEach(radio => {
@@ -566,11 +564,6 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('enableComparison').addEventListener('change', function() {
         checkApiKey();
     });
-    
-    document.getElementById('showMultipleKeys').addEventListener('click', function() {
-        const multipleKeys = document.getElementById('multipleApiKeys');
-        multipleKeys.classList.toggle('hidden');
-    });
 });
 
 // Generate and Download PPT using Enhanced Template Engine
@@ -1065,12 +1058,12 @@ function initializeAIProviders() {
     if (CLAUDE_API_KEY) {
         aiManager.registerProvider('claude', new ClaudeProvider(CLAUDE_API_KEY));
     }
-    if (OPENAI_API_KEY) {
-        aiManager.registerProvider('openai', new OpenAIProvider(OPENAI_API_KEY));
-    }
-    if (GEMINI_API_KEY) {
-        aiManager.registerProvider('gemini', new GeminiProvider(GEMINI_API_KEY));
-    }
+    
+    // Proxy-side routing with server-held keys, failover and hedging;
+    // OpenAI and Gemini are preferred-provider hints to the same router
+    aiManager.registerProvider('auto', new RoutedProvider());
+    aiManager.registerProvider('openai', new RoutedProvider('openai'));
+    aiManager.registerProvider('gemini', new RoutedProvider('gemini'));
 }
 
 function getSelectedProvider() {
@@ -1080,41 +1073,30 @@ function getSelectedProvider() {
             return radio.value;
         }
     }
-    return 'claude';
+    return 'auto';
+}
+
+// Users who saved a Claude key keep calling Claude with it; everyone else starts on Auto
+function selectDefaultProvider() {
+    if (!CLAUDE_API_KEY) return;
+    const claudeRadio = document.querySelector('input[name="aiProvider"][value="claude"]');
+    if (claudeRadio) {
+        claudeRadio.checked = true;
+    }
 }
 
 function checkApiKey() {
     const selectedProvider = getSelectedProvider();
     const enableComparison = document.getElementById('enableComparison').checked;
     
-    if (enableComparison) {
-        // Check if at least 2 providers have API keys
-        const availableProviders = [];
-        if (CLAUDE_API_KEY) availableProviders.push('claude');
-        if (OPENAI_API_KEY) availableProviders.push('openai');
-        if (GEMINI_API_KEY) availableProviders.push('gemini');
-        
-        if (availableProviders.length < 2) {
-            document.getElementById('apiKeySection').classList.remove('hidden');
-            document.getElementById('multipleApiKeys').classList.remove('hidden');
-            updateApiKeyUI('multiple');
-            return false;
-        }
-    } else {
-        // Check selected provider
-        const hasKey = {
-            'claude': CLAUDE_API_KEY,
-            'openai': OPENAI_API_KEY,
-            'gemini': GEMINI_API_KEY
-        }[selectedProvider];
-        
-        if (!hasKey) {
-            document.getElementById('apiKeySection').classList.remove('hidden');
-            updateApiKeyUI(selectedProvider);
-            return false;
-        }
+    // Only direct Claude calls need a browser key; the other choices use the server's keys
+    if (selectedProvider === 'claude' && !enableComparison && !CLAUDE_API_KEY) {
+        document.getElementById('apiKeySection').classList.remove('hidden');
+        updateApiKeyUI(selectedProvider);
+        return false;
     }
     
+    document.getElementById('apiKeySection').classList.add('hidden');
     return true;
 }
 
@@ -1128,21 +1110,6 @@ function updateApiKeyUI(provider) {
             name: 'Claude',
             url: 'https://console.anthropic.com/',
             placeholder: 'sk-ant-api03-...'
-        },
-        'openai': {
-            name: 'OpenAI',
-            url: 'https://platform.openai.com/api-keys',
-            placeholder: 'sk-...'
-        },
-        'gemini': {
-            name: 'Gemini',
-            url: 'https://aistudio.google.com/app/apikey',
-            placeholder: 'AI...'
-        },
-        'multiple': {
-            name: 'Multiple Providers',
-            url: '',
-            placeholder: 'Configure all providers below'
         }
     };
     
@@ -1158,64 +1125,27 @@ function updateApiKeyUI(provider) {
     }
     
     if (apiKeyLinks) {
-        if (provider === 'multiple') {
-            apiKeyLinks.innerHTML = `
-                <a href="https://console.anthropic.com/" target="_blank" class="text-purple-600 underline">Claude</a> | 
-                <a href="https://platform.openai.com/api-keys" target="_blank" class="text-green-600 underline">OpenAI</a> | 
-                <a href="https://aistudio.google.com/app/apikey" target="_blank" class="text-blue-600 underline">Gemini</a>
-            `;
-        } else {
-            apiKeyLinks.innerHTML = `<a href="${info.url}" target="_blank" class="text-purple-600 underline">Get ${info.name} API</a>`;
-        }
+        apiKeyLinks.innerHTML = `<a href="${info.url}" target="_blank" class="text-purple-600 underline">Get ${info.name} API</a>`;
     }
 }
 
 function saveApiKey() {
-    const selectedProvider = getSelectedProvider();
     const apiKey = document.getElementById('apiKeyInput').value.trim();
     
     if (apiKey) {
-        if (selectedProvider === 'claude') {
-            CLAUDE_API_KEY = apiKey;
-            localStorage.setItem('claude_api_key', apiKey);
-        } else if (selectedProvider === 'openai') {
-            OPENAI_API_KEY = apiKey;
-            localStorage.setItem('openai_api_key', apiKey);
-        } else if (selectedProvider === 'gemini') {
-            GEMINI_API_KEY = apiKey;
-            localStorage.setItem('gemini_api_key', apiKey);
-        }
+        CLAUDE_API_KEY = apiKey;
+        localStorage.setItem('claude_api_key', apiKey);
         
         // Reinitialize providers
         initializeAIProviders();
         
         document.getElementById('apiKeySection').classList.add('hidden');
-        alert(`✅ ${selectedProvider.toUpperCase()} API key saved!`);
+        alert('✅ CLAUDE API key saved!');
     } else {
         alert('⚠️ Please enter a valid API key.');
     }
 }
 
-function saveOpenAIKey() {
-    const apiKey = document.getElementById('openaiKeyInput').value.trim();
-    if (apiKey) {
-        OPENAI_API_KEY = apiKey;
-        localStorage.setItem('openai_api_key', apiKey);
-        initializeAIProviders();
-        alert('✅ OpenAI API key saved!');
-    }
-}
-
-function saveGeminiKey() {
-    const apiKey = document.getElementById('geminiKeyInput').value.trim();
-    if (apiKey) {
-        GEMINI_API_KEY = apiKey;
-        localStorage.setItem('gemini_api_key', apiKey);
-        initializeAIProviders();
-        alert('✅ Gemini API key saved!');
-    }
-}
-
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
     console.log('🚀 SlideCraft AI - Multi-LLM Version Initialized');
@@ -1230,6 +1160,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Initialize AI providers
     initializeAIProviders();
+    selectDefaultProvider();
     
     // Check API key on load
     checkApiKey();
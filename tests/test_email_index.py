@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory duplicate-email index (backend/api/email_index.py)
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from email_index import EmailIndex, fingerprint
+
+
+def emails(prefix, count):
+    return [f'{prefix}{i}@example.com' for i in range(count)]
+
+
+class EmailIndexTests(unittest.TestCase):
+    def test_emails_are_matched_after_normalising(self):
+        index = EmailIndex()
+        self.assertTrue(index.add('  Alice@Example.COM '))
+        self.assertIn('alice@example.com', index)
+        self.assertFalse(index.add('ALICE@example.com'))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(fingerprint('Alice@Example.com'), fingerprint('alice@example.com'))
+
+    def test_unseen_emails_are_not_reported_as_registered(self):
+        index = EmailIndex()
+        index.update(emails('member', 20000))
+        false_positives = [email for email in emails('visitor', 20000) if email in index]
+        self.assertEqual(false_positives, [])
+
+    def test_update_counts_only_new_emails(self):
+        index = EmailIndex()
+        self.assertEqual(index.update(['a@x.com', 'b@x.com', 'A@x.com']), 2)
+        self.assertEqual(index.update(['b@x.com', 'c@x.com']), 1)
+        self.assertEqual(len(index), 3)
+
+    def test_growing_rehashes_every_email(self):
+        index = EmailIndex(capacity=1)
+        initial_slots = len(index._slots)
+        registered = emails('member', 5000)
+        for email in registered:
+            index.add(email)
+        self.assertGreater(len(index._slots), initial_slots)
+        self.assertLessEqual(len(index) / len(index._slots), index.max_load)
+        self.assertEqual(len(index), 5000)
+        self.assertTrue(all(email in index for email in registered))
+        self.assertEqual(sum(1 for value in index._slots if value), 5000)
+
+    def test_capacity_sizes_the_table_for_a_startup_load(self):
+        index = EmailIndex(capacity=10000)
+        slots = index._slots
+        index.update(emails('member', 10000))
+        self.assertIs(index._slots, slots)
+        self.assertEqual(index.nbytes, len(slots) * 8)
+
+    def test_readers_see_existing_emails_while_the_table_grows(self):
+        index = EmailIndex(capacity=1)
+        registered = emails('member', 200)
+        index.update(registered)
+        missed = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                missed.extend(email for email in registered if email not in index)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for batch in range(20):
+            index.update(emails(f'batch{batch}-', 500))
+        done.set()
+        reader.join()
+        self.assertEqual(missed, [])
+        self.assertEqual(len(index), 200 + 20 * 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for job leases, adoption and cancellation (backend/api/generation_jobs.py)
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from generation_jobs import (
+    STATUS_CANCELLED, STATUS_DONE, STATUS_FAILED, STATUS_QUEUED, JobCancelled, JobQueue, JobStore
+)
+
+RESULT = {'slides': [], 'text': '', 'usage': None}
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class JobQueueTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = JobStore(os.path.join(directory.name, 'jobs.db'))
+        self.addCleanup(self.store.pool.close_all)
+        self.ran = []
+        self.release = threading.Event()
+
+    def runner(self, job):
+        """Runs until released, or until the job is cancelled."""
+        self.ran.append(job.id)
+        while not self.release.wait(0.02):
+            if job.cancel_requested.is_set():
+                raise JobCancelled()
+        return RESULT
+
+    def queue(self, workers=1, **kwargs):
+        kwargs.setdefault('heartbeat_interval', 0.05)
+        kwargs.setdefault('lease', 0.3)
+        queue = JobQueue(self.store, self.runner, workers=workers, **kwargs)
+        queue.start()
+        self.addCleanup(self.shut_down, queue)
+        return queue
+
+    def shut_down(self, queue):
+        self.release.set()
+        queue.stop()
+        wait_for(queue._retired.is_set)
+
+    def stored_status(self, job_id):
+        return self.store.get(job_id).status
+
+    def test_queued_job_is_cancelled_without_running(self):
+        queue = self.queue(workers=0)
+        job = queue.submit('owner', {'n': 1})
+        self.assertIs(queue.cancel(job.id), job)
+        self.assertEqual(job.status, STATUS_CANCELLED)
+        self.assertEqual(self.stored_status(job.id), STATUS_CANCELLED)
+        self.assertEqual((queue.queued, self.ran), (0, []))
+
+    def test_cancel_between_dequeue_and_start_is_not_lost(self):
+        queue = self.queue(workers=0)
+        job = queue.submit('owner', {'n': 1})
+        take = queue._next
+
+        def take_then_cancel():
+            taken = take()
+            queue.cancel(taken.id)
+            return taken
+
+        queue._next = take_then_cancel
+        threading.Thread(target=queue._run, daemon=True).start()
+        self.assertTrue(wait_for(lambda: self.stored_status(job.id) == STATUS_CANCELLED))
+        self.assertEqual(self.ran, [])
+
+    def test_running_job_is_cancelled_through_its_runner(self):
+        queue = self.queue()
+        job = queue.submit('owner', {'n': 1})
+        self.assertTrue(wait_for(lambda: self.ran))
+        queue.cancel(job.id)
+        self.assertTrue(wait_for(lambda: self.stored_status(job.id) == STATUS_CANCELLED))
+
+    def test_cancel_reaches_the_process_holding_the_job(self):
+        holder = self.queue()
+        other = self.queue(workers=0)
+        job = holder.submit('owner', {'n': 1})
+        self.assertTrue(wait_for(lambda: self.ran))
+
+        other.cancel(job.id)  # not in other's memory: flagged in the store
+        self.assertTrue(wait_for(lambda: self.stored_status(job.id) == STATUS_CANCELLED))
+        self.assertEqual(job.status, STATUS_CANCELLED)
+
+    def test_expired_lease_jobs_are_adopted_elsewhere(self):
+        # heartbeat_interval past the lease: this process stops renewing, as if it had died
+        crashed = self.queue(workers=0, heartbeat_interval=60)
+        server_key_job = crashed.submit('owner', {'n': 1})
+        client_key_job = crashed.submit('owner', {'n': 2}, api_key='client-key')
+        time.sleep(0.4)
+
+        self.release.set()
+        self.queue()
+        self.assertTrue(wait_for(lambda: self.stored_status(server_key_job.id) == STATUS_DONE))
+        self.assertEqual(self.ran, [server_key_job.id])
+        # A client's key was only held by the crashed process
+        failed = self.store.get(client_key_job.id)
+        self.assertEqual(failed.status, STATUS_FAILED)
+        self.assertIn('submit the job again', failed.error)
+
+    def test_live_lease_jobs_are_not_adopted(self):
+        holder = self.queue(workers=0)
+        job = holder.submit('owner', {'n': 1})
+        time.sleep(0.4)  # longer than the lease, but the holder keeps renewing it
+        self.queue()
+        time.sleep(0.2)
+        self.assertEqual(self.ran, [])
+        self.assertEqual(self.stored_status(job.id), STATUS_QUEUED)
+
+    def test_stop_keeps_the_lease_on_running_jobs_until_they_finish(self):
+        stopping = self.queue()
+        running_job = stopping.submit('owner', {'n': 1})
+        self.assertTrue(wait_for(lambda: self.ran))
+        queued_job = stopping.submit('owner', {'n': 2})
+
+        # The queued job is handed back at once; the running one is unfinished but stays claimed
+        self.assertEqual(stopping.stop(timeout=0), 1)
+        claimed = self.store.claim_orphans('observer', 0.3)
+        self.assertEqual([row[0] for row in claimed], [queued_job.id])
+        time.sleep(0.4)  # longer than the lease
+        self.assertNotIn(running_job.id, [row[0] for row in self.store.claim_orphans('observer', 0.3)])
+        self.assertFalse(stopping._retired.is_set())
+
+        self.release.set()
+        self.assertTrue(wait_for(stopping._retired.is_set))
+        self.assertEqual(self.stored_status(running_job.id), STATUS_DONE)
+        self.assertEqual(self.ran, [running_job.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
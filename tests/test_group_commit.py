@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for batching signups into shared commits (backend/api/group_commit.py)
+Run: python -m unittest discover tests
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from group_commit import GroupCommitWriter
+from sqlite_pool import SQLitePool
+
+
+class GroupCommitTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pool = SQLitePool(os.path.join(directory.name, 'test.db'))
+        self.addCleanup(self.pool.close_all)
+        self.pool.write(lambda conn: conn.execute('CREATE TABLE items (value TEXT UNIQUE)'))
+        self.batch_sizes = []
+        self.first_batch_started = threading.Event()
+        self.release_first_batch = threading.Event()
+        self.release_first_batch.set()
+
+    def insert(self, conn, items):
+        """Handler: one row per item; a duplicate fails only that item."""
+        self.batch_sizes.append(len(items))
+        self.first_batch_started.set()
+        self.release_first_batch.wait()
+        results = []
+        for item in items:
+            if item == 'boom':
+                raise RuntimeError('handler failed')
+            try:
+                conn.execute('INSERT INTO items (value) VALUES (?)', (item,))
+                results.append(item)
+            except sqlite3.IntegrityError as e:
+                results.append(e)
+        return results
+
+    def stored(self):
+        rows = self.pool.read(lambda conn: conn.execute('SELECT value FROM items ORDER BY value').fetchall())
+        return [row[0] for row in rows]
+
+    def writer(self, **kwargs):
+        writer = GroupCommitWriter(self.pool, self.insert, **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_items_queued_during_a_commit_share_the_next_one(self):
+        writer = self.writer()
+        self.release_first_batch.clear()
+        first = writer.submit('a')
+        self.assertTrue(self.first_batch_started.wait(5))
+        rest = [writer.submit(f'b{i}') for i in range(10)]
+        self.release_first_batch.set()
+
+        self.assertEqual(first.result(5), 'a')
+        self.assertEqual([f.result(5) for f in rest], [f'b{i}' for i in range(10)])
+        self.assertEqual(self.batch_sizes, [1, 10])
+        self.assertEqual((writer.batches, writer.items), (2, 11))
+
+    def test_batches_are_capped_at_max_batch(self):
+        writer = self.writer(max_batch=4)
+        self.release_first_batch.clear()
+        writer.submit('first')
+        self.assertTrue(self.first_batch_started.wait(5))
+        futures = [writer.submit(str(i)) for i in range(10)]
+        self.release_first_batch.set()
+        for future in futures:
+            future.result(5)
+        self.assertEqual(self.batch_sizes, [1, 4, 4, 2])
+
+    def test_results_resolve_only_after_commit(self):
+        writer = self.writer()
+        future = writer.submit('a')
+        self.assertEqual(future.result(5), 'a')
+        # A separate connection already sees the row when the future resolves
+        reader = sqlite3.connect(self.pool.db_file)
+        self.addCleanup(reader.close)
+        self.assertEqual(reader.execute('SELECT value FROM items').fetchall(), [('a',)])
+
+    def test_item_error_fails_only_that_caller(self):
+        writer = self.writer()
+        self.release_first_batch.clear()
+        writer.submit('x')
+        self.assertTrue(self.first_batch_started.wait(5))
+        ok, duplicate = writer.submit('a'), writer.submit('x')
+        self.release_first_batch.set()
+
+        self.assertEqual(ok.result(5), 'a')
+        with self.assertRaises(sqlite3.IntegrityError):
+            duplicate.result(5)
+        self.assertEqual(self.stored(), ['a', 'x'])
+
+    def test_handler_error_fails_and_rolls_back_the_whole_batch(self):
+        writer = self.writer()
+        self.release_first_batch.clear()
+        writer.submit('first')
+        self.assertTrue(self.first_batch_started.wait(5))
+        futures = [writer.submit('a'), writer.submit('boom'), writer.submit('b')]
+        self.release_first_batch.set()
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(5)
+        self.assertEqual(self.stored(), ['first'])
+        # The writer keeps going after a failed batch
+        self.assertEqual(writer.submit('c').result(5), 'c')
+
+    def test_close_flushes_queued_items(self):
+        writer = GroupCommitWriter(self.pool, self.insert)
+        futures = [writer.submit(str(i)) for i in range(5)]
+        writer.close()
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(self.stored(), ['0', '1', '2', '3', '4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-thread metric shards (backend/api/metrics.py)
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from metrics import Registry
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class ShardTests(unittest.TestCase):
+    def setUp(self):
+        registry = Registry()
+        self.counter = registry.counter('test_total', 'Test counter', ('route',))
+        self.histogram = registry.histogram('test_seconds', 'Test histogram', buckets=(0.1, 1.0))
+
+    def test_exited_threads_leave_no_shards(self):
+        def record():
+            self.counter.inc('/a')
+            self.histogram.observe(0.5)
+
+        for _ in range(5):
+            run_threads(100, record)
+            self.assertLessEqual(len(self.counter._shards), 1)
+            self.assertLessEqual(len(self.histogram._shards), 1)
+
+        self.assertEqual(self.counter.collect(), {('/a',): 500})
+        self.assertEqual(self.histogram.collect(), {(): [0, 500, 0, 250.0]})
+
+    def test_live_threads_keep_their_shards(self):
+        self.counter.inc('/a')
+        started = threading.Barrier(11)
+        release = threading.Event()
+
+        def record():
+            self.counter.inc('/a', amount=2)
+            started.wait()
+            release.wait()
+
+        threads = [threading.Thread(target=record) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        self.assertEqual(len(self.counter._shards), 11)
+        self.assertEqual(self.counter.collect(), {('/a',): 21})
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.counter._shards), 1)
+        self.assertEqual(self.counter.collect(), {('/a',): 21})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for the worker pool, keep-alive connections and chunked framing in the proxy engine
+(backend/api/proxy_engine.py)
+Run: python -m unittest discover tests
+"""
+
+import http.client
+import http.server
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from proxy_engine import PersistentConnectionMixin, PooledHTTPServer, ServerBusy, UpstreamGate
+
+
+class Handler(PersistentConnectionMixin, http.server.BaseHTTPRequestHandler):
+    started = threading.Event()
+    release = threading.Event()
+
+    def do_GET(self):
+        if self.path == '/slow':
+            self.started.set()
+            self.release.wait(5)
+            self.path = '/count'
+        if self.path == '/chunked':
+            self.send_response(200)
+            self.start_chunked()
+            for data in (b'ab', b'', b'cd'):
+                self.write_chunk(data)
+            self.end_chunked()
+        elif self.path == '/count':
+            body = str(self.requests_on_connection).encode('ascii')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def read_response(sock_file):
+    """(status line, headers dict, raw body bytes) of one response, read by hand."""
+    status = sock_file.readline().decode('ascii').strip()
+    headers = {}
+    while True:
+        line = sock_file.readline().decode('ascii').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        return status, headers, sock_file.read(int(headers['content-length']))
+    if headers.get('transfer-encoding') == 'chunked':
+        raw = b''
+        while True:
+            size_line = sock_file.readline()
+            raw += size_line
+            size = int(size_line.strip(), 16)
+            raw += sock_file.read(size + 2)
+            if size == 0:
+                return status, headers, raw
+    return status, headers, sock_file.read()
+
+
+class WorkerPoolTests(unittest.TestCase):
+    def setUp(self):
+        Handler.started.clear()
+        Handler.release.clear()
+        self.server = PooledHTTPServer(('127.0.0.1', 0), Handler, workers=1, queue_size=1, retry_after=7)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        Handler.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def send(self, path):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        self.addCleanup(sock.close)
+        sock.sendall(f'GET {path} HTTP/1.1\r\nHost: x\r\n\r\n'.encode('ascii'))
+        return sock.makefile('rb')
+
+    def test_saturated_pool_answers_503_with_retry_after(self):
+        busy = self.send('/slow')
+        self.assertTrue(Handler.started.wait(5))
+        waiting = self.send('/count')
+        deadline = time.monotonic() + 5
+        while self.server.queued() < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        status, headers, body = read_response(self.send('/count'))
+        self.assertTrue(status.startswith('HTTP/1.1 503'))
+        self.assertEqual(headers['retry-after'], '7')
+        self.assertEqual(headers['connection'], 'close')
+        self.assertEqual(json.loads(body), {'error': 'Server busy, retry later'})
+
+        # The busy and queued connections are still served once the worker frees up
+        Handler.release.set()
+        self.assertEqual(read_response(busy)[2], b'1')
+        self.assertEqual(read_response(waiting)[2], b'1')
+
+
+class UpstreamGateTests(unittest.TestCase):
+    def test_gate_caps_calls_in_flight(self):
+        gate = UpstreamGate(max_in_flight=2, wait_timeout=0.05, retry_after=3)
+        gate.acquire()
+        with gate.slot():
+            self.assertEqual(gate.in_flight, 2)
+            with self.assertRaises(ServerBusy) as raised:
+                gate.acquire()
+            self.assertEqual(raised.exception.retry_after, 3)
+        self.assertEqual(gate.in_flight, 1)
+        gate.release()
+        self.assertEqual(gate.in_flight, 0)
+
+
+class KeepAliveTests(unittest.TestCase):
+    def setUp(self):
+        self.server = PooledHTTPServer(('127.0.0.1', 0), Handler, workers=2, queue_size=4,
+                                       keepalive_timeout=5, max_keepalive_requests=3)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def connect(self):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        self.addCleanup(sock.close)
+        return sock, sock.makefile('rb')
+
+    def test_requests_reuse_one_connection_until_the_limit(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        self.addCleanup(conn.close)
+        bodies, sockets = [], []
+        for _ in range(3):
+            conn.request('GET', '/count')
+            sockets.append(conn.sock)
+            response = conn.getresponse()
+            bodies.append(response.read())
+        self.assertEqual(bodies, [b'1', b'2', b'3'])
+        self.assertIs(sockets[0], sockets[1])
+        self.assertIs(sockets[1], sockets[2])
+        # The third request reached max_keepalive_requests, so that response closes the connection
+        self.assertEqual(response.getheader('Connection'), 'close')
+
+    def test_idle_connection_is_parked_and_served_again(self):
+        sock, sock_file = self.connect()
+        sock.sendall(b'GET /count HTTP/1.1\r\nHost: x\r\n\r\n')
+        status, headers, body = read_response(sock_file)
+        self.assertEqual((status, body), ('HTTP/1.1 200 OK', b'1'))
+        self.assertEqual(headers.get('keep-alive'), 'timeout=5')
+        self.assertEqual(self.server.queued(), 0)
+
+        sock.sendall(b'GET /count HTTP/1.1\r\nHost: x\r\n\r\n')
+        self.assertEqual(read_response(sock_file)[2], b'2')
+
+    def test_pipelined_requests_are_answered_in_order(self):
+        sock, sock_file = self.connect()
+        sock.sendall(b'GET /count HTTP/1.1\r\nHost: x\r\n\r\n' * 2)
+        self.assertEqual(read_response(sock_file)[2], b'1')
+        self.assertEqual(read_response(sock_file)[2], b'2')
+
+    def test_error_response_keeps_the_connection_open(self):
+        sock, sock_file = self.connect()
+        sock.sendall(b'GET /missing HTTP/1.1\r\nHost: x\r\n\r\n')
+        status, headers, _ = read_response(sock_file)
+        self.assertTrue(status.startswith('HTTP/1.1 404'))
+        self.assertNotEqual(headers.get('connection'), 'close')
+
+        sock.sendall(b'GET /count HTTP/1.1\r\nHost: x\r\n\r\n')
+        self.assertEqual(read_response(sock_file)[2], b'2')
+
+    def test_chunked_body_skips_empty_writes_and_is_terminated(self):
+        sock, sock_file = self.connect()
+        sock.sendall(b'GET /chunked HTTP/1.1\r\nHost: x\r\n\r\n')
+        status, headers, raw = read_response(sock_file)
+        self.assertEqual(status, 'HTTP/1.1 200 OK')
+        self.assertEqual(headers.get('transfer-encoding'), 'chunked')
+        self.assertEqual(raw, b'2\r\nab\r\n2\r\ncd\r\n0\r\n\r\n')
+
+        # The terminating chunk frames the body, so the connection carries the next request
+        sock.sendall(b'GET /count HTTP/1.1\r\nHost: x\r\n\r\n')
+        self.assertEqual(read_response(sock_file)[2], b'2')
+
+    def test_http10_stream_is_unframed_and_closes(self):
+        sock, sock_file = self.connect()
+        sock.sendall(b'GET /chunked HTTP/1.0\r\n\r\n')
+        status, headers, body = read_response(sock_file)
+        self.assertTrue(status.endswith('200 OK'))
+        self.assertNotIn('transfer-encoding', headers)
+        self.assertEqual(body, b'abcd')
+
+
+if __name__ == '__main__':
+    unittest.main()
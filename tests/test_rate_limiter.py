@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-key token buckets and priority scheduling (backend/api/rate_limiter.py)
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+import rate_limiter
+from rate_limiter import (
+    PRIORITY_BATCH, PRIORITY_INTERACTIVE, QueueTimeout, TokenBucket, UpstreamScheduler, parse_retry_after
+)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_starts_full_and_refills_at_the_rate(self):
+        bucket = TokenBucket(60)  # one token a second
+        now = bucket.updated
+        self.assertEqual(bucket.wait_time(60, now), 0.0)
+        bucket.consume(60)
+        self.assertAlmostEqual(bucket.wait_time(1, now), 1.0)
+        self.assertAlmostEqual(bucket.wait_time(1, now + 0.5), 0.5)
+        self.assertEqual(bucket.wait_time(1, now + 1.0), 0.0)
+
+    def test_refill_stops_at_capacity(self):
+        bucket = TokenBucket(60, capacity=10)
+        bucket.consume(10)
+        bucket.wait_time(1, bucket.updated + 3600)
+        self.assertEqual(bucket.tokens, 10)
+
+    def test_requests_larger_than_capacity_are_clamped(self):
+        bucket = TokenBucket(60, capacity=10)
+        now = bucket.updated
+        self.assertEqual(bucket.wait_time(500, now), 0.0)
+        bucket.consume(500)
+        self.assertEqual(bucket.tokens, 0)
+
+
+class SchedulerTests(unittest.TestCase):
+    def test_higher_priority_requests_are_admitted_first(self):
+        scheduler = UpstreamScheduler(rpm=6000, tpm=10 ** 6)
+        state = scheduler._state('key')
+        state.blocked_until = time.monotonic() + 0.3
+        order = []
+
+        def call(name, priority):
+            scheduler.run('key', 1, lambda: (order.append(name), (200, {}, name))[1], priority)
+
+        threads = [threading.Thread(target=call, args=('batch', PRIORITY_BATCH))]
+        threads[0].start()
+        while scheduler.queued < 1:
+            time.sleep(0.01)
+        threads.append(threading.Thread(target=call, args=('interactive', PRIORITY_INTERACTIVE)))
+        threads[1].start()
+        while scheduler.queued < 2:
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(order, ['interactive', 'batch'])
+
+    def test_requests_wait_for_the_request_bucket(self):
+        scheduler = UpstreamScheduler(rpm=600, tpm=10 ** 6)  # ten requests a second
+        scheduler._state('key').requests.tokens = 0
+        started = time.monotonic()
+        self.assertEqual(scheduler.run('key', 1, lambda: (200, {}, 'ok'))[0], 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.08)
+
+    def test_token_budget_limits_are_per_key(self):
+        scheduler = UpstreamScheduler(rpm=1, tpm=10 ** 6, queue_timeout=0.2)
+        self.assertEqual(scheduler.run('a', 1, lambda: (200, {}, 'ok'))[0], 200)
+        with self.assertRaises(QueueTimeout):
+            scheduler.run('a', 1, lambda: (200, {}, 'ok'))
+        self.assertEqual(scheduler.run('b', 1, lambda: (200, {}, 'ok'))[0], 200)
+        self.assertEqual(scheduler.queued, 0)
+
+    def test_overloaded_responses_are_retried_after_retry_after(self):
+        scheduler = UpstreamScheduler(rpm=6000, tpm=10 ** 6)
+        responses = [(429, {'retry-after': '0.05'}, 'busy'), (200, {}, 'ok')]
+        started = time.monotonic()
+        self.assertEqual(scheduler.run('key', 1, lambda: responses.pop(0)), (200, {}, 'ok'))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(scheduler.retries, 1)
+
+    def test_client_errors_are_not_retried(self):
+        scheduler = UpstreamScheduler(rpm=6000, tpm=10 ** 6)
+        calls = []
+        result = scheduler.run('key', 1, lambda: (calls.append(1), (400, {}, 'bad'))[1])
+        self.assertEqual(result[0], 400)
+        self.assertEqual(len(calls), 1)
+
+    def test_retries_stop_at_max_retries(self):
+        scheduler = UpstreamScheduler(rpm=6000, tpm=10 ** 6, max_retries=2)
+        calls = []
+        result = scheduler.run('key', 1, lambda: (calls.append(1), (529, {'retry-after': '0'}, 'busy'))[1])
+        self.assertEqual(result[0], 529)
+        self.assertEqual(len(calls), 3)
+
+    def test_idle_keys_with_full_buckets_are_evicted(self):
+        scheduler = UpstreamScheduler(rpm=6000, tpm=10 ** 6, idle_ttl=0)
+        for key in ('a', 'b', 'c'):
+            scheduler.run(key, 1, lambda: (200, {}, 'ok'))
+        states = list(scheduler._keys.values())
+        self.assertEqual(len(states), 3)
+        for state in states:
+            state.requests.tokens = state.requests.capacity
+            state.tokens.tokens = state.tokens.capacity
+        states[0].requests.tokens = 0  # still refilling: kept
+
+        scheduler._swept_at -= rate_limiter.SWEEP_INTERVAL
+        with scheduler._cond:
+            scheduler._state('d')
+        self.assertEqual(len(scheduler._keys), 2)
+
+    def test_keys_in_use_are_not_evicted(self):
+        scheduler = UpstreamScheduler(rpm=6000, tpm=10 ** 6, idle_ttl=0)
+        states = []
+
+        def call():
+            state = next(iter(scheduler._keys.values()))
+            state.requests.tokens = state.requests.capacity  # otherwise idle, but running
+            state.tokens.tokens = state.tokens.capacity
+            scheduler._swept_at -= rate_limiter.SWEEP_INTERVAL
+            with scheduler._cond:
+                scheduler._state('other')
+            states.append(scheduler._keys.get(next(iter(scheduler._keys))))
+            return 200, {}, 'ok'
+
+        scheduler.run('key', 1, call)
+        self.assertIsNotNone(states[0])
+        self.assertEqual(len(scheduler._keys), 2)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after({'retry-after': '2'}), 2.0)
+        self.assertEqual(parse_retry_after({'retry-after': '-1'}), 0.0)
+        self.assertIsNone(parse_retry_after({'retry-after': 'soon'}))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the two-tier generation response cache (backend/api/response_cache.py)
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from response_cache import DiskCache, MemoryCache, ResponseCache, cache_key
+
+
+class CacheKeyTests(unittest.TestCase):
+    def test_key_ignores_proxy_fields_and_field_order(self):
+        payload = {'model': 'm', 'messages': [{'role': 'user', 'content': 'hi'}]}
+        same = dict(reversed(list(payload.items())), api_key='secret', no_cache=False, priority='batch')
+        self.assertEqual(cache_key(payload), cache_key(same))
+        self.assertNotEqual(cache_key(payload), cache_key(dict(payload, model='other')))
+
+
+class MemoryCacheTests(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted_first(self):
+        cache = MemoryCache(max_entries=2)
+        cache.put('a', b'1')
+        cache.put('b', b'2')
+        self.assertEqual(cache.get('a'), b'1')  # b is now the oldest
+        cache.put('c', b'3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'1')
+        self.assertEqual(cache.get('c'), b'3')
+
+    def test_byte_limit_evicts_and_oversized_bodies_are_skipped(self):
+        cache = MemoryCache(max_entries=10, max_bytes=10)
+        cache.put('a', b'12345')
+        cache.put('b', b'12345')
+        cache.put('c', b'123')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 8)
+
+        cache.put('big', b'x' * 11)
+        self.assertIsNone(cache.get('big'))
+        self.assertEqual(cache.size, 8)
+
+    def test_replacing_an_entry_keeps_the_size_accurate(self):
+        cache = MemoryCache()
+        cache.put('a', b'12345')
+        cache.put('a', b'12')
+        self.assertEqual(cache.size, 2)
+        self.assertEqual(cache.get('a'), b'12')
+
+    def test_expired_entries_are_dropped(self):
+        cache = MemoryCache(ttl=60)
+        cache.put('a', b'1', ttl=0.01)
+        cache.put('b', b'2')
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), b'2')
+        self.assertEqual(cache.size, 1)
+
+
+class DiskCacheTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.db_file = os.path.join(directory.name, 'cache.db')
+
+    def open(self, **kwargs):
+        disk = DiskCache(self.db_file, **kwargs)
+        self.addCleanup(disk.close)
+        return disk
+
+    def test_entries_survive_reopening(self):
+        disk = DiskCache(self.db_file)
+        disk.put('a', b'body')
+        disk.close()
+        self.assertEqual(self.open().get('a'), b'body')
+
+    def test_least_recently_accessed_rows_go_past_the_size_limit(self):
+        disk = self.open(max_bytes=10)
+        disk.put('a', b'12345')
+        time.sleep(0.01)
+        disk.put('b', b'12345')
+        time.sleep(0.01)
+        self.assertEqual(disk.get('a'), b'12345')  # a is now the most recently used
+        time.sleep(0.01)
+        disk.put('c', b'123')
+        self.assertIsNone(disk.get('b'))
+        self.assertEqual(disk.get('a'), b'12345')
+        self.assertEqual(disk.get('c'), b'123')
+
+    def test_expired_rows_are_not_returned(self):
+        disk = self.open()
+        disk.put('a', b'1', ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(disk.get('a'))
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_disk_hits_are_promoted_to_memory(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        disk = DiskCache(os.path.join(directory.name, 'cache.db'))
+        self.addCleanup(disk.close)
+        disk.put('a', b'body')
+        cache = ResponseCache(MemoryCache(), disk)
+
+        self.assertIsNone(cache.memory.get('a'))
+        self.assertEqual(cache.get('a'), b'body')
+        self.assertEqual(cache.memory.get('a'), b'body')
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_put_writes_both_tiers(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        disk = DiskCache(os.path.join(directory.name, 'cache.db'))
+        self.addCleanup(disk.close)
+        cache = ResponseCache(MemoryCache(), disk)
+        cache.put('a', b'body')
+        self.assertEqual(cache.memory.get('a'), b'body')
+        self.assertEqual(disk.get('a'), b'body')
+
+
+if __name__ == '__main__':
+    unittest.main()
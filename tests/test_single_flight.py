@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for request coalescing and shared streams (backend/api/single_flight.py)
+Run: python -m unittest discover tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from single_flight import SharedStream, SingleFlight
+
+
+def start_thread(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+class CoalescingTests(unittest.TestCase):
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            release.wait()
+            return 'body'
+
+        threads = [start_thread(lambda: results.append(flight.do('k', fetch))) for _ in range(5)]
+        while flight.coalesced < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('body', False)] + [('body', True)] * 4)
+
+    def test_followers_receive_the_leaders_error(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def fetch():
+            release.wait()
+            raise ValueError('upstream failed')
+
+        def call():
+            try:
+                flight.do('k', fetch)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [start_thread(call) for _ in range(3)]
+        while flight.coalesced < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(e is errors[0] for e in errors))
+
+    def test_calls_after_completion_run_again(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do('k', lambda: 1), (1, False))
+        self.assertEqual(flight.do('k', lambda: 2), (2, False))
+        self.assertEqual(flight.coalesced, 0)
+
+
+class SharedStreamTests(unittest.TestCase):
+    def test_follower_replays_from_the_first_chunk(self):
+        flight = SingleFlight()
+        stream, leader_reader, leader = flight.join_stream('k')
+        self.assertTrue(leader)
+        stream.start(200)
+        stream.append(b'a')
+        stream.append(b'b')
+
+        same, follower_reader, follower_leads = flight.join_stream('k')
+        self.assertIs(same, stream)
+        self.assertFalse(follower_leads)
+        stream.append(b'c')
+        stream.finish()
+
+        self.assertEqual(stream.wait_status(), 200)
+        self.assertEqual(list(stream.read(leader_reader)), [b'a', b'b', b'c'])
+        self.assertEqual(list(stream.read(follower_reader)), [b'a', b'b', b'c'])
+        self.assertEqual(flight.coalesced, 1)
+
+    def test_stream_past_the_replay_limit_is_not_joined(self):
+        flight = SingleFlight()
+        stream, reader, _ = flight.join_stream('k')
+        stream.replay_limit = 4
+        stream.start(200)
+        stream.append(b'abc')
+        stream.append(b'de')
+
+        fresh, _, leader = flight.join_stream('k')
+        self.assertTrue(leader)
+        self.assertIsNot(fresh, stream)
+        # The old stream still serves the reader that was attached
+        stream.finish()
+        self.assertEqual(list(stream.read(reader)), [b'abc', b'de'])
+
+    def test_read_chunks_are_released_once_not_joinable(self):
+        stream = SharedStream(replay_limit=0)
+        reader = stream.attach()
+        stream.start(200)
+        stream.append(b'a')
+        stream.append(b'b')
+        chunks = stream.read(reader)
+        self.assertEqual(next(chunks), b'a')
+        self.assertEqual(stream._buffered, 1)
+
+    def test_producer_waits_for_a_slow_reader(self):
+        stream = SharedStream(replay_limit=0, max_lag=2)
+        reader = stream.attach()
+        stream.start(200)
+        stream.append(b'aa')
+        stream.append(b'b')  # three bytes unread, more than max_lag
+        appended = threading.Event()
+        thread = start_thread(lambda: (stream.append(b'c'), appended.set()))
+        self.assertFalse(appended.wait(0.1))
+
+        chunks = stream.read(reader)
+        self.assertEqual(next(chunks), b'aa')
+        self.assertTrue(appended.wait(5))
+        thread.join(5)
+
+    def test_append_stops_once_every_reader_detaches(self):
+        stream = SharedStream()
+        first, second = stream.attach(), stream.attach()
+        stream.start(200)
+        self.assertTrue(stream.append(b'a'))
+        stream.detach(first)
+        self.assertTrue(stream.append(b'b'))
+        stream.detach(second)
+        stream.detach(second)  # idempotent
+        self.assertFalse(stream.append(b'c'))
+        self.assertIsNone(stream.attach())
+        self.assertEqual(stream._buffered, 0)
+
+    def test_startup_error_reaches_every_reader(self):
+        stream = SharedStream()
+        stream.attach()
+        stream.finish(ConnectionError('refused'))
+        with self.assertRaises(ConnectionError):
+            stream.wait_status()
+
+    def test_end_stream_only_removes_the_same_stream(self):
+        flight = SingleFlight()
+        old, _, _ = flight.join_stream('k')
+        old.finish()
+        flight.end_stream('k', old)
+        new, _, leader = flight.join_stream('k')
+        self.assertTrue(leader)
+        flight.end_stream('k', old)
+        self.assertIs(flight.join_stream('k')[0], new)
+
+
+if __name__ == '__main__':
+    unittest.main()
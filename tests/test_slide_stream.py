@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming SSE and slide parsers (backend/api/slide_stream.py)
+Run: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from slide_stream import SSEParser, SlideExtractor, extract_slides, format_event, text_delta, usage_from_event
+
+SLIDES_TEXT = 'Here you go:\n[{"title": "Intro", "content": "a {brace} and \\"quote\\""}, {"title": "B", "content": "x\\ny"}]'
+
+
+class SlideExtractorTests(unittest.TestCase):
+    def test_slides_are_emitted_once_complete_whatever_the_chunking(self):
+        for size in (1, 2, 7, len(SLIDES_TEXT)):
+            with self.subTest(size=size):
+                extractor = SlideExtractor()
+                slides = []
+                for i in range(0, len(SLIDES_TEXT), size):
+                    slides.extend(extractor.feed(SLIDES_TEXT[i:i + size]))
+                self.assertEqual(slides, [
+                    {'index': 0, 'title': 'Intro', 'content': 'a {brace} and "quote"'},
+                    {'index': 1, 'title': 'B', 'content': 'x\ny'}
+                ])
+
+    def test_first_slide_arrives_before_the_array_closes(self):
+        extractor = SlideExtractor()
+        self.assertEqual(extractor.feed('[{"title": "A", "content": "x"'), [])
+        self.assertEqual([s['title'] for s in extractor.feed('}, {"title": ')], ['A'])
+
+    def test_buffer_holds_only_the_unfinished_slide(self):
+        extractor = SlideExtractor()
+        extractor.feed('[' + '{"title": "A", "content": "x"}, ' * 100 + '{"title": "partial')
+        self.assertEqual(extractor.count, 100)
+        self.assertEqual(extractor._buffer, '{"title": "partial')
+
+    def test_objects_without_a_title_are_skipped(self):
+        extractor = SlideExtractor()
+        self.assertEqual(extractor.feed('[{"note": 1}, {"title": "A"}]'), [{'index': 0, 'title': 'A', 'content': ''}])
+
+
+class SSEParserTests(unittest.TestCase):
+    def feed(self, text):
+        parser = SSEParser()
+        events = [parser.feed_line(line) for line in text.splitlines(keepends=True)]
+        return [event for event in events if event is not None]
+
+    def test_events_fields_and_comments(self):
+        events = self.feed(': keep-alive\n\nevent: ping\ndata: {}\n\ndata: a\ndata:b\r\n\r\n')
+        self.assertEqual(events, [('ping', '{}'), ('message', 'a\nb')])
+
+    def test_upstream_text_and_usage(self):
+        delta = json.dumps({'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': 'hi'}})
+        self.assertEqual(text_delta('content_block_delta', delta), 'hi')
+        self.assertEqual(text_delta('message_stop', '{}'), '')
+        self.assertEqual(text_delta('content_block_delta', 'not json'), '')
+
+        start = json.dumps({'message': {'usage': {'input_tokens': 10, 'cache_read_input_tokens': 5}}})
+        self.assertEqual(usage_from_event('message_start', start), {'input_tokens': 10, 'cache_read_input_tokens': 5})
+        self.assertEqual(usage_from_event('message_delta', '{"usage": {"output_tokens": 3}}'), {'output_tokens': 3})
+        self.assertIsNone(usage_from_event('ping', '{}'))
+
+    def test_format_event_round_trips(self):
+        raw = format_event('slide', {'title': '소개'}).decode('utf-8')
+        self.assertEqual(self.feed(raw), [('slide', '{"title": "소개"}')])
+
+
+class ExtractSlidesTests(unittest.TestCase):
+    def test_fallback_parses_the_whole_text(self):
+        self.assertEqual([s['title'] for s in extract_slides(SLIDES_TEXT)], ['Intro', 'B'])
+        self.assertEqual(extract_slides('no slides here'), [])
+        self.assertEqual(extract_slides('[not json]'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
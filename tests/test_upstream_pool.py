@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for idle-connection reaping in the upstream pool (backend/api/upstream_pool.py)
+Run: python -m unittest discover tests
+"""
+
+import http.server
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api'))
+
+from upstream_pool import ConnectionPool
+
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class IdleReapingTests(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def idle_connections(self, pool):
+        return [conn for host in pool._hosts.values() for conn, _ in host.idle]
+
+    def test_evict_idle_closes_only_expired_connections(self):
+        pool = ConnectionPool(max_idle=60)
+        first, second = pool.open('GET', self.url), pool.open('GET', self.url)
+        for response in (first, second):
+            response.read()
+            response.close()
+        host = next(iter(pool._hosts.values()))
+        (stale, idle_since), (fresh, _) = host.idle
+        host.idle[0] = (stale, idle_since - 61)  # idle past max_idle
+
+        pool.evict_idle()
+        self.assertEqual(self.idle_connections(pool), [fresh])
+        self.assertIsNone(stale.sock)
+        self.assertIsNotNone(fresh.sock)
+        pool.close()
+
+    def test_reaper_closes_connections_idle_past_the_limit(self):
+        pool = ConnectionPool(max_idle=0.2)
+        pool.start_reaper(interval=0.05)
+        self.assertEqual(pool.request('GET', self.url)[0], 200)
+        conns = self.idle_connections(pool)
+        self.assertEqual(len(conns), 1)
+
+        deadline = time.monotonic() + 2.0
+        while self.idle_connections(pool) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.idle_connections(pool), [])
+        self.assertIsNone(conns[0].sock)
+
+        pool.close()
+        pool._reaper.join(1.0)
+        self.assertFalse(pool._reaper.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
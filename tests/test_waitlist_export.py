@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset pagination and the streaming CSV export (backend/api/waitlist-server.py)
+Run: python -m unittest discover tests
+
+Needs the waitlist server's dependencies (Flask, flask-cors, python-dotenv);
+the tests are skipped when they are not installed.
+"""
+
+import csv
+import gzip
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'api')
+sys.path.insert(0, API_DIR)
+
+# The module opens its database and starts the outbox on import
+_db_dir = tempfile.TemporaryDirectory()
+os.environ['WAITLIST_DB'] = os.path.join(_db_dir.name, 'waitlist.db')
+os.environ['EMAIL_WORKERS'] = '0'
+
+try:
+    import waitlist_wsgi
+except ImportError as e:
+    waitlist_wsgi = None
+    MISSING = str(e)
+else:
+    MISSING = ''
+    server = waitlist_wsgi.waitlist_server
+
+ADMIN = {'Authorization': 'Bearer admin_token_123'}
+
+
+def tearDownModule():
+    if waitlist_wsgi is not None:
+        server.db.writer.close()
+        server.db.pool.close_all()
+    _db_dir.cleanup()
+
+
+@unittest.skipIf(waitlist_wsgi is None, f'waitlist server dependencies missing: {MISSING}')
+class WaitlistTestCase(unittest.TestCase):
+    def setUp(self):
+        self.db = server.db
+        self.db.pool.write(lambda conn: conn.execute('DELETE FROM waitlist_signups'))
+
+    def insert(self, rows):
+        """Insert (email, name, user_type, created_at) rows directly, in order."""
+        self.db.pool.write(lambda conn: conn.executemany(
+            'INSERT INTO waitlist_signups (email, name, user_type, created_at) VALUES (?, ?, ?, ?)', rows
+        ))
+
+    def all_pages(self, limit, **filters):
+        emails, cursor, pages = [], None, 0
+        while True:
+            page = self.db.get_signups_page(limit=limit, cursor=cursor, **filters)
+            self.assertTrue(page['success'])
+            self.assertLessEqual(len(page['signups']), limit)
+            emails.extend(signup['email'] for signup in page['signups'])
+            pages += 1
+            cursor = page['next_cursor']
+            self.assertEqual(page['has_more'], cursor is not None)
+            if cursor is None:
+                return emails, pages
+
+
+class PaginationTests(WaitlistTestCase):
+    def setUp(self):
+        super().setUp()
+        # Several rows share a timestamp, so the id breaks ties across page boundaries
+        self.insert([
+            (f'user{i}@example.com', f'User {i}', 'student' if i % 2 else 'business',
+             f'2025-01-0{1 + i // 3} 10:00:00')
+            for i in range(10)
+        ])
+        self.oldest_first = [f'user{i}@example.com' for i in range(10)]
+
+    def test_pages_cover_every_row_once_in_both_orders(self):
+        for limit in (1, 3, 4, 9, 10, 11):
+            with self.subTest(limit=limit):
+                emails, _ = self.all_pages(limit)
+                self.assertEqual(emails, self.oldest_first[::-1])
+                emails, _ = self.all_pages(limit, descending=False)
+                self.assertEqual(emails, self.oldest_first)
+
+    def test_exactly_full_last_page_has_no_cursor(self):
+        _, pages = self.all_pages(5)
+        self.assertEqual(pages, 2)
+        page = self.db.get_signups_page(limit=10)
+        self.assertEqual((len(page['signups']), page['has_more'], page['next_cursor']), (10, False, None))
+
+    def test_filters_apply_across_pages(self):
+        emails, _ = self.all_pages(2, user_type='student', descending=False)
+        self.assertEqual(emails, [f'user{i}@example.com' for i in range(1, 10, 2)])
+        emails, _ = self.all_pages(2, since='2025-01-02 00:00:00', until='2025-01-03 23:59:59')
+        self.assertEqual(emails, [f'user{i}@example.com' for i in range(8, 2, -1)])
+
+    def test_empty_result(self):
+        page = self.db.get_signups_page(limit=5, user_type='nobody')
+        self.assertEqual((page['signups'], page['has_more'], page['next_cursor']), ([], False, None))
+
+    def test_cursor_round_trip_and_invalid_cursors(self):
+        cursor = server.encode_cursor('2025-01-01 10:00:00', 7)
+        self.assertEqual(server.decode_cursor(cursor), ('2025-01-01 10:00:00', 7))
+        for bad in ('not-a-cursor', server.encode_cursor('x', 'y'), 'W10='):
+            with self.assertRaises(ValueError):
+                server.decode_cursor(bad)
+
+    def test_admin_endpoint_rejects_bad_cursor_and_streams_ndjson(self):
+        client = server.app.test_client()
+        self.assertEqual(client.get('/admin/signups?cursor=bogus', headers=ADMIN).status_code, 400)
+        response = client.get('/admin/signups?format=ndjson&order=asc', headers=ADMIN)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 10)
+        self.assertIn('user0@example.com', lines[0])
+
+
+class ExportTests(WaitlistTestCase):
+    def read_csv(self, data):
+        text = data.decode('utf-8')
+        self.assertTrue(text.startswith('\ufeff'))
+        return list(csv.reader(io.StringIO(text[1:])))
+
+    def test_csv_chunks_quote_and_split_rows(self):
+        rows = [('a@example.com', 'Kim, "Jay"'), ('b@example.com', '줄\n바꿈')] * 50
+        original = server.EXPORT_CHUNK_BYTES
+        server.EXPORT_CHUNK_BYTES = 256
+        try:
+            chunks = list(server.csv_chunks(['Email', 'Name'], rows))
+        finally:
+            server.EXPORT_CHUNK_BYTES = original
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(self.read_csv(b''.join(chunks)), [['Email', 'Name']] + [list(row) for row in rows])
+
+    def test_export_is_incremental_from_since_id(self):
+        self.insert([(f'user{i}@example.com', f'User {i}', 'student', f'2025-01-01 10:00:0{i}') for i in range(3)])
+        client = server.app.test_client()
+        self.assertEqual(client.get('/admin/export').status_code, 401)
+
+        response = client.get('/admin/export?columns=email,name&order=asc', headers=ADMIN)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read_csv(response.data), [
+            ['Email', 'Name'],
+            ['user0@example.com', 'User 0'],
+            ['user1@example.com', 'User 1'],
+            ['user2@example.com', 'User 2']
+        ])
+        last_id = response.headers['X-Export-Last-Id']
+
+        self.insert([('late@example.com', 'Late', 'student', '2025-01-02 10:00:00')])
+        response = client.get(f'/admin/export?columns=email&since_id={last_id}', headers=ADMIN)
+        self.assertEqual(self.read_csv(response.data), [['Email'], ['late@example.com']])
+
+    def test_export_rejects_unknown_columns_and_gzips_on_request(self):
+        self.insert([('a@example.com', 'A', 'student', '2025-01-01 10:00:00')])
+        client = server.app.test_client()
+        self.assertEqual(client.get('/admin/export?columns=email,password', headers=ADMIN).status_code, 400)
+
+        response = client.get('/admin/export?columns=email&compress=gzip', headers=ADMIN)
+        self.assertEqual(response.mimetype, 'application/gzip')
+        self.assertEqual(self.read_csv(gzip.decompress(response.data)), [['Email'], ['a@example.com']])
+
+
+if __name__ == '__main__':
+    unittest.main()